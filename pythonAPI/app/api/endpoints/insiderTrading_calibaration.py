@@ -15,6 +15,7 @@ from __future__ import annotations
 
 import os
 import re
+from datetime import date
 from typing import Optional, Literal, Tuple, Dict, List
 
 import numpy as np
@@ -29,8 +30,10 @@ from pydantic import BaseModel, Field
 # --- dual import so it works from project root OR /app ---
 try:
     from app.core.paths import SIMULATED_DIR, RESULTS_DIR
+    from app.core.datasets import alerts_history_sources, list_alert_sources, read_alerts_history
 except ModuleNotFoundError:
     from core.paths import SIMULATED_DIR, RESULTS_DIR
+    from core.datasets import alerts_history_sources, list_alert_sources, read_alerts_history
 SIMULATED_DIR_DEFAULT = str(SIMULATED_DIR)
 RESULTS_DIR_DEFAULT   = str(RESULTS_DIR)
 
@@ -98,7 +101,9 @@ class Params(BaseModel):
     force_proxy_scoring: bool = False
 
 class RefineRequest(BaseModel):
-    out_dir: str = Field(SIMULATED_DIR_DEFAULT, description="Directory containing latest simulated alerts (CSV or Parquet)")
+    out_dir: str = Field(SIMULATED_DIR_DEFAULT, description="Directory containing simulated alerts (CSV or Parquet)")
+    start: Optional[date] = Field(None, description="First alert day to load (default: all history)")
+    end: Optional[date] = Field(None, description="Last alert day to load (default: all history)")
     limit: Optional[int] = Field(None, ge=1, description="Cut row count to this many (after load & filtering)")
     return_mode: Literal["all","tp_only"] = "all"
     params: Params = Field(default_factory=Params)
@@ -124,37 +129,47 @@ class RefineResponse(BaseModel):
 # File IO
 # -----------------------------
 def _list_candidate_files(base_dir: str) -> list[str]:
+    """CSV files, newest first (Parquet sources go through the history reader)."""
     try:
-        all_files = [os.path.join(base_dir, f) for f in os.listdir(base_dir)]
+        return [str(p) for p in list_alert_sources(base_dir, suffixes=(".csv",)) if p.is_file()]
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail=f"Directory not found: {base_dir}")
-    files = [f for f in all_files if f.lower().endswith((".csv",".parquet"))]
-    files.sort(key=lambda p: os.path.getmtime(p), reverse=True)
-    return files
-
-def _load_latest_dataframe(out_dir: str, report_short_name: Optional[str]) -> pd.DataFrame:
-    files = _list_candidate_files(out_dir)
-    if not files:
-        raise HTTPException(status_code=404, detail=f"No CSV/Parquet files found in: {out_dir}")
-
-    # Prefer a file whose name contains `report_short_name`
-    best = None
-    if report_short_name:
-        key = report_short_name.lower()
-        for f in files:
-            if key in os.path.basename(f).lower():
-                best = f
-                break
-    if best is None:
-        best = files[0]
 
-    try:
-        if best.lower().endswith(".csv"):
+def _read_history_dataframe(sources: list, start: Optional[date], end: Optional[date],
+                            report_short_name: Optional[str]) -> pd.DataFrame:
+    """All Parquet / Hive sources as one table (newest alert_id wins), report type filtered before pandas."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    table = read_alerts_history(sources, start, end)
+    if report_short_name and "report_short_name" in table.column_names:
+        rsn = pc.utf8_lower(table.column("report_short_name").cast(pa.string()))
+        table = table.filter(pc.equal(rsn, report_short_name.lower()))
+    return table.to_pandas()
+
+def _load_alerts_dataframe(out_dir: str, report_short_name: Optional[str],
+                           start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+    # Every Parquet file / Hive dataset whose date window overlaps [start, end]
+    sources = alerts_history_sources(out_dir, start, end)
+    if sources:
+        try:
+            df = _read_history_dataframe(sources, start, end, report_short_name)
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to read alerts history in {out_dir}: {e}")
+    else:
+        # CSV-only folder: the newest CSV, preferring one whose name contains `report_short_name`
+        files = [] if alerts_history_sources(out_dir) else _list_candidate_files(out_dir)
+        if not files:
+            window = f" covering {start or '…'}..{end or '…'}" if (start or end) else ""
+            raise HTTPException(status_code=404, detail=f"No CSV/Parquet files{window} found in: {out_dir}")
+        best = files[0]
+        if report_short_name:
+            key = report_short_name.lower()
+            best = next((f for f in files if key in os.path.basename(f).lower()), best)
+        try:
             df = pd.read_csv(best)
-        else:
-            df = pd.read_parquet(best)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to read file {best}: {e}")
+        except Exception as e:
+            raise HTTPException(status_code=500, detail=f"Failed to read file {best}: {e}")
 
     # Optional in-file filter
     if report_short_name and "report_short_name" in df.columns:
@@ -317,7 +332,7 @@ def refine_insider_trading(request: RefineRequest = Body(...)):
       - target_count: aim for target_tp_min..target_tp_max True Positives (size-aware)
     """
     # 1) Load data
-    df = _load_latest_dataframe(request.out_dir, request.params.report_short_name)
+    df = _load_alerts_dataframe(request.out_dir, request.params.report_short_name, request.start, request.end)
 
     # 2) Optional limit
     if request.limit is not None:
@@ -348,8 +363,8 @@ def refine_insider_trading(request: RefineRequest = Body(...)):
         if col not in out_df.columns:
             out_df[col] = np.nan
 
-    # Convert to list of dicts (records)
-    results = out_df.to_dict(orient="records")
+    # Convert to list of dicts (records); missing values (NaN / NaT in timestamp columns) -> None
+    results = out_df.astype(object).where(out_df.notna(), None).to_dict(orient="records")
     extras = _summarize(df, used_threshold)
 
     return RefineResponse(
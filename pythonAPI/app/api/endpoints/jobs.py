@@ -0,0 +1,132 @@
+# app/api/endpoints/jobs.py
+# ---------------------------------------------------------------------------
+# Background job API: submit long-running operations, poll, cancel.
+#
+#   POST /jobs/simulate/alerts             body = GenerateRequest   (same as POST /simulate/alerts)
+#   POST /jobs/simulate/alerts/calibrate   body = CalibrateRequest  (same as POST /simulate/alerts/calibrate)
+#   POST /jobs/simulate/trades             body = TapeRequest       (same as POST /simulate/trades)
+#   POST /jobs/pumpdumpml/detect           body = DetectRequest     (same as POST /pumpdumpml/detect)
+#   GET  /jobs                             recent jobs (newest first)
+#   GET  /jobs/{job_id}                    status, progress, per-stage timings, output paths
+#   GET  /jobs/{job_id}/result             the endpoint's normal response once succeeded
+#   POST /jobs/{job_id}/cancel             cooperative cancellation
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Body, HTTPException
+from pydantic import BaseModel, Field
+
+try:
+    from app.core import jobs
+except ModuleNotFoundError:
+    from core import jobs
+
+from app.api.endpoints.simulate_data_sgx import GenerateRequest, generate_alerts
+from app.api.endpoints.simulate_trade_tape import TapeRequest, generate_trade_tape
+from app.api.endpoints.pumpdump_calibaration import CalibrateRequest, DEFAULT_EXAMPLE, calibrate_latest_pumpdump
+from app.api.endpoints.pumpdump_ml_engine import DetectRequest, detect_pumpdump_ml
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+class StageTiming(BaseModel):
+    name: str
+    started_at: datetime
+    seconds: Optional[float] = None
+
+
+class JobStatus(BaseModel):
+    job_id: str
+    kind: str
+    status: str = Field(..., description="queued | running | succeeded | failed | cancelled")
+    progress: float = Field(..., ge=0.0, le=1.0)
+    done: int
+    total: int
+    message: Optional[str] = None
+    stage: Optional[str] = None
+    stages: List[StageTiming] = []
+    outputs: Dict[str, Any] = {}
+    error: Optional[str] = None
+    cancel_requested: bool = False
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    poll_url: str
+
+
+def _status(job: jobs.Job) -> JobStatus:
+    return JobStatus(**job.snapshot(), poll_url=f"/jobs/{job.id}")
+
+
+def _submit(kind: str, fn, req: BaseModel) -> JobStatus:
+    try:
+        job = jobs.submit(kind, fn, req)
+    except jobs.JobQueueFull as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return _status(job)
+
+
+def _get_or_404(job_id: str) -> jobs.Job:
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job
+
+
+# -----------------------------
+# Submission
+# -----------------------------
+@router.post("/simulate/alerts", response_model=JobStatus, status_code=202,
+             summary="Submit SGX alert generation as a background job")
+def submit_generate_alerts(req: GenerateRequest = Body(...)) -> JobStatus:
+    return _submit("simulate_alerts", generate_alerts, req)
+
+
+@router.post("/simulate/alerts/calibrate", response_model=JobStatus, status_code=202,
+             summary="Submit Pump & Dump calibration as a background job")
+def submit_calibrate(req: CalibrateRequest = Body(..., examples=DEFAULT_EXAMPLE)) -> JobStatus:
+    return _submit("pumpdump_calibrate", calibrate_latest_pumpdump, req)
+
+
+@router.post("/simulate/trades", response_model=JobStatus, status_code=202,
+             summary="Submit trade-tape generation as a background job")
+def submit_trade_tape(req: TapeRequest = Body(...)) -> JobStatus:
+    return _submit("simulate_trades", generate_trade_tape, req)
+
+
+@router.post("/pumpdumpml/detect", response_model=JobStatus, status_code=202,
+             summary="Submit Pump & Dump ML detection as a background job")
+def submit_detect(req: DetectRequest = Body(...)) -> JobStatus:
+    return _submit("pumpdump_ml_detect", detect_pumpdump_ml, req)
+
+
+# -----------------------------
+# Polling / control
+# -----------------------------
+@router.get("", response_model=List[JobStatus], summary="List recent jobs (newest first)")
+def list_jobs(status: Optional[str] = None) -> List[JobStatus]:
+    return [_status(j) for j in jobs.list_jobs() if status is None or j.status == status]
+
+
+@router.get("/{job_id}", response_model=JobStatus, summary="Job status, progress, stage timings and outputs")
+def get_job(job_id: str) -> JobStatus:
+    return _status(_get_or_404(job_id))
+
+
+@router.get("/{job_id}/result", summary="Result payload of a finished job")
+def get_job_result(job_id: str) -> Any:
+    job = _get_or_404(job_id)
+    if job.status in jobs.ACTIVE_STATES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is still {job.status}.")
+    if job.status != "succeeded":
+        raise HTTPException(status_code=409, detail=f"Job {job_id} {job.status}: {job.error or 'no result'}")
+    return job.result
+
+
+@router.post("/{job_id}/cancel", response_model=JobStatus, summary="Request cancellation of a job")
+def cancel_job(job_id: str) -> JobStatus:
+    _get_or_404(job_id)
+    return _status(jobs.cancel(job_id))
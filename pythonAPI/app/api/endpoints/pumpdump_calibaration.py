@@ -3,13 +3,16 @@ from __future__ import annotations
 
 import json
 import os
+from time import perf_counter
 from datetime import date, datetime, time, timezone, timedelta
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Annotated, Dict, List, Tuple, Union
 
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Body, HTTPException
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import APIRouter, Body, Header, HTTPException
 from pydantic import BaseModel, Field, model_validator
 from typing import Optional, Tuple  # make sure at top of file
 # -------------------------------------------------------------------
@@ -18,8 +21,18 @@ from typing import Optional, Tuple  # make sure at top of file
 # Defaults changed to relative paths (originals were absolute) :contentReference[oaicite:18]{index=18}
 try:
     from app.core.paths import SIMULATED_DIR, RESULTS_DIR
+    from app.core.datasets import alerts_history_sources, read_alerts_history
+    from app.core.catalog import KIND_PUMPDUMP_CALIBRATION, register_artifact
+    from app.core.formats import bulk_response, negotiate, table_batches
+    from app.core.volume_baseline import refresh_volume_baseline, rolling_median_volume
+    from app.core import jobs
 except ModuleNotFoundError:
     from core.paths import SIMULATED_DIR, RESULTS_DIR
+    from core.datasets import alerts_history_sources, read_alerts_history
+    from core.catalog import KIND_PUMPDUMP_CALIBRATION, register_artifact
+    from core.formats import bulk_response, negotiate, table_batches
+    from core.volume_baseline import refresh_volume_baseline, rolling_median_volume
+    from core import jobs
 SIMULATED_DIR_DEFAULT = str(SIMULATED_DIR)
 RESULTS_DIR_DEFAULT   = str(RESULTS_DIR)
 
@@ -40,8 +53,6 @@ TRUE_POSITIVE_THRESHOLD_DEFAULT: float = 0.80
 STRICT_REQUIRE_VOLUME: bool = True        # volume_ok must be True (we may auto-relax once)
 STRICT_TARGET_MIN: int = 5                # aim for 5–12 TPs
 STRICT_TARGET_MAX: int = 20
-STRICT_STEP_UP: float = 0.02              # raise threshold step when too many TPs
-STRICT_STEP_DOWN: float = 0.01            # lower threshold step if too few TPs
 STRICT_MIN_THRESHOLD: float = 0.75        # never go below this when trying to reach min
 STRICT_MAX_THRESHOLD: float = 0.995       # practical ceiling when tightening
 
@@ -78,7 +89,7 @@ class Params(BaseModel):
     dump_pct: float = Field(..., ge=0, description="Required dump (drop) % from pumped price.")
     window_minutes: int = Field(..., ge=1, description="Expected alert total window (start→end).")
     dump_window_minutes: int = Field(..., ge=1, description="Max window for pump→dump legs.")
-    vol_window: int = Field(..., ge=1, description="Used to compute baseline volume per symbol.")
+    vol_window: int = Field(..., ge=1, description="Days in the rolling per-symbol median volume baseline (up to the pump's day).")
     vol_mult: float = Field(..., ge=0, description="Pump volume must exceed (median_vol * vol_mult)")
     resample_rule: str = Field(..., description="Granularity hint; used to evaluate min_bars, e.g. '1min'.")
     min_bars: int = Field(..., ge=1, description="Minimum bars (proxy via minutes) between legs.")
@@ -133,8 +144,9 @@ class Explanation(BaseModel):
     meaning: str | None = None
 
 class Incident(BaseModel):
-    alert_id: str | None = None
+    alert_id: int | str | None = None  # int64 with id_scheme='snowflake'
     security_name: str | None = None
+    security_id: int | None = None
     security_type: str | None = None
     brokerage: str | None = None
     pump_ts: str | None = None
@@ -155,35 +167,92 @@ class Incident(BaseModel):
     decision: str  # "True Positive" | "True Negative"
     explanations: List[Explanation] = []
 
+class TpCurve(BaseModel):
+    gate: str                 # "strict" (hard rules + volume when required) | "relaxed_volume"
+    thresholds: List[float]   # distinct rubric scores of gated rows, descending
+    tp_counts: List[int]      # TPs with rubric_score >= threshold
+    exact: bool = True        # False when thinned to TP_CURVE_MAX_POINTS steps
+
 class CalibrateResponse(BaseModel):
     message: str
     count: int
     true_positive_count: int
     returned: int
+    threshold: float | None = None   # strict TP threshold solved for
+    strategy: str | None = None
+    tp_curve: List[TpCurve] = []
     csv_path: str
     parquet_path: str
     latest_parquet: str
+    sources: List[str] = []   # every simulated source the window was read from, newest first
     folder_simulated: str
     folder_results: str
     results: List[dict]
 
+# ---- Parameter sweep ----
+class SweepRange(BaseModel):
+    start: float
+    stop: float = Field(..., description="Inclusive upper bound.")
+    step: float = Field(..., gt=0)
+
+SweepAxis = Union[List[float], SweepRange]
+
+class SweepGrid(BaseModel):
+    """Values to sweep per field (a list or an inclusive range); an omitted field keeps the request's value."""
+    pump_pct: Optional[SweepAxis] = None
+    dump_pct: Optional[SweepAxis] = None
+    vol_mult: Optional[SweepAxis] = None
+    dump_window_minutes: Optional[SweepAxis] = None
+    min_bars: Optional[SweepAxis] = None
+    pump_strength: Optional[SweepAxis] = None
+    dump_strength: Optional[SweepAxis] = None
+    volume_strength: Optional[SweepAxis] = None
+
+class SweepRequest(CalibrateRequest):
+    grid: SweepGrid = Field(default_factory=SweepGrid)
+    threshold: float = Field(TRUE_POSITIVE_THRESHOLD_DEFAULT, ge=0, le=1, description="Rubric score a TP needs.")
+    bins: int = Field(20, ge=1, le=200, description="Rubric histogram bins over [0, 1].")
+
+class SweepPoint(BaseModel):
+    pump_pct: float
+    dump_pct: float
+    vol_mult: float
+    dump_window_minutes: float
+    min_bars: float
+    pump_strength: float      # weights normalized to sum to 1
+    dump_strength: float
+    volume_strength: float
+    tp_count: int             # base decision: hard rules + rubric >= threshold (volume soft)
+    strict_tp_count: int      # ... and volume_ok (the strict gate, before threshold tuning)
+    hard_pass_count: int      # hard rules only
+    rubric_mean: float
+    rubric_hist: List[int]
+
+class SweepResponse(BaseModel):
+    message: str
+    count: int                # scored alert pairs
+    points: int               # grid points evaluated
+    threshold: float
+    rubric_bins: List[float]  # histogram bin edges
+    sources: List[str] = []
+    elapsed_ms: float
+    results: List[SweepPoint]
+
 # -------------------------------------------------------------------
 # Helpers
 # -------------------------------------------------------------------
 def _ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
-def _find_latest_parquet(folder: str) -> Path:
+def _find_history_sources(folder: str, start: str, end: str) -> List[Path]:
+    """Every flat *.parquet / Hive dataset in `folder` holding days in [start, end], newest first."""
     p = Path(folder)
     if not p.exists() or not p.is_dir():
         raise HTTPException(status_code=400, detail=f"Folder not found: {folder}")
-    files = sorted(p.glob("*.parquet"), key=lambda x: x.stat().st_mtime, reverse=True)
-    if not files:
-        raise HTTPException(status_code=404, detail=f"No Parquet files found in: {folder}")
-    return files[0]
-
-def _minutes_between(ts1: pd.Timestamp, ts2: pd.Timestamp) -> float:
-    return float((ts2 - ts1).total_seconds() / 60.0)
+    sources = alerts_history_sources(p, start, end)
+    if not sources:
+        raise HTTPException(status_code=404, detail=f"No Parquet files covering {start}..{end} in: {folder}")
+    return sources
 
 def _parse_minutes_from_rule(rule: str) -> int:
     """Very simple parser for '1min', '5min', '15min' etc. Defaults to 1 on parse failure."""
@@ -195,89 +264,88 @@ def _parse_minutes_from_rule(rule: str) -> int:
         pass
     return 1
 
-def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
-    def norm(c: str) -> str:
-        c = c.strip().lower()
-        for ch in ["&", "/", "-", "(", ")", "."]:
-            c = c.replace(ch, " ")
-        return "_".join(c.split())
-    return df.rename(columns=norm)
-
 # -------------------------------------------------------------------
 # Data loaders
 # -------------------------------------------------------------------
-def _load_pumpdump_subset(parquet_path: Path, start: str, end: str) -> pd.DataFrame:
+def _plain_categories(df: pd.DataFrame) -> pd.DataFrame:
+    """Dictionary columns arrive as pandas categoricals; the row-wise scoring wants plain objects."""
+    for c in df.select_dtypes("category").columns:
+        df[c] = df[c].astype(object)
+    return df
+
+# Columns calibration reads: leg pairing, scoring, output identity and the volume baseline
+CALIBRATION_COLUMNS = (
+    "alert_id", "report_short_name", "date", "ts", "market_side", "comments", "pd_leg",
+    "security_name", "security_id", "security_type", "brokerage",
+    "price", "total_volume", "trade_id", "order_id",
+)
+BASELINE_COLUMNS = ("security_name", "security_id", "total_volume", "date")
+PUMP_AND_DUMP_NAMES = ("pump and dump", "pump_and_dump")
+
+def _load_calibration_inputs(sources: List[Path], start: str, end: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
     """
-    Efficiently read pump & dump rows from latest Parquet between date range.
-    Works with both legacy (spaced) and snake_case columns.
+    (pump & dump subset, volume baseline) from ONE scan of every overlapping source (see
+    `_find_history_sources`; an alert_id present in several files comes from the newest).
+    Only CALIBRATION_COLUMNS are read and the date window is pushed into the scan (Hive
+    date= / report_short_name= partitions are pruned before any file is opened). The baseline
+    is every alert in the window, not only Pump & Dump. Works with both legacy (spaced) and
+    snake_case columns.
     """
     try:
-        import pyarrow as pa
-        import pyarrow.dataset as ds
-        dataset = ds.dataset(str(parquet_path), format="parquet")
-        try:
-            filt = (
-                (ds.field("report_short_name") == pa.scalar("Pump and Dump")) &
-                (ds.field("date") >= pa.scalar(start)) &
-                (ds.field("date") <= pa.scalar(end))
-            )
-            table = dataset.to_table(filter=filt)
-        except Exception:
-            table = dataset.to_table()
-        df = table.to_pandas()
-    except Exception:
-        df = pd.read_parquet(str(parquet_path))
-
-    df = _normalize_columns(df)
+        table = read_alerts_history(sources, start, end, columns=CALIBRATION_COLUMNS)
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:  # sources whose schemas cannot be scanned together
+        raise HTTPException(status_code=500, detail=f"Failed to read alerts history ({len(sources)} sources): {e}")
+    baseline = table.select([c for c in BASELINE_COLUMNS if c in table.column_names]).to_pandas()
+    if "report_short_name" in table.column_names:
+        # Robust match against values like "Pump and Dump", "pump_and_dump", "pump and dump", etc.
+        rsn = pc.utf8_lower(pc.utf8_trim_whitespace(table.column("report_short_name").cast(pa.string())))
+        table = table.filter(pc.is_in(rsn, value_set=pa.array(PUMP_AND_DUMP_NAMES)))
+    return _pumpdump_subset(_plain_categories(table.to_pandas())), _volume_baseline(baseline)
+
+def _pumpdump_subset(df: pd.DataFrame) -> pd.DataFrame:
+    """Pump & Dump rows with `ts` and numeric price / volume."""
     if "report_short_name" not in df.columns:
         return pd.DataFrame(columns=[])
 
-    # Robust match against values like "Pump and Dump", "pump_and_dump", "pump and dump", etc.
     rsn = df["report_short_name"].astype(str).str.strip().str.lower()
-    subset = df[rsn.isin({"pump and dump", "pump_and_dump"})].copy()
+    subset = df[rsn.isin(PUMP_AND_DUMP_NAMES)].copy()
 
-    if "date" in subset.columns:
-        subset = subset[(subset["date"] >= start) & (subset["date"] <= end)]
-
-    if {"date", "time"}.issubset(subset.columns):
-        subset["ts"] = pd.to_datetime(subset["date"] + " " + subset["time"], errors="coerce")
+    if "ts" in subset.columns:
+        subset["ts"] = pd.to_datetime(subset["ts"], errors="coerce")
+    elif {"date", "time"}.issubset(subset.columns):
+        subset["ts"] = pd.to_datetime(subset["date"].astype(str) + " " + subset["time"].astype(str), errors="coerce")
     else:
         subset["ts"] = pd.to_datetime(subset.get("timestamp", pd.NaT), errors="coerce")
 
-    for col in ("price", "total_volume", "value"):
+    for col in ("price", "total_volume"):
         if col in subset.columns:
-            subset[col] = pd.to_numeric(subset[col], errors="coerce")  # <-- correct call
+            subset[col] = pd.to_numeric(subset[col], errors="coerce")
 
     return subset
 
-def _load_baseline_for_volume(parquet_path: Path, start: str, end: str) -> pd.DataFrame:
-    """
-    Load a light dataframe for baseline volume per symbol using ALL alerts in the date range
-    (not only Pump & Dump). Works with both legacy and snake_case columns.
-    """
-    try:
-        import pyarrow.dataset as ds
-        dataset = ds.dataset(str(parquet_path), format="parquet")
-        table = dataset.to_table()
-        df = table.to_pandas()
-    except Exception:
-        df = pd.read_parquet(str(parquet_path))
-
-    df = _normalize_columns(df)
+def _volume_baseline(df: pd.DataFrame) -> pd.DataFrame:
+    """Light dataframe for the per-symbol baseline volume (all alerts, rows with a symbol and a volume)."""
     needed = {"security_name", "total_volume", "date"}
     if not needed.issubset(df.columns):
         return pd.DataFrame(columns=["security_name", "total_volume", "date"])
 
-    df = df[(df["date"] >= start) & (df["date"] <= end)].copy()
+    cols = ["security_name", "total_volume", "date"] + (["security_id"] if "security_id" in df.columns else [])
+    df = df[cols].copy()
     df["total_volume"] = pd.to_numeric(df["total_volume"], errors="coerce")
     df = df.dropna(subset=["security_name", "total_volume"])
-    return df[["security_name", "total_volume", "date"]]
+    return df
+
+def _security_key(df: pd.DataFrame) -> str:
+    """Integer security_id (security master) when every row has one; security_name for older files."""
+    if "security_id" in df.columns and len(df) and df["security_id"].notna().all():
+        return "security_id"
+    return "security_name"
 
-def _compute_symbol_median_volume(baseline_df: pd.DataFrame) -> Dict[str, float]:
+def _compute_symbol_median_volume(baseline_df: pd.DataFrame, key: str = "security_name") -> Dict[object, float]:
     """Robust baseline: median total_volume by security across ALL alerts in the window."""
     if baseline_df.empty:
         return {}
-    med = baseline_df.groupby("security_name")["total_volume"].median().fillna(0.0)
+    med = baseline_df.groupby(key, observed=True)["total_volume"].median().fillna(0.0)
     return med.to_dict()
 
 # -------------------------------------------------------------------
@@ -289,239 +357,346 @@ def _normalize_weights(pump: float, dump: float, vol: float) -> tuple[float, flo
         return 0.45, 0.45, 0.10
     return pump / total, dump / total, vol / total
 
-def _pick_pump_dump_rows(grp: pd.DataFrame, dump_window_minutes: int) -> Tuple[Optional[pd.Series], Optional[pd.Series]]:
+_TS_MAX = np.iinfo(np.int64).max
+
+def _leg_marker(df: pd.DataFrame, phase: str) -> np.ndarray:
+    """Rows explicitly marked as a leg: pd_leg PUMP / DUMP, else `phase=<pump|dump>` in comments."""
+    mark = np.zeros(len(df), dtype=bool)
+    untagged = np.ones(len(df), dtype=bool)
+    if "pd_leg" in df.columns:
+        leg = df["pd_leg"].astype(object)
+        mark = (leg == phase.upper()).to_numpy()
+        untagged = leg.isna().to_numpy()
+    if "comments" in df.columns and untagged.any():
+        comments = df["comments"].astype(object)[untagged].fillna("").astype(str)
+        mark[untagged] |= comments.str.contains(f"phase={phase}", regex=False).to_numpy()
+    return mark
+
+def _first_in_group(codes: np.ndarray, rows: np.ndarray, mask: np.ndarray, n_groups: int, last: bool = False) -> np.ndarray:
+    """Row of the first (or last) masked entry of every group, in an order sorted by (group, ts); -1 if none."""
+    out = np.full(n_groups, -1, dtype=np.int64)
+    c, r = codes[mask], rows[mask]
+    if last:
+        c, r = c[::-1], r[::-1]
+    groups, first = np.unique(c, return_index=True)
+    out[groups] = r[first]
+    return out
+
+def _pick_legs(df: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Positional (pump_rows, dump_rows) of every alert_id that has a pair, alerts in order of first
+    appearance. Explicit markers win (earliest marked BUY = pump, latest marked SELL = dump);
+    otherwise the earliest BUY is the pump and the first SELL after it the dump. Missing
+    timestamps sort last, as with `sort_values`.
+    """
+    n = len(df)
+    codes, uniques = pd.factorize(df["alert_id"])
+    n_groups = len(uniques)
+    ts = pd.DatetimeIndex(pd.to_datetime(df["ts"])).asi8
+    nat = pd.isna(df["ts"]).to_numpy()
+    side = df["market_side"].astype(object).to_numpy() if "market_side" in df.columns else np.full(n, None)
+    valid = codes >= 0
+    buy, sell = valid & (side == "BUY"), valid & (side == "SELL")
+
+    order = np.lexsort((np.arange(n), np.where(nat, _TS_MAX, ts), codes))
+    codes_s, buy_s, sell_s = codes[order], buy[order], sell[order]
+
+    pump_m = _first_in_group(codes_s, order, (buy & _leg_marker(df, "pump"))[order], n_groups)
+    dump_m = _first_in_group(codes_s, order, (sell & _leg_marker(df, "dump"))[order], n_groups, last=True)
+    marked = (pump_m >= 0) & (dump_m >= 0)
+
+    pump_f = _first_in_group(codes_s, order, buy_s, n_groups)
+    pump_ts = np.where((pump_f >= 0) & ~nat[pump_f], ts[pump_f], _TS_MAX)  # no / NaT pump: nothing is after it
+    after = sell_s & ~nat[order] & (ts[order] > pump_ts[np.maximum(codes_s, 0)])
+    dump_f = _first_in_group(codes_s, order, after, n_groups)
+
+    pump = np.where(marked, pump_m, pump_f)
+    dump = np.where(marked, dump_m, dump_f)
+    keep = (pump >= 0) & (dump >= 0)
+    return pump[keep], dump[keep]
+
+def _isoformat(ts: pd.Series) -> np.ndarray:
     """
-    Prefer explicit phase markers; else choose the earliest BUY as pump and the earliest SELL
-    *after that* within the dump_window. This reduces false failures on within_window.
+    `Timestamp.isoformat()` for a whole column (None for NaT): wall-clock time in the column's
+    zone, a fraction only where the value has one, and the UTC offset of tz-aware columns.
+    Works in nanoseconds whatever the stored unit (alerts carry `timestamp[us, tz=...]`).
     """
-    # Normalized convenience
-    mc = grp.get("market_side", pd.Series(dtype=object))
-    comments = grp.get("comments", pd.Series(dtype=object)).fillna("")
-    ts = pd.to_datetime(grp.get("ts"))
-
-    # Try explicit markers first
-    pump_candidates = grp[(mc == "BUY") & (comments.str.contains("phase=pump"))].sort_values("ts")
-    dump_candidates = grp[(mc == "SELL") & (comments.str.contains("phase=dump"))].sort_values("ts")
-    if not pump_candidates.empty and not dump_candidates.empty:
-        return pump_candidates.iloc[0], dump_candidates.iloc[-1]
-
-    # Fallback: earliest BUY, then earliest SELL after pump within window
-    buys = grp[mc == "BUY"].sort_values("ts")
-    sells = grp[mc == "SELL"].sort_values("ts")
-    if buys.empty or sells.empty:
-        return None, None
-
-    pump_row = buys.iloc[0]
-    pump_time = pd.to_datetime(pump_row.get("ts"))
-
-    sells_after = sells[pd.to_datetime(sells["ts"]) > pump_time]
-    if sells_after.empty:
-        return None, None
-
-    # pick the first SELL within dump_window; else the closest SELL after pump
-    time_diff = (pd.to_datetime(sells_after["ts"]) - pump_time).dt.total_seconds() / 60.0
-    within = sells_after[time_diff <= dump_window_minutes]
-    dump_row = within.iloc[0] if not within.empty else sells_after.iloc[0]
-    return pump_row, dump_row
-
-def _score_alert_pair(
-    pump_row: pd.Series,
-    dump_row: pd.Series,
-    median_vol_by_symbol: Dict[str, float],
+    idx = pd.DatetimeIndex(pd.to_datetime(ts)).as_unit("ns")
+    nat = idx.isna()
+    local = idx.tz_localize(None) if idx.tz is not None else idx
+    wall = local.asi8
+    text = np.datetime_as_string(local.to_numpy(), unit="s").astype(object)
+
+    frac = np.where(nat, 0, wall % 1_000_000_000)
+    if frac.any():
+        digits = pd.Series(np.where(frac % 1000 == 0, frac // 1000, frac)).astype(str)
+        digits = digits.str.zfill(6).where(frac % 1000 == 0, digits.str.zfill(9))
+        text = text + np.where(frac > 0, "." + digits.to_numpy(dtype=object), "")
+
+    if idx.tz is not None:
+        offsets = np.where(nat, 0, (wall - idx.tz_convert("UTC").tz_localize(None).asi8) // 60_000_000_000)
+        suffix = {m: f"{'+' if m >= 0 else '-'}{abs(m) // 60:02d}:{abs(m) % 60:02d}" for m in np.unique(offsets)}
+        text = text + pd.Series(offsets).map(suffix).to_numpy(dtype=object)
+    text[nat] = None
+    return text
+
+# columns _score_pairs reads from each leg
+_DUMP_COLUMNS = ("price", "total_volume", "ts", "trade_id", "order_id")
+_PUMP_COLUMNS = _DUMP_COLUMNS + ("alert_id", "security_name", "security_id", "security_type", "brokerage")
+
+def _num(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.zeros(len(df))
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+
+def _col(df: pd.DataFrame, col: str) -> np.ndarray:
+    return df[col].astype(object).to_numpy() if col in df.columns else np.full(len(df), None, dtype=object)
+
+def _pair_metrics(pump: pd.DataFrame, dump: pd.DataFrame, symbol_median: np.ndarray) -> Dict[str, object]:
+    """Parameter-free per-pair measurements every rule and score is a threshold on."""
+    pump_price, dump_price = _num(pump, "price"), _num(dump, "price")
+    pump_vol = _num(pump, "total_volume")
+    pump_ts = pd.to_datetime(pump["ts"]).reset_index(drop=True)
+    dump_ts = pd.to_datetime(dump["ts"]).reset_index(drop=True)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # --- Price move proxies (fmax / fmin treat NaN like the scalar max / min did)
+        drop_pct = np.where(pump_price > 0, np.fmax(0.0, (pump_price - dump_price) / pump_price * 100.0), 0.0)
+        increase_pct = np.where(dump_price > 0, np.fmax(0.0, (pump_price - dump_price) / dump_price * 100.0), 0.0)
+        # --- Volume uplift vs symbol median (soft factor in base)
+        vol_uplift = np.where(symbol_median > 0, pump_vol / symbol_median, 0.0)
+    return {
+        "pump_ts": pump_ts,
+        "dump_ts": dump_ts,
+        "pump_price": pump_price,
+        "dump_price": dump_price,
+        "pump_volume": pump_vol,
+        "window_min": (dump_ts - pump_ts).dt.total_seconds().to_numpy() / 60.0,
+        "phase_order_ok": (pump_ts < dump_ts).to_numpy(),
+        "drop_pct": drop_pct,
+        "increase_pct": increase_pct,
+        "vol_uplift": vol_uplift,
+    }
+
+def _score_pairs(
+    pump: pd.DataFrame,
+    dump: pd.DataFrame,
+    symbol_median: np.ndarray,
     params: Params,
     weights: Weights,
     strict_threshold: float,
-) -> Tuple[dict, bool]:
+) -> pd.DataFrame:
     """
-    Returns (record_dict, is_true_positive) based on BASE decision (not strict pass).
+    One record per (pump, dump) row pair, every metric / boolean / score as an array expression.
+    BASE decision only (the strict pass runs afterwards).
     """
-    # Normalize weights to sum to 1.0 (keep user proportions)
     w_pump, w_dump, w_vol = _normalize_weights(
         float(weights.pump_strength), float(weights.dump_strength), float(weights.volume_strength)
     )
-
-    # --- Inputs
-    sym = pump_row.get("security_name")
-    pump_price = float(pump_row.get("price") or 0.0)
-    dump_price = float(dump_row.get("price") or 0.0)
-    pump_vol   = float(pump_row.get("total_volume") or 0.0)
-    dump_vol   = float(dump_row.get("total_volume") or 0.0)
-    pump_ts    = pd.to_datetime(pump_row.get("ts"))
-    dump_ts    = pd.to_datetime(dump_row.get("ts"))
+    m = _pair_metrics(pump, dump, symbol_median)
+    pump_ts, dump_ts = m["pump_ts"], m["dump_ts"]
+    total_window_min, phase_order_ok = m["window_min"], m["phase_order_ok"]
+    drop_pct, pump_vs_dump_increase_pct, vol_uplift_mult = m["drop_pct"], m["increase_pct"], m["vol_uplift"]
 
     # --- Durations & bars proxy
-    total_window_min = _minutes_between(pump_ts, dump_ts)
-    minutes_per_bar = _parse_minutes_from_rule(params.resample_rule)
-    min_required_minutes = minutes_per_bar * params.min_bars
-
-    within_window  = bool(total_window_min <= params.dump_window_minutes)
-    min_bars_ok    = bool(total_window_min >= min_required_minutes)
-    phase_order_ok = bool(pump_ts < dump_ts)
-
-    # --- Price move proxies
-    drop_pct = 0.0
-    if pump_price > 0:
-        drop_pct = max(0.0, (pump_price - dump_price) / pump_price * 100.0)
-
-    pump_vs_dump_increase_pct = 0.0
-    if dump_price > 0:
-        pump_vs_dump_increase_pct = max(0.0, (pump_price - dump_price) / dump_price * 100.0)
+    min_required_minutes = _parse_minutes_from_rule(params.resample_rule) * params.min_bars
+    within_window = total_window_min <= params.dump_window_minutes
+    min_bars_ok = total_window_min >= min_required_minutes
 
     pump_ok = pump_vs_dump_increase_pct >= params.pump_pct
     dump_ok = drop_pct >= params.dump_pct
-
-    # --- Volume uplift vs symbol median (soft factor in base)
-    symbol_median = float(median_vol_by_symbol.get(sym, 0.0))
-    vol_uplift_mult = (pump_vol / symbol_median) if symbol_median > 0 else 0.0
     volume_ok = vol_uplift_mult >= params.vol_mult
 
     # --- Scores mapped to [0,1]
-    pump_strength_score = min(1.0, pump_vs_dump_increase_pct / max(1e-9, params.pump_pct))
-    dump_strength_score = min(1.0, drop_pct / max(1e-9, params.dump_pct))
-    volume_strength_score = min(1.0, vol_uplift_mult / max(1e-9, params.vol_mult))
-
-    rubric_score = (
-        w_pump * pump_strength_score +
-        w_dump * dump_strength_score +
-        w_vol  * volume_strength_score
-    )
+    pump_strength_score = np.fmin(1.0, pump_vs_dump_increase_pct / max(1e-9, params.pump_pct))
+    dump_strength_score = np.fmin(1.0, drop_pct / max(1e-9, params.dump_pct))
+    volume_strength_score = np.fmin(1.0, vol_uplift_mult / max(1e-9, params.vol_mult))
+    rubric_score = w_pump * pump_strength_score + w_dump * dump_strength_score + w_vol * volume_strength_score
 
     # BASE decision (non-strict): volume_ok is soft
-    hard_rules_ok = (phase_order_ok and within_window and min_bars_ok and pump_ok and dump_ok)
-    decision = "True Positive" if (hard_rules_ok and rubric_score >= strict_threshold) else "True Negative"
-
-    explanations = [
-        {
-            "criterion": "pump_vs_dump_increase_pct",
-            "value": round(pump_vs_dump_increase_pct, 3),
-            "threshold": params.pump_pct,
-            "result": bool(pump_ok),
-            "weight": w_pump,
-            "score": round(pump_strength_score, 4),
-            "meaning": "Approximate pump size relative to the post-dump price (proxy for true pump)."
-        },
-        {
-            "criterion": "drop_pct_from_pump",
-            "value": round(drop_pct, 3),
-            "threshold": params.dump_pct,
-            "result": bool(dump_ok),
-            "weight": w_dump,
-            "score": round(dump_strength_score, 4),
-            "meaning": "Price fall from pumped level to dump leg."
-        },
-        {
-            "criterion": "volume_uplift_multiple",
-            "value": round(vol_uplift_mult, 3),
-            "threshold": params.vol_mult,
-            "result": bool(volume_ok),
-            "weight": w_vol,
-            "score": round(volume_strength_score, 4),
-            "meaning": "Pump leg volume vs symbol median volume (soft factor)."
-        },
-        {
-            "criterion": "time_window_total_minutes",
-            "value": round(total_window_min, 3),
-            "threshold": params.dump_window_minutes,
-            "result": bool(within_window),
-            "weight": 0.0,
-            "score": None,
-            "meaning": "Total duration from pump to dump must be within limit."
-        },
-        {
-            "criterion": "min_bars_proxy_minutes",
-            "value": round(total_window_min, 3),
-            "threshold": min_required_minutes,
-            "result": bool(min_bars_ok),
-            "weight": 0.0,
-            "score": None,
-            "meaning": "At least N bars worth of minutes between legs."
-        },
-        {
-            "criterion": "phase_order_ok",
-            "value": True if phase_order_ok else False,
-            "threshold": "BUY(pump) must occur before SELL(dump)",
-            "result": bool(phase_order_ok),
-            "weight": 0.0,
-            "score": None,
-            "meaning": "Leg ordering sanity check."
-        },
-    ]
+    hard_rules_ok = phase_order_ok & within_window & min_bars_ok & pump_ok & dump_ok
+    decision = np.where(hard_rules_ok & (rubric_score >= strict_threshold), "True Positive", "True Negative")
 
-    record = {
+    if "security_id" in pump.columns:
+        sec_id = pd.to_numeric(pump["security_id"], errors="coerce").reset_index(drop=True)
+        sec_id = sec_id.astype("int64") if sec_id.notna().all() else sec_id.astype(float)
+    else:
+        sec_id = np.full(len(pump), None, dtype=object)
+
+    out = pd.DataFrame({
         # identity & core fields
-        "alert_id": pump_row.get("alert_id"),
-        "security_name": sym,
-        "security_type": pump_row.get("security_type"),
-        "brokerage": pump_row.get("brokerage"),
-        "pump_trade_id": pump_row.get("trade_id"),
-        "dump_trade_id": dump_row.get("trade_id"),
-        "pump_order_id": pump_row.get("order_id"),
-        "dump_order_id": dump_row.get("order_id"),
-        "pump_ts": pump_ts.isoformat() if pd.notna(pump_ts) else None,
-        "dump_ts": dump_ts.isoformat() if pd.notna(dump_ts) else None,
-        "pump_price": pump_price,
-        "dump_price": dump_price,
-        "pump_volume": pump_vol,
-        "dump_volume": dump_vol,
+        "alert_id": _col(pump, "alert_id"),
+        "security_name": _col(pump, "security_name"),
+        "security_id": sec_id,
+        "security_type": _col(pump, "security_type"),
+        "brokerage": _col(pump, "brokerage"),
+        "pump_trade_id": _col(pump, "trade_id"),
+        "dump_trade_id": _col(dump, "trade_id"),
+        "pump_order_id": _col(pump, "order_id"),
+        "dump_order_id": _col(dump, "order_id"),
+        "pump_ts": _isoformat(pump_ts),
+        "dump_ts": _isoformat(dump_ts),
+        "pump_price": m["pump_price"],
+        "dump_price": m["dump_price"],
+        "pump_volume": m["pump_volume"],
+        "dump_volume": _num(dump, "total_volume"),
         "symbol_median_volume": symbol_median,
 
         # derived metrics
-        "window_minutes_actual": round(total_window_min, 6),
-        "pump_vs_dump_increase_pct": round(pump_vs_dump_increase_pct, 6),
-        "drop_pct": round(drop_pct, 6),
-        "vol_uplift_mult": round(vol_uplift_mult, 6),
+        "window_minutes_actual": np.round(total_window_min, 6),
+        "pump_vs_dump_increase_pct": np.round(pump_vs_dump_increase_pct, 6),
+        "drop_pct": np.round(drop_pct, 6),
+        "vol_uplift_mult": np.round(vol_uplift_mult, 6),
 
         # scores
-        "pump_strength_score": round(pump_strength_score, 6),
-        "dump_strength_score": round(dump_strength_score, 6),
-        "volume_strength_score": round(volume_strength_score, 6),
-        "rubric_score": round(rubric_score, 6),
+        "pump_strength_score": np.round(pump_strength_score, 6),
+        "dump_strength_score": np.round(dump_strength_score, 6),
+        "volume_strength_score": np.round(volume_strength_score, 6),
+        "rubric_score": np.round(rubric_score, 6),
 
         # booleans for strict gate
-        "pump_ok": bool(pump_ok),
-        "dump_ok": bool(dump_ok),
-        "volume_ok": bool(volume_ok),
-        "within_window": bool(within_window),
-        "min_bars_ok": bool(min_bars_ok),
-        "phase_order_ok": bool(phase_order_ok),
+        "pump_ok": pump_ok,
+        "dump_ok": dump_ok,
+        "volume_ok": volume_ok,
+        "within_window": within_window,
+        "min_bars_ok": min_bars_ok,
+        "phase_order_ok": phase_order_ok,
 
         # base decision (will be overridden by strict pass)
         "decision": decision,
+    })
+    out["explanations"] = _explanations(
+        params, (w_pump, w_dump, w_vol), min_required_minutes,
+        values=(pump_vs_dump_increase_pct, drop_pct, vol_uplift_mult, total_window_min),
+        scores=(pump_strength_score, dump_strength_score, volume_strength_score),
+        flags=(pump_ok, dump_ok, volume_ok, within_window, min_bars_ok, phase_order_ok),
+    )
+    return out
 
-        # explainability
-        "explanations": explanations,
-    }
-    return record, decision == "True Positive"
+def _explanations(
+    params: Params,
+    w: Tuple[float, float, float],
+    min_required_minutes: int,
+    values: Tuple[np.ndarray, ...],
+    scores: Tuple[np.ndarray, ...],
+    flags: Tuple[np.ndarray, ...],
+) -> List[List[dict]]:
+    """The six per-criterion explanation dicts of every record (serialised to JSON by `_flat_results`)."""
+    w_pump, w_dump, w_vol = w
+    inc, drop, upl, win = (np.round(v, 3).tolist() for v in values)
+    p_s, d_s, v_s = (np.round(v, 4).tolist() for v in scores)
+    p_ok, d_ok, v_ok, in_win, bars_ok, order_ok = (np.asarray(f, dtype=bool).tolist() for f in flags)
+    return [
+        [
+            {
+                "criterion": "pump_vs_dump_increase_pct",
+                "value": inc[i],
+                "threshold": params.pump_pct,
+                "result": p_ok[i],
+                "weight": w_pump,
+                "score": p_s[i],
+                "meaning": "Approximate pump size relative to the post-dump price (proxy for true pump)."
+            },
+            {
+                "criterion": "drop_pct_from_pump",
+                "value": drop[i],
+                "threshold": params.dump_pct,
+                "result": d_ok[i],
+                "weight": w_dump,
+                "score": d_s[i],
+                "meaning": "Price fall from pumped level to dump leg."
+            },
+            {
+                "criterion": "volume_uplift_multiple",
+                "value": upl[i],
+                "threshold": params.vol_mult,
+                "result": v_ok[i],
+                "weight": w_vol,
+                "score": v_s[i],
+                "meaning": "Pump leg volume vs symbol median volume (soft factor)."
+            },
+            {
+                "criterion": "time_window_total_minutes",
+                "value": win[i],
+                "threshold": params.dump_window_minutes,
+                "result": in_win[i],
+                "weight": 0.0,
+                "score": None,
+                "meaning": "Total duration from pump to dump must be within limit."
+            },
+            {
+                "criterion": "min_bars_proxy_minutes",
+                "value": win[i],
+                "threshold": min_required_minutes,
+                "result": bars_ok[i],
+                "weight": 0.0,
+                "score": None,
+                "meaning": "At least N bars worth of minutes between legs."
+            },
+            {
+                "criterion": "phase_order_ok",
+                "value": order_ok[i],
+                "threshold": "BUY(pump) must occur before SELL(dump)",
+                "result": order_ok[i],
+                "weight": 0.0,
+                "score": None,
+                "meaning": "Leg ordering sanity check."
+            },
+        ]
+        for i in range(len(inc))
+    ]
+
+def _pump_baseline_volume(
+    pump: pd.DataFrame, baseline_df: pd.DataFrame, key: str, params: Params, baseline_folder: Optional[str]
+) -> np.ndarray:
+    """
+    Baseline volume of every pump leg: the rolling `vol_window`-day median of its security up to
+    the pump's day, looked up in the volume baseline store of `baseline_folder`. Without a store
+    (or when it is unavailable): the median over `baseline_df`, i.e. all alerts in the window.
+    """
+    if key not in pump.columns:
+        return np.zeros(len(pump))
+    if baseline_folder is not None:
+        days = pd.to_datetime(pump["ts"]).dt.date
+        med = rolling_median_volume(baseline_folder, key, pump[key].tolist(), days.tolist(), params.vol_window)
+        if med is not None:
+            return np.nan_to_num(med, nan=0.0)
+    median_vol = _compute_symbol_median_volume(baseline_df, key)
+    return pump[key].map(median_vol).astype(float).fillna(0.0).to_numpy()
+
+def _pair_alerts(
+    df_pd: pd.DataFrame, baseline_df: pd.DataFrame, params: Params, baseline_folder: Optional[str] = None
+) -> Optional[Tuple[pd.DataFrame, pd.DataFrame, np.ndarray]]:
+    """(pump legs, dump legs, pump baseline volume) of every paired alert_id; None when nothing pairs."""
+    if df_pd.empty:
+        return None
+
+    # Per-symbol volume baselines from ALL alerts (keyed by security_id when both sides have it)
+    base = baseline_df if baseline_df is not None else df_pd
+    key = "security_id" if _security_key(df_pd) == _security_key(base) == "security_id" else "security_name"
+
+    pump_rows, dump_rows = _pick_legs(df_pd)
+    if not len(pump_rows):
+        return None
+    pump = df_pd[[c for c in dict.fromkeys(_PUMP_COLUMNS + (key,)) if c in df_pd.columns]].iloc[pump_rows].reset_index(drop=True)
+    dump = df_pd[[c for c in _DUMP_COLUMNS if c in df_pd.columns]].iloc[dump_rows].reset_index(drop=True)
+    return pump, dump, _pump_baseline_volume(pump, base, key, params, baseline_folder)
 
 def _calibrate_df(
     df_pd: pd.DataFrame,
     baseline_df: pd.DataFrame,
     params: Params,
-    weights: Weights
+    weights: Weights,
+    baseline_folder: Optional[str] = None,
 ) -> pd.DataFrame:
     """
-    Groups rows by alert_id, finds BUY(pump) then SELL(dump), computes metrics/scores,
-    and returns one record per alert_id.
+    Pairs the PUMP / DUMP legs of every alert_id and scores all pairs at once (columnar);
+    returns one record per alert_id, in order of first appearance. `baseline_folder` switches
+    the volume baseline to the store's rolling `vol_window`-day medians.
     """
-    if df_pd.empty:
+    pairs = _pair_alerts(df_pd, baseline_df, params, baseline_folder)
+    if pairs is None:
         return pd.DataFrame()
-
-    # Build per-symbol volume baselines from ALL alerts
-    median_vol = _compute_symbol_median_volume(baseline_df if baseline_df is not None else df_pd)
-    strict_threshold = float(TRUE_POSITIVE_THRESHOLD_DEFAULT)
-
-    by_alert = df_pd.groupby("alert_id", sort=False)
-    records: List[dict] = []
-
-    for alert_id, grp in by_alert:
-        pump_row, dump_row = _pick_pump_dump_rows(grp, params.dump_window_minutes)
-        if pump_row is None or dump_row is None:
-            continue
-
-        rec, _ = _score_alert_pair(pump_row, dump_row, median_vol, params, weights, strict_threshold)
-        records.append(rec)
-
-    return pd.DataFrame.from_records(records)
+    return _score_pairs(*pairs, params, weights, float(TRUE_POSITIVE_THRESHOLD_DEFAULT))
 
 # ---------- STRICT DECISION LAYER ----------
 def _strict_pass_mask(df: pd.DataFrame, require_volume: bool) -> pd.Series:
@@ -536,67 +711,93 @@ def _strict_pass_mask(df: pd.DataFrame, require_volume: bool) -> pd.Series:
         base = base & df["volume_ok"].fillna(False)
     return base
 
+def _tp_curve(asc: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Distinct rubric scores (descending) and the TP count with each as threshold, from sorted scores."""
+    values, first = np.unique(asc, return_index=True)
+    return values[::-1], (len(asc) - first)[::-1]
+
+def _solve_threshold(
+    asc: np.ndarray, base: float, min_tp: int, max_tp: int, thr_min: float, thr_max: float
+) -> Tuple[float, int]:
+    """
+    Threshold nearest `base` whose TP count (scores >= threshold, `asc` sorted ascending) lies in
+    [min_tp, max_tp], read off the sorted scores by binary search and kept within [thr_min, thr_max].
+    When ties make the range unreachable, the count ends above max_tp (the top-K cap applies).
+    """
+    n = len(asc)
+
+    def count(thr: float) -> int:
+        return int(n - np.searchsorted(asc, thr, side="left"))
+
+    thr = float(base)
+    tp = count(thr)
+    if tp > max_tp:
+        # tighten: lowest threshold above the (max_tp + 1)-th best score
+        i = int(np.searchsorted(asc, asc[n - max_tp - 1], side="right"))
+        thr = min(thr_max, float(asc[i])) if i < n else thr_max
+        tp = count(thr)
+    if tp < min_tp:
+        # relax: highest threshold that still keeps min_tp scores
+        thr = max(thr_min, float(asc[n - min_tp])) if n >= min_tp else thr_min
+        tp = count(thr)
+    return thr, tp
+
+TP_CURVE_MAX_POINTS = 512
+
+def _curve_payload(curves: List[dict]) -> List[TpCurve]:
+    """
+    Curves for the response. Long ones keep their highest-threshold steps (the few-TP end the
+    strict target lives in) exactly and evenly spaced steps of the rest, always including the last.
+    """
+    out = []
+    for c in curves:
+        thresholds, counts = c["thresholds"], c["tp_counts"]
+        exact = len(thresholds) <= TP_CURVE_MAX_POINTS
+        if not exact:
+            head = TP_CURVE_MAX_POINTS // 2
+            tail = np.linspace(head, len(thresholds) - 1, TP_CURVE_MAX_POINTS - head).round().astype(int)
+            keep = np.unique(np.concatenate([np.arange(head), tail]))
+            thresholds, counts = thresholds[keep], counts[keep]
+        out.append(TpCurve(gate=c["gate"], thresholds=thresholds.tolist(), tp_counts=counts.tolist(), exact=exact))
+    return out
+
 def _apply_strict_calibration(
     df: pd.DataFrame,
     base_threshold: float = TRUE_POSITIVE_THRESHOLD_DEFAULT,
     min_tp: int = STRICT_TARGET_MIN,
     max_tp: int = STRICT_TARGET_MAX,
     require_volume: bool = STRICT_REQUIRE_VOLUME,
-    step_up: float = STRICT_STEP_UP,
-    step_down: float = STRICT_STEP_DOWN,
     thr_min: float = STRICT_MIN_THRESHOLD,
     thr_max: float = STRICT_MAX_THRESHOLD,
-) -> tuple[pd.DataFrame, float, int, str]:
+) -> tuple[pd.DataFrame, float, int, str, List[dict]]:
     """
-    Enforce strict gating (all hard rules + optional volume) and adaptively tune the rubric
-    threshold so TP count ends in [min_tp, max_tp]. Returns (df, threshold_used, tp_count, strategy).
+    Enforce strict gating (all hard rules + optional volume) and solve for the rubric threshold
+    whose TP count lands in [min_tp, max_tp]: the gated scores are sorted once per gate and the
+    threshold read off by binary search. Returns (df, threshold_used, tp_count, strategy, curves)
+    with one TP-count-vs-threshold curve per gate evaluated.
     """
     if df.empty:
-        return df, base_threshold, 0, "empty"
+        return df, base_threshold, 0, "empty", []
 
     strategy = "strict"
     df = df.copy()
+    rubric = df["rubric_score"].to_numpy(dtype=float)
 
-    # 1) Try with volume required
-    thr = float(base_threshold)
-    hard = _strict_pass_mask(df, require_volume=require_volume)
-    mask = hard & (df["rubric_score"] >= thr)
-    tp = int(mask.sum())
-    while tp > max_tp and thr < thr_max:
-        thr = min(thr_max, thr + step_up)
-        mask = hard & (df["rubric_score"] >= thr)
-        tp = int(mask.sum())
-
-    # If too few, relax downwards (not below thr_min)
-    while tp < min_tp and thr > thr_min:
-        thr = max(thr_min, thr - step_down)
-        mask = hard & (df["rubric_score"] >= thr)
-        tp = int(mask.sum())
-
-    # 2) If still too few and volume was required, auto-relax volume gate once
+    gates = [("strict", _strict_pass_mask(df, require_volume=require_volume).to_numpy(dtype=bool))]
+    if require_volume:
+        gates.append(("relaxed_volume", _strict_pass_mask(df, require_volume=False).to_numpy(dtype=bool)))
+    sorted_scores = {name: np.sort(rubric[gate]) for name, gate in gates}
+
+    # 1) Solve with volume required; 2) if still too few, relax the volume gate once (from base)
+    hard = gates[0][1]
+    thr, tp = _solve_threshold(sorted_scores["strict"], base_threshold, min_tp, max_tp, thr_min, thr_max)
     if tp < min_tp and require_volume:
         strategy = "relaxed_volume"
-        hard2 = _strict_pass_mask(df, require_volume=False)
-        thr = max(thr, base_threshold)  # don't start lower than base
-        mask = hard2 & (df["rubric_score"] >= thr)
-        tp = int(mask.sum())
-
-        # tighten if needed
-        while tp > max_tp and thr < thr_max:
-            thr = min(thr_max, thr + step_up)
-            mask = hard2 & (df["rubric_score"] >= thr)
-            tp = int(mask.sum())
-
-        # relax if needed
-        while tp < min_tp and thr > thr_min:
-            thr = max(thr_min, thr - step_down)
-            mask = hard2 & (df["rubric_score"] >= thr)
-            tp = int(mask.sum())
-
-        hard = hard2  # continue with this gate
+        hard = gates[1][1]
+        thr, tp = _solve_threshold(sorted_scores["relaxed_volume"], base_threshold, min_tp, max_tp, thr_min, thr_max)
+    mask = hard & (rubric >= thr)
 
     # 3) If STILL too few, pick top-K by rubric among hard-gated; if none, overall
-        # 3) If STILL too few, pick top-K by rubric among hard-gated; if none, overall
     if tp < min_tp:
         strategy = "topk_fallback"
         eligible = df[hard].copy()
@@ -606,50 +807,153 @@ def _apply_strict_calibration(
         keep = min(max_tp, len(eligible))   # allow up to max_tp
         keep_ids = set(eligible.head(keep).index.tolist())
         final_mask = df.index.isin(keep_ids)
-        tp = int(final_mask.sum())          # recompute actual TP count
         thr = float(df.loc[final_mask, "rubric_score"].min()) if keep > 0 else thr
-
-
-    else:
+    elif tp > max_tp:
         # cap to top max_tp if still too many
-        if tp > max_tp:
-            strategy = "topk_cap"
-            eligible = df[hard & (df["rubric_score"] >= thr)].copy()
-            eligible = eligible.sort_values("rubric_score", ascending=False)
-            keep_ids = set(eligible.head(max_tp).index.tolist())
-            final_mask = df.index.isin(keep_ids)
-            tp = min(tp, max_tp)
-        else:
-            final_mask = mask
+        strategy = "topk_cap"
+        eligible = df[mask].sort_values("rubric_score", ascending=False)
+        final_mask = df.index.isin(set(eligible.head(max_tp).index.tolist()))
+    else:
+        final_mask = mask
+
+    curves = []
+    for name, _ in gates:
+        thresholds, counts = _tp_curve(sorted_scores[name])
+        curves.append({"gate": name, "thresholds": thresholds, "tp_counts": counts})
 
     # Apply final decision
     df["decision"] = np.where(final_mask, "True Positive", "True Negative")
-    return df, float(thr), int((df["decision"] == "True Positive").sum()), strategy
+    return df, float(thr), int((df["decision"] == "True Positive").sum()), strategy, curves
+
+# ---------- PARAMETER SWEEP ----------
+SWEEP_FIELDS = (
+    "pump_pct", "dump_pct", "vol_mult", "dump_window_minutes", "min_bars",
+    "pump_strength", "dump_strength", "volume_strength",
+)
+SWEEP_MAX_POINTS = 20_000
+SWEEP_CHUNK_CELLS = 4_000_000  # grid points x pairs evaluated per broadcast block
+
+SWEEP_EXAMPLE = {
+    **DEFAULT_EXAMPLE,
+    "grid": {
+        "pump_pct": {"start": 10, "stop": 30, "step": 2},
+        "dump_pct": [10, 12, 14, 16, 18, 20],
+        "vol_mult": [1, 2, 3, 4],
+    },
+}
+
+def _axis_values(name: str, axis: Optional[SweepAxis], base: float) -> np.ndarray:
+    if axis is None:
+        return np.array([float(base)])
+    if isinstance(axis, SweepRange):
+        n = int(np.floor((axis.stop - axis.start) / axis.step + 1e-9)) + 1
+        values = np.round(axis.start + axis.step * np.arange(max(n, 0)), 10)
+    else:
+        values = np.asarray(axis, dtype=float)
+    if not len(values):
+        raise HTTPException(status_code=400, detail=f"grid.{name} has no values.")
+    if (values < 0).any() or not np.isfinite(values).all():
+        raise HTTPException(status_code=400, detail=f"grid.{name} values must be finite and >= 0.")
+    return np.unique(values)
+
+def _sweep_grid(req: SweepRequest) -> Dict[str, np.ndarray]:
+    """Cartesian product of the grid axes, one flat array per SWEEP_FIELDS entry (weights normalized per point)."""
+    base = {**req.params.model_dump(), **req.weights.model_dump()}
+    axes = [_axis_values(f, getattr(req.grid, f), base[f]) for f in SWEEP_FIELDS]
+    points = int(np.prod([len(a) for a in axes]))
+    if points > SWEEP_MAX_POINTS:
+        raise HTTPException(status_code=400, detail=f"Grid has {points} points (max {SWEEP_MAX_POINTS}).")
+    grid = dict(zip(SWEEP_FIELDS, (g.ravel() for g in np.meshgrid(*axes, indexing="ij"))))
+
+    w = np.stack([grid["pump_strength"], grid["dump_strength"], grid["volume_strength"]])
+    total = w.sum(axis=0)
+    w = np.where(total > 0, w / np.where(total > 0, total, 1.0), np.array([[0.45], [0.45], [0.10]]))
+    grid["pump_strength"], grid["dump_strength"], grid["volume_strength"] = w
+    return grid
+
+def _evaluate_grid(
+    metrics: Dict[str, object], grid: Dict[str, np.ndarray], rule_minutes: int, threshold: float, bins: int
+) -> Dict[str, np.ndarray]:
+    """
+    The rules, scores and decisions of `_score_pairs` for every grid point at once: each block of
+    points is a (points x pairs) broadcast against the per-pair metrics, reduced to counts and a
+    rubric histogram per point.
+    """
+    inc, drop, upl = metrics["increase_pct"], metrics["drop_pct"], metrics["vol_uplift"]
+    win, order = metrics["window_min"], metrics["phase_order_ok"]
+    g, n = len(grid["pump_pct"]), len(inc)
+    out = {
+        "tp_count": np.zeros(g, dtype=np.int64),
+        "strict_tp_count": np.zeros(g, dtype=np.int64),
+        "hard_pass_count": np.zeros(g, dtype=np.int64),
+        "rubric_mean": np.zeros(g),
+        "rubric_hist": np.zeros((g, bins), dtype=np.int64),
+    }
+    if n == 0:
+        return out
+    step = max(1, SWEEP_CHUNK_CELLS // n)
+    for lo in range(0, g, step):
+        sl = slice(lo, min(g, lo + step))
+        col = {f: grid[f][sl, None] for f in SWEEP_FIELDS}
+        pump_pct, dump_pct, vol_mult = col["pump_pct"], col["dump_pct"], col["vol_mult"]
+
+        hard = (
+            order
+            & (win <= col["dump_window_minutes"])
+            & (win >= rule_minutes * col["min_bars"])
+            & (inc >= pump_pct)
+            & (drop >= dump_pct)
+        )
+        rubric = (
+            col["pump_strength"] * np.fmin(1.0, inc / np.maximum(1e-9, pump_pct))
+            + col["dump_strength"] * np.fmin(1.0, drop / np.maximum(1e-9, dump_pct))
+            + col["volume_strength"] * np.fmin(1.0, upl / np.maximum(1e-9, vol_mult))
+        )
+        passed = hard & (rubric >= threshold)
+        rows = sl.stop - sl.start
+
+        out["tp_count"][sl] = passed.sum(axis=1)
+        out["strict_tp_count"][sl] = (passed & (upl >= vol_mult)).sum(axis=1)
+        out["hard_pass_count"][sl] = hard.sum(axis=1)
+        out["rubric_mean"][sl] = rubric.mean(axis=1)
+        cells = np.clip((rubric * bins).astype(np.int64), 0, bins - 1) + (np.arange(rows) * bins)[:, None]
+        out["rubric_hist"][sl] = np.bincount(cells.ravel(), minlength=rows * bins).reshape(rows, bins)
+    return out
 
 # -------------------------------------------------------------------
 # Persistence
 # -------------------------------------------------------------------
-def _save_results(df: pd.DataFrame, results_dir: str, start: str, end: str) -> Tuple[str, str]:
+def _flat_results(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy with nested / timestamp columns flattened to strings (Parquet, CSV and bulk responses)."""
+    out = df.copy()
+    if "explanations" in out.columns:
+        out["explanations"] = out["explanations"].apply(
+            lambda x: x if isinstance(x, str) else json.dumps(x, ensure_ascii=False)
+        )
+
+    for col in ("pump_ts", "dump_ts"):
+        if col in out.columns:
+            out[col] = out[col].astype(str)
+    return out
+
+def _save_results(df: pd.DataFrame, results_dir: str, start: str, end: str, source: Optional[Path] = None) -> Tuple[str, str]:
     _ensure_dir(results_dir)
     stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
     base = f"pumpdump_calibration_{start}_{end}_{stamp}"
     csv_path = os.path.join(results_dir, f"{base}.csv")
     parquet_path = os.path.join(results_dir, f"{base}.parquet")
 
-    # Sanitize nested columns for parquet
-    df_to_save = df.copy()
-    if "explanations" in df_to_save.columns:
-        df_to_save["explanations"] = df_to_save["explanations"].apply(
-            lambda x: x if isinstance(x, str) else json.dumps(x, ensure_ascii=False)
-        )
-
-    for col in ("pump_ts", "dump_ts"):
-        if col in df_to_save.columns:
-            df_to_save[col] = df_to_save[col].astype(str)
-
+    df_to_save = _flat_results(df)
     df_to_save.to_csv(csv_path, index=False)
     df_to_save.to_parquet(parquet_path, index=False)  # pyarrow backend
 
+    import pyarrow as pa
+    schema = pa.Schema.from_pandas(df_to_save, preserve_index=False)
+    for path in (csv_path, parquet_path):
+        register_artifact(
+            path, KIND_PUMPDUMP_CALIBRATION, producer="simulate/alerts/calibrate",
+            start=start, end=end, rows=len(df_to_save), schema=schema, source=source,
+        )
     return csv_path, parquet_path
 
 # -------------------------------------------------------------------
@@ -661,32 +965,62 @@ def _save_results(df: pd.DataFrame, results_dir: str, start: str, end: str) -> T
     summary="Calibrate Pump & Dump alerts (latest Parquet → strict decisions)"
 )
 def calibrate_latest_pumpdump(
-    req: CalibrateRequest = Body(..., examples=DEFAULT_EXAMPLE)  # ← add example here
+    req: CalibrateRequest = Body(..., examples=DEFAULT_EXAMPLE),  # ← add example here
+    accept: Annotated[Optional[str], Header()] = None,
 ) -> CalibrateResponse:
+    """
+    JSON response by default (True Positive preview). With Accept: application/x-ndjson or
+    application/vnd.apache.arrow.stream, every scored row is streamed instead and the summary
+    fields move to X-* headers.
+    """
     # Expand dates (also used as strings for filtering)
     start_str, end_str = str(req.start), str(req.end)
 
-    # Locate latest parquet in simulated data folder
-    latest_path = _find_latest_parquet(SIMULATED_DIR_DEFAULT)
+    # Every simulated source overlapping the window (newest first; files outside it are never opened)
+    sources = _find_history_sources(SIMULATED_DIR_DEFAULT, start_str, end_str)
+    latest_path = sources[0]
 
     # Load subset & baseline
-    df = _load_pumpdump_subset(latest_path, start_str, end_str)
-    baseline_df = _load_baseline_for_volume(latest_path, start_str, end_str)
+    jobs.report_progress(0, 4)
+    with jobs.stage("load"):
+        df, baseline_df = _load_calibration_inputs(sources, start_str, end_str)
+        # Rolling vol_window-day baselines: summarise only days the store has not seen yet
+        baseline_folder = SIMULATED_DIR_DEFAULT if refresh_volume_baseline(SIMULATED_DIR_DEFAULT) is not None else None
+    jobs.report_progress(1, 4)
 
     # Compute BASE scores/booleans
-    out_df = _calibrate_df(df, baseline_df, req.params, req.weights)
-
-    # STRICT post-pass: enforce gate + tune threshold into 5–12 (with fallbacks)
-    out_df, thr_used, tp_count, strategy = _apply_strict_calibration(
-        out_df,
-        base_threshold=TRUE_POSITIVE_THRESHOLD_DEFAULT,
-        min_tp=STRICT_TARGET_MIN,
-        max_tp=STRICT_TARGET_MAX,
-        require_volume=STRICT_REQUIRE_VOLUME,
-    )
+    with jobs.stage("score"):
+        out_df = _calibrate_df(df, baseline_df, req.params, req.weights, baseline_folder)
+    jobs.report_progress(2, 4)
+
+    # STRICT post-pass: enforce gate + solve the threshold into [min, max] TPs (with fallbacks)
+    with jobs.stage("strict"):
+        out_df, thr_used, tp_count, strategy, curves = _apply_strict_calibration(
+            out_df,
+            base_threshold=TRUE_POSITIVE_THRESHOLD_DEFAULT,
+            min_tp=STRICT_TARGET_MIN,
+            max_tp=STRICT_TARGET_MAX,
+            require_volume=STRICT_REQUIRE_VOLUME,
+        )
+    jobs.report_progress(3, 4)
 
     # Save artifacts (after strict decisions)
-    csv_path, parquet_path = _save_results(out_df, RESULTS_DIR_DEFAULT, start_str, end_str)
+    with jobs.stage("save"):
+        csv_path, parquet_path = _save_results(out_df, RESULTS_DIR_DEFAULT, start_str, end_str, source=latest_path)
+    jobs.report_progress(4, 4)
+    jobs.add_outputs(
+        csv_path=csv_path, parquet_path=parquet_path, latest_parquet=str(latest_path), sources=[str(p) for p in sources]
+    )
+
+    fmt = negotiate(accept)
+    if fmt != "json":
+        import pyarrow as pa
+        table = pa.Table.from_pandas(_flat_results(out_df), preserve_index=False)
+        return bulk_response(fmt, table.schema, table_batches(table), headers={
+            "X-Count": len(out_df), "X-True-Positive-Count": tp_count, "X-Threshold": f"{thr_used:.6f}",
+            "X-Strategy": strategy, "X-Csv-Path": csv_path, "X-Parquet-Path": parquet_path,
+            "X-Latest-Parquet": latest_path, "X-Source-Count": len(sources),
+        })
 
     results_preview = out_df.head(200).to_dict(orient="records")
 
@@ -703,11 +1037,57 @@ def calibrate_latest_pumpdump(
         count=int(len(out_df)),                   # total rows
         true_positive_count=int(tp_mask.sum()),   # strict TP count (matches CSV)
         returned=len(results_tp),                 # preview size for TP list
+        threshold=thr_used,
+        strategy=strategy,
+        tp_curve=_curve_payload(curves),          # TP count vs threshold per gate, for the UI
         csv_path=csv_path,
         parquet_path=parquet_path,
         latest_parquet=str(latest_path),
+        sources=[str(p) for p in sources],
         folder_simulated=os.path.abspath(SIMULATED_DIR_DEFAULT),
         folder_results=os.path.abspath(RESULTS_DIR_DEFAULT),
         # keep "results" as only TPs so the UI stays simple and consistent
         results=results_tp,
 )
+
+@router.post(
+    "/calibrate/sweep",
+    response_model=SweepResponse,
+    summary="Evaluate a grid of Params / Weights in one pass (TP counts + rubric distributions, no files written)"
+)
+def sweep_pumpdump_calibration(req: SweepRequest = Body(..., examples=SWEEP_EXAMPLE)) -> SweepResponse:
+    """
+    Loads and pairs the window once, computes the per-pair metrics once, then evaluates every
+    grid point with NumPy broadcasting. Counts use the same rules as /calibrate's base decision;
+    `strict_tp_count` adds the volume gate (the strict pass before its threshold tuning).
+    """
+    t0 = perf_counter()
+    start_str, end_str = str(req.start), str(req.end)
+    grid = _sweep_grid(req)
+    sources = _find_history_sources(SIMULATED_DIR_DEFAULT, start_str, end_str)
+
+    df, baseline_df = _load_calibration_inputs(sources, start_str, end_str)
+    baseline_folder = SIMULATED_DIR_DEFAULT if refresh_volume_baseline(SIMULATED_DIR_DEFAULT) is not None else None
+    pairs = _pair_alerts(df, baseline_df, req.params, baseline_folder)
+    empty = np.array([])
+    metrics = _pair_metrics(*pairs) if pairs is not None else {
+        "increase_pct": empty, "drop_pct": empty, "vol_uplift": empty, "window_min": empty, "phase_order_ok": empty,
+    }
+    stats = _evaluate_grid(
+        metrics, grid, _parse_minutes_from_rule(req.params.resample_rule), req.threshold, req.bins
+    )
+
+    columns = {f: grid[f].tolist() for f in SWEEP_FIELDS}
+    columns.update({k: v.tolist() for k, v in stats.items()})
+    results = [SweepPoint(**dict(zip(columns, row))) for row in zip(*columns.values())]
+    n_pairs = len(metrics["increase_pct"])
+    return SweepResponse(
+        message=f"Evaluated {len(results)} grid points over {n_pairs} Pump & Dump pairs.",
+        count=n_pairs,
+        points=len(results),
+        threshold=req.threshold,
+        rubric_bins=np.round(np.linspace(0.0, 1.0, req.bins + 1), 6).tolist(),
+        sources=[str(p) for p in sources],
+        elapsed_ms=round((perf_counter() - t0) * 1000, 3),
+        results=results,
+    )
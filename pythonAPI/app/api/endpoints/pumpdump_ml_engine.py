@@ -22,9 +22,25 @@ router = APIRouter(prefix="/pumpdumpml", tags=["Pump and dump"])
 
 # --- dual import so it works from project root OR from /app ---
 try:
-    from app.core.paths import RESULTS_ML_DIR, RESULTS_DIR
+    from app.core.paths import RESULTS_ML_DIR, RESULTS_DIR, SIMULATED_DIR
+    from app.core.schema import ALERT_TZ
+    from app.core.volume_baseline import refresh_volume_baseline, rolling_median_volume
+    from app.core.security_master import load_security_master
+    from app.core.datasets import alerts_history_sources, read_alerts_history
+    from app.core.catalog import (
+        KIND_PUMPDUMP_CALIBRATION, KIND_PUMPDUMP_ML, find_artifact, latest_artifact, register_artifact,
+    )
+    from app.core import jobs
 except ModuleNotFoundError:
-    from core.paths import RESULTS_ML_DIR, RESULTS_DIR
+    from core.paths import RESULTS_ML_DIR, RESULTS_DIR, SIMULATED_DIR
+    from core.schema import ALERT_TZ
+    from core.volume_baseline import refresh_volume_baseline, rolling_median_volume
+    from core.security_master import load_security_master
+    from core.datasets import alerts_history_sources, read_alerts_history
+    from core.catalog import (
+        KIND_PUMPDUMP_CALIBRATION, KIND_PUMPDUMP_ML, find_artifact, latest_artifact, register_artifact,
+    )
+    from core import jobs
 # ---------------- Schemas ----------------
 
 class AlgoOptions(BaseModel):
@@ -62,6 +78,10 @@ class FeatureParams(BaseModel):
     price_roll: int = 20
     impact_roll: int = 50
     min_group_size: int = 10
+    # "store": feat_volume_surge = volume / rolling `baseline_days`-day median of the security
+    # from the volume baseline store (app/core/volume_baseline.py) instead of the last `volume_roll` rows
+    volume_baseline: Literal["rolling", "store"] = "rolling"
+    baseline_days: int = Field(30, ge=1)
 
 class StrictParams(BaseModel):
     enable: bool = True
@@ -195,6 +215,18 @@ def _ensure_metadata_cols_simple(df_filt: pd.DataFrame, df_all: pd.DataFrame, me
                 mask = ~_nonempty(base)
         df[dest] = base
 
+    # 0) Integer security_id -> name / type from the security master (a join on a tiny table)
+    master = load_security_master()
+    ref = None if master is None else master.select(["security_id", "security_name", "security_type"]).to_pandas().set_index("security_id")
+
+    def from_master(df, id_col):
+        if ref is None or id_col not in df.columns:
+            return
+        ids = pd.to_numeric(df[id_col], errors="coerce")
+        for c in ("security_name", "security_type"):
+            df[c] = df[c].mask(~_nonempty(df[c]), ids.map(ref[c]))
+
+    from_master(df, "security_id")
     coalesce(df, "security_name", ["security_name","security","name","symbol","ticker","security_id"])
     coalesce(df, "security_type", ["security_type","asset_type","type","security_class"])
     coalesce(df, "brokerage", ["brokerage","broker","broker_name","brokerage_name"])
@@ -205,6 +237,7 @@ def _ensure_metadata_cols_simple(df_filt: pd.DataFrame, df_all: pd.DataFrame, me
         if len(right_cols) > 1:
             right = df_all[right_cols].drop_duplicates("alert_id")
             df = df.merge(right, on="alert_id", how="left", suffixes=("", "_src"))
+            from_master(df, "security_id_src" if "security_id_src" in df.columns else "security_id")
             coalesce(df, "security_name", ["security_name_src","security_src","name","symbol","ticker","security_id"])
             coalesce(df, "security_type", ["security_type_src"])
             coalesce(df, "brokerage", ["brokerage_src"])
@@ -216,6 +249,7 @@ def _ensure_metadata_cols_simple(df_filt: pd.DataFrame, df_all: pd.DataFrame, me
         if len(right_cols) > 1:
             right = meta_df[right_cols].drop_duplicates("alert_id")
             df = df.merge(right, on="alert_id", how="left", suffixes=("", "_meta"))
+            from_master(df, "security_id_meta" if "security_id_meta" in df.columns else "security_id")
             coalesce(df, "security_name", ["security_name_meta","security_meta","name","symbol","ticker","security_id"])
             coalesce(df, "security_type", ["security_type_meta"])
             coalesce(df, "brokerage", ["brokerage_meta"])
@@ -321,7 +355,11 @@ def _apply_banding(df: pd.DataFrame, bands: BandingParams) -> pd.DataFrame:
     return df
 
 
-def _find_latest_parquet_file(folder: Path) -> Path:
+def _find_latest_parquet_file(folder: Path, kind: str = KIND_PUMPDUMP_CALIBRATION) -> Path:
+    """Newest catalogued Parquet of `kind` in `folder`; uncatalogued folders fall back to a listing."""
+    art = latest_artifact(kind, folder, formats=("parquet",))
+    if art is not None:
+        return art.path
     cands = sorted(
         list(folder.glob("*.parquet")) + list(folder.glob("*.pq")),
         key=lambda p: p.stat().st_mtime,
@@ -337,20 +375,39 @@ def _load_df(path: Path) -> pd.DataFrame:
         return pd.read_parquet(path)
     raise ValueError(f"Unsupported file type for this endpoint: {ext} (only parquet allowed)")
 
-def _ensure_dt(df: pd.DataFrame) -> pd.DataFrame:
+def _load_alerts_history_df(folder: Path) -> pd.DataFrame:
+    """Alert metadata from every simulated source in `folder` (an alert_id in several files comes from the newest)."""
+    sources = alerts_history_sources(folder)
+    if not sources:
+        raise FileNotFoundError(f"No parquet files found in {folder}")
+    return read_alerts_history(sources).to_pandas()
+
+def _ts_column(df: pd.DataFrame) -> Optional[str]:
+    """Event-time column: the alerts schema's `ts`, else a real datetime column, else a name match."""
+    if "ts" in df.columns:
+        return "ts"
+    for c in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[c]):
+            return c
     cand_cols = [c for c in df.columns if "time" in c.lower() or "ts" in c.lower() or "timestamp" in c.lower()]
-    if cand_cols:
-        col = cand_cols[0]
-        df[col] = pd.to_datetime(df[col], errors="coerce", utc=True)
+    return cand_cols[0] if cand_cols else None
+
+def _ensure_dt(df: pd.DataFrame) -> pd.DataFrame:
+    col = _ts_column(df)
+    if col:
+        df[col] = pd.to_datetime(df[col], errors="coerce", utc=True, format="ISO8601")
     return df
 
 def _group_key(df: pd.DataFrame, feat: FeatureParams) -> Optional[str]:
     if feat.by == "none":
         return None
+    # security_id names the same instrument as security_name (security master) but groups on an integer
+    if feat.by in ("security_name", "security_id") and "security_id" in df.columns and df["security_id"].notna().all():
+        return "security_id"
     for c in df.columns:
         if c.lower() == feat.by.lower():
             return c
-    for probe in ("security_name","symbol","security_id"):
+    for probe in ("security_id","security_name","symbol"):
         if probe in df.columns:
             return probe
     return None
@@ -361,13 +418,33 @@ def _first_present(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
             return c
     return None
 
-def _build_features(df: pd.DataFrame, feat: FeatureParams) -> pd.DataFrame:
+def _store_volume_surge(
+    df: pd.DataFrame, vol_col: str, ts_col: Optional[str], feat: FeatureParams, folder: Path
+) -> Optional[pd.Series]:
+    """Volume / the security's rolling `baseline_days`-day median up to the row's day, from the baseline store."""
+    key = "security_id" if "security_id" in df.columns and df["security_id"].notna().all() else "security_name"
+    if vol_col == "__vol__":
+        vol_col = _first_present(df, ["pump_volume"])  # calibration output: the pump leg's volume
+    if key not in df.columns or vol_col is None or not ts_col:
+        return None
+    if refresh_volume_baseline(folder) is None:
+        return None
+    days = pd.to_datetime(df[ts_col], errors="coerce", utc=True, format="ISO8601").dt.tz_convert(ALERT_TZ).dt.date
+    med = rolling_median_volume(folder, key, df[key].tolist(), days.tolist(), feat.baseline_days)
+    if med is None:
+        return None
+    vol = pd.to_numeric(df[vol_col], errors="coerce").to_numpy(dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        surge = np.where(med > 0, vol / med, 0.0)
+    return pd.Series(np.nan_to_num(surge, nan=0.0), index=df.index)
+
+def _build_features(df: pd.DataFrame, feat: FeatureParams, baseline_folder: Optional[Path] = None) -> pd.DataFrame:
     df = df.copy()
     df = _ensure_dt(df)
 
     vol_col = _first_present(df, ["volume","qty","trade_qty","total_volume"])
     price_col = _first_present(df, ["price","last_price","close","close_price"])
-    ts_col = _first_present(df, [c for c in df.columns if "time" in c.lower() or "timestamp" in c.lower() or "ts" in c.lower()])
+    ts_col = _ts_column(df)
 
     if vol_col is None:
         df["__vol__"] = 1.0
@@ -377,6 +454,10 @@ def _build_features(df: pd.DataFrame, feat: FeatureParams) -> pd.DataFrame:
         price_col = "__px__"
 
     key = _group_key(df, feat)
+    store_surge = (
+        _store_volume_surge(df, vol_col, ts_col, feat, baseline_folder or SIMULATED_DIR)
+        if feat.volume_baseline == "store" else None
+    )
 
     def per_group(g: pd.DataFrame) -> pd.DataFrame:
         g = g.copy()
@@ -415,7 +496,7 @@ def _build_features(df: pd.DataFrame, feat: FeatureParams) -> pd.DataFrame:
         return g
 
     if key and key in df.columns:
-        grp = df.groupby(key, group_keys=False)
+        grp = df.groupby(key, group_keys=False, observed=True)
         try:
             df = grp.apply(lambda g: per_group(g), include_groups=False)
         except TypeError:  # older pandas
@@ -423,6 +504,8 @@ def _build_features(df: pd.DataFrame, feat: FeatureParams) -> pd.DataFrame:
     else:
         df = per_group(df)
 
+    if store_surge is not None:
+        df["feat_volume_surge"] = store_surge.reindex(df.index)
 
     df["feat_pattern_spike"] = ((df["feat_volume_surge"] > 2.0) & (df["feat_price_dislocation"].abs() > 2.0)).astype(float)
 
@@ -779,9 +862,11 @@ def detect_pumpdump_ml(req: DetectRequest = Body(...)):
     save_dir = Path(req.save_dir) if req.save_dir else out_dir / "ML"
     save_dir.mkdir(parents=True, exist_ok=True)
 
-    file_path = _find_latest_parquet_file(out_dir)
-    df_all = _load_df(file_path)
-    df = _filter_true_positives(df_all)
+    jobs.report_progress(0, 6)
+    with jobs.stage("load"):
+        file_path = _find_latest_parquet_file(out_dir)
+        df_all = _load_df(file_path)
+        df = _filter_true_positives(df_all)
     if df.empty:
         return DetectResponse(
             message="No True Positive rows found in latest calibrated parquet.",
@@ -795,106 +880,126 @@ def detect_pumpdump_ml(req: DetectRequest = Body(...)):
             results=[]
         )
 
-    df = _build_features(df, req.feat)
-    feature_cols = [c for c in df.columns if c.startswith("feat_")]
-    if not feature_cols:
-        raise ValueError("No feature columns were built (feat_*). Check _build_features and input schema.")
-    df = _manipulation_scoring(df, req.weights)
-    score_cols = ["score_volume","score_time_gap","score_price_dev","score_impact","ml_confidence_score"]
+    jobs.report_progress(1, 6)
+    with jobs.stage("features"):
+        df = _build_features(df, req.feat, Path(req.meta_dir) if req.meta_dir else SIMULATED_DIR)
+        feature_cols = [c for c in df.columns if c.startswith("feat_")]
+        if not feature_cols:
+            raise ValueError("No feature columns were built (feat_*). Check _build_features and input schema.")
+        df = _manipulation_scoring(df, req.weights)
+        score_cols = ["score_volume","score_time_gap","score_price_dev","score_impact","ml_confidence_score"]
 
     rf_prob = iso_raw = None
     model_summary: Dict[str, Any] = {}
     effective_label = req.label_column if (req.label_column and req.label_column in df.columns) else None
 
-    if req.algo.use_random_forest:
-        rf_pipe = _fit_random_forest(df, feature_cols, effective_label, req.seed)
+    jobs.report_progress(2, 6)
+    with jobs.stage("random_forest"):
+        if req.algo.use_random_forest:
+            rf_pipe = _fit_random_forest(df, feature_cols, effective_label, req.seed)
 
-        # <<< FIX: handle single-class RF >>>
-        try:
-            classes_ = rf_pipe.named_steps["rf"].classes_
-            if len(classes_) >= 2:
-                rf_prob = rf_pipe.predict_proba(df[feature_cols].values)[:, 1]
-                df["rf_score"] = rf_prob
-            else:
-                # Single class; skip RF probability and continue gracefully
-                rf_prob = None
-                model_summary["rf_single_class_warning"] = True
-        except Exception:
-            # Any unexpected issue -> skip RF
-            rf_prob = None
-            model_summary["rf_predict_exception"] = True
-        # <<< END FIX >>>
-
-        if req.algo.save_models:
-            model_dir = Path(req.algo.model_dir or (save_dir / "models"))
-            model_dir.mkdir(parents=True, exist_ok=True)
+            # <<< FIX: handle single-class RF >>>
             try:
-                joblib.dump(rf_pipe, model_dir / "rf_pumpdump.joblib")
+                classes_ = rf_pipe.named_steps["rf"].classes_
+                if len(classes_) >= 2:
+                    rf_prob = rf_pipe.predict_proba(df[feature_cols].values)[:, 1]
+                    df["rf_score"] = rf_prob
+                else:
+                    # Single class; skip RF probability and continue gracefully
+                    rf_prob = None
+                    model_summary["rf_single_class_warning"] = True
             except Exception:
-                pass
+                # Any unexpected issue -> skip RF
+                rf_prob = None
+                model_summary["rf_predict_exception"] = True
+            # <<< END FIX >>>
+
+            if req.algo.save_models:
+                model_dir = Path(req.algo.model_dir or (save_dir / "models"))
+                model_dir.mkdir(parents=True, exist_ok=True)
+                try:
+                    joblib.dump(rf_pipe, model_dir / "rf_pumpdump.joblib")
+                except Exception:
+                    pass
+
+            auc = None
+            if effective_label is not None and len(df[effective_label].dropna().unique()) >= 2 and rf_prob is not None:
+                y_true = df[effective_label].dropna().astype(int)
+                y_pred = pd.Series(rf_prob, index=df.index).loc[y_true.index]
+                try:
+                    auc = roc_auc_score(y_true, y_pred)
+                except Exception:
+                    auc = None
+            model_summary["random_forest_auc"] = auc
+            model_summary["random_forest_supervised"] = bool(effective_label)
+            model_summary["random_forest_label_used"] = effective_label
+
+    jobs.report_progress(3, 6)
+    with jobs.stage("isolation_forest"):
+        if req.algo.use_isolation_forest:
+            iso_pipe = _fit_isolation_forest(df, feature_cols, req.seed)
+            iso_raw = iso_pipe["iso"].decision_function(iso_pipe["scaler"].transform(df[feature_cols].values))
+            df["iso_raw_score"] = iso_raw
+            if req.algo.save_models:
+                model_dir = Path(req.algo.model_dir or (save_dir / "models"))
+                model_dir.mkdir(parents=True, exist_ok=True)
+                try:
+                    joblib.dump(iso_pipe, model_dir / "iso_pumpdump.joblib")
+                except Exception:
+                    pass
+
+    jobs.report_progress(4, 6)
+    with jobs.stage("ensemble_and_strict"):
+        if req.algo.use_ensemble:
+            ens = _ensemble_score(rf_prob, iso_raw)
+            df["ensemble_score"] = ens if ens.size else 0.0
+        else:
+            df["ensemble_score"] = df.get("rf_score", df.get("iso_raw_score", 0.0))
 
-        auc = None
-        if effective_label is not None and len(df[effective_label].dropna().unique()) >= 2 and rf_prob is not None:
-            y_true = df[effective_label].dropna().astype(int)
-            y_pred = pd.Series(rf_prob, index=df.index).loc[y_true.index]
-            try:
-                auc = roc_auc_score(y_true, y_pred)
-            except Exception:
-                auc = None
-        model_summary["random_forest_auc"] = auc
-        model_summary["random_forest_supervised"] = bool(effective_label)
-        model_summary["random_forest_label_used"] = effective_label
-
-    if req.algo.use_isolation_forest:
-        iso_pipe = _fit_isolation_forest(df, feature_cols, req.seed)
-        iso_raw = iso_pipe["iso"].decision_function(iso_pipe["scaler"].transform(df[feature_cols].values))
-        df["iso_raw_score"] = iso_raw
-        if req.algo.save_models:
-            model_dir = Path(req.algo.model_dir or (save_dir / "models"))
-            model_dir.mkdir(parents=True, exist_ok=True)
+        if "rf_score" in df and "ensemble_score" in df:
+            base = df["ensemble_score"] if "ensemble_score" in df.columns else df.get("rf_score", 0.0)
+            df["final_ai_score"] = 0.6 * base + 0.4 * df["ml_confidence_score"]
+        else:
+            df["final_ai_score"] = df["ml_confidence_score"]
+
+        df_filt, conf_cut, iso_norm_series = _apply_strict_filter(df, req.strict)
+        df_filt, explanations_list = _attach_explanations(df_filt, req.strict, conf_cut, iso_norm_series, req.weights)
+        df_filt = _apply_banding(df_filt, req.bands)
+
+    jobs.report_progress(5, 6)
+    with jobs.stage("save"):
+        # NEW: safe read (won’t crash if client didn’t send meta_dir)
+        meta_dir = getattr(req, "meta_dir", None)
+        meta_df = None
+        if meta_dir:
             try:
-                joblib.dump(iso_pipe, model_dir / "iso_pumpdump.joblib")
+                meta_df = _load_alerts_history_df(Path(meta_dir))
             except Exception:
-                pass
-
-    if req.algo.use_ensemble:
-        ens = _ensemble_score(rf_prob, iso_raw)
-        df["ensemble_score"] = ens if ens.size else 0.0
-    else:
-        df["ensemble_score"] = df.get("rf_score", df.get("iso_raw_score", 0.0))
-
-    if "rf_score" in df and "ensemble_score" in df:
-        base = df["ensemble_score"] if "ensemble_score" in df.columns else df.get("rf_score", 0.0)
-        df["final_ai_score"] = 0.6 * base + 0.4 * df["ml_confidence_score"]
-    else:
-        df["final_ai_score"] = df["ml_confidence_score"]
-
-    df_filt, conf_cut, iso_norm_series = _apply_strict_filter(df, req.strict)
-    df_filt, explanations_list = _attach_explanations(df_filt, req.strict, conf_cut, iso_norm_series, req.weights)
-    df_filt = _apply_banding(df_filt, req.bands)
-
-    # NEW: safe read (won’t crash if client didn’t send meta_dir)
-    meta_dir = getattr(req, "meta_dir", None)
-    meta_df = None
-    if meta_dir:
-        try:
-            meta_df = _load_df(_find_latest_parquet_file(Path(meta_dir)))
-        except Exception:
-            meta_df = None
-
-    # NEW: ensure metadata columns
-    df_filt = _ensure_metadata_cols_simple(df_filt, df_all, meta_df)
-
-    result_cols = [c for c in RESULT_COLS_PREF if c in df_filt.columns]
-    if not result_cols:
-        result_cols = list(df_filt.columns)
-
-    ts = datetime.now().strftime("%Y%m%d-%H%M%S")
-    base = (req.output_basename or file_path.stem + "_ml") + f"_{ts}"
-    out_parquet = (Path(req.save_dir) if req.save_dir else save_dir) / f"{base}.parquet"
-    out_csv = (Path(req.save_dir) if req.save_dir else save_dir) / f"{base}.csv"
-    df_filt[result_cols].to_parquet(out_parquet, index=False)
-    df_filt[result_cols].to_csv(out_csv, index=False)
+                meta_df = None
+
+        # NEW: ensure metadata columns
+        df_filt = _ensure_metadata_cols_simple(df_filt, df_all, meta_df)
+
+        result_cols = [c for c in RESULT_COLS_PREF if c in df_filt.columns]
+        if not result_cols:
+            result_cols = list(df_filt.columns)
+
+        ts = datetime.now().strftime("%Y%m%d-%H%M%S")
+        base = (req.output_basename or file_path.stem + "_ml") + f"_{ts}"
+        out_parquet = (Path(req.save_dir) if req.save_dir else save_dir) / f"{base}.parquet"
+        out_csv = (Path(req.save_dir) if req.save_dir else save_dir) / f"{base}.csv"
+        df_filt[result_cols].to_parquet(out_parquet, index=False)
+        df_filt[result_cols].to_csv(out_csv, index=False)
+        src = find_artifact(file_path)
+        for path in (out_parquet, out_csv):
+            register_artifact(
+                path, KIND_PUMPDUMP_ML, producer="pumpdumpml/detect",
+                start=src.start if src else None, end=src.end if src else None,
+                rows=int(len(df_filt)), source=file_path,
+            )
+
+    jobs.report_progress(6, 6)
+    jobs.add_outputs(saved_parquet=str(out_parquet), saved_csv=str(out_csv), source=str(file_path))
 
     records = df_filt[[c for c in result_cols if c != "explanations_json"]].to_dict(orient="records")
     results_json: List[Dict[str, Any]] = []
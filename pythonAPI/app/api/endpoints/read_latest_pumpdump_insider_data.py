@@ -1,14 +1,35 @@
 # app/api/endpoints/read_latest_pumpdump_insider_data.py
 
 from __future__ import annotations
+import base64
+import functools
+import json
 import os
+import re
 from pathlib import Path
-from typing import List, Optional
+from typing import Annotated, Any, List, Literal, Optional
 from datetime import date as _date
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Header, HTTPException, Path as Path_, Query, Request, Response
 from pydantic import BaseModel, Field
 
+try:
+    from app.core.datasets import alerts_date_window, find_latest_alerts_source, open_alerts_dataset, source_fingerprint
+    from app.core.identifiers import format_id_columns
+    from app.core.schema import date_range_filter
+    from app.core.cache import alerts_cache
+    from app.core.formats import bulk_response, negotiate, table_batches
+    from app.core import http_cache
+except ModuleNotFoundError:
+    from core.datasets import alerts_date_window, find_latest_alerts_source, open_alerts_dataset, source_fingerprint
+    from core.identifiers import format_id_columns
+    from core.schema import date_range_filter
+    from core.cache import alerts_cache
+    from core.formats import bulk_response, negotiate, table_batches
+    from core import http_cache
+
+from app.api.endpoints.simulate_data_sgx import DEFAULT_ALERT_WEIGHTS
+
 router = APIRouter(prefix="/simulate", tags=["Get – Read (Parquet)"])
 
 # --- NEW: robust default dir resolution (env > project-root/data/simulated > cwd/data/simulated)
@@ -54,10 +75,34 @@ def ensure_default_dir() -> Path:
     return DEFAULT_DIR
 
 
+SORT_KEYS = ("ts", "value", "price", "total_volume", "alert_id")
+TIEBREAK_COL = "trade_id"  # one trade per alert row: unique within a source, orders rows with equal sort keys
+
+
+class AlertPageQuery(BaseModel):
+    """Query string of the "latest" read endpoints. Every filter is pushed into the Parquet scan."""
+    limit: int = Field(200, ge=1, le=10000)
+    format_ids: bool = Field(True, description="Return integer snowflake IDs as PREFIX-<hex> strings (JSON-safe).")
+    start: Optional[_date] = Field(None, description="First alert date (inclusive).")
+    end: Optional[_date] = Field(None, description="Last alert date (inclusive).")
+    security_name: Optional[str] = Field(None, description="Exact name; comma-separated for several.")
+    broker: Optional[str] = Field(None, description="Exact broker; comma-separated for several.")
+    brokerage: Optional[str] = Field(None, description="Exact brokerage; comma-separated for several.")
+    account_type: Optional[str] = Field(None, description="Exact account type; comma-separated for several.")
+    min_value: Optional[float] = Field(None, description="Only rows with value >= min_value.")
+    fields: Optional[str] = Field(None, description="Comma-separated columns to return (default: all).")
+    sort: Optional[Literal["ts", "value", "price", "total_volume", "alert_id"]] = Field(
+        None, description="Sort key (default: ts, or alert_id for sources without ts); ties break on trade_id."
+    )
+    order: Literal["asc", "desc"] = "asc"
+    cursor: Optional[str] = Field(None, description="`next_cursor` of the previous page.")
+
+
 class PumpDumpResponse(BaseModel):
     message: str = Field(default="OK")
     folder: str
     latest_parquet: str
+    scenario: Optional[str] = None
     total_rows: int
     pump_and_dump_count: int
     returned: int
@@ -65,97 +110,268 @@ class PumpDumpResponse(BaseModel):
     min_date: Optional[str] = None
     max_date: Optional[str] = None
     range_days: Optional[int] = None
+    sort: Optional[str] = None
+    order: Optional[str] = None
+    next_cursor: Optional[str] = None
+    cache_hit: Optional[bool] = None
 
 
 def _find_latest_parquet(folder: Path) -> Path:
     if not folder.exists() or not folder.is_dir():
         raise HTTPException(status_code=400, detail=f"Folder not found: {folder.resolve()}")
-    files = sorted(folder.glob("*.parquet"), key=lambda x: x.stat().st_mtime, reverse=True)
-    if not files:
+    latest = find_latest_alerts_source(folder)  # flat *.parquet or the Hive dataset directory
+    if latest is None:
         raise HTTPException(status_code=404, detail=f"No Parquet files found in: {folder.resolve()}")
-    return files[0]
+    return latest
+
+def _as_date(v) -> _date:
+    """`date` is date32 in current files and an ISO string in older ones."""
+    return v if isinstance(v, _date) else _date.fromisoformat(str(v)[:10])
+
 
 def _compute_date_window(latest_path: Path) -> tuple[Optional[str], Optional[str], Optional[int]]:
-    """Try pyarrow first, fallback to pandas."""
+    """Parquet statistics / partition names first (cached per file), then a column scan, then pandas."""
+    try:
+        window = alerts_date_window(latest_path)
+        if window is None:
+            return None, None, None
+        dmin, dmax = window
+        return dmin.isoformat(), dmax.isoformat(), (dmax - dmin).days + 1
+    except Exception:
+        pass
     try:
-        import pyarrow.dataset as ds
         import pyarrow.compute as pc
-        dataset = ds.dataset(str(latest_path), format="parquet")
+        dataset = open_alerts_dataset(latest_path)
         t = dataset.to_table(columns=["date"])
         if t.num_rows == 0:
             return None, None, None
         col = t.column("date")
-        min_s, max_s = pc.min(col).as_py(), pc.max(col).as_py()
-        if not (min_s and max_s):
+        min_v, max_v = pc.min(col).as_py(), pc.max(col).as_py()
+        if not (min_v and max_v):
             return None, None, None
-        dmin, dmax = _date.fromisoformat(min_s), _date.fromisoformat(max_s)
-        return min_s, max_s, (dmax - dmin).days + 1
+        dmin, dmax = _as_date(min_v), _as_date(max_v)
+        return dmin.isoformat(), dmax.isoformat(), (dmax - dmin).days + 1
     except Exception:
         try:
             import pandas as pd
             df = pd.read_parquet(str(latest_path), columns=["date"])
             if df.empty or "date" not in df:
                 return None, None, None
-            min_s, max_s = str(df["date"].min()), str(df["date"].max())
-            dmin, dmax = _date.fromisoformat(min_s), _date.fromisoformat(max_s)
-            return min_s, max_s, (dmax - dmin).days + 1
+            dmin, dmax = _as_date(df["date"].min()), _as_date(df["date"].max())
+            return dmin.isoformat(), dmax.isoformat(), (dmax - dmin).days + 1
         except Exception:
             return None, None, None
 
 
-def _filter_and_read(latest_path: Path, scenario_name: str, limit: int):
-    """Filter Parquet for a given scenario (Pump and Dump or Insider Trading)."""
+# -----------------------------
+# Keyset pagination
+# -----------------------------
+# Pages are ordered by (sort key, trade_id). The cursor carries the last row's pair, and the
+# next page is "everything after it" -- a predicate pushed into the scan, so page N costs the
+# same as page 1 (no offset to skip). Timestamps travel as their int64 microseconds.
+def _encode_cursor(sort: str, order: str, key: Any, tiebreak: Any) -> str:
+    raw = json.dumps({"s": sort, "o": order, "k": key, "t": tiebreak}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def _decode_cursor(cursor: str, sort: str, order: str) -> tuple:
     try:
-        import pyarrow as pa
-        import pyarrow.dataset as ds
-        import pyarrow.parquet as pq
+        raw = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        key, tiebreak = raw["k"], raw["t"]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    if (raw.get("s"), raw.get("o")) != (sort, order):
+        raise HTTPException(status_code=400, detail="Cursor was issued for a different sort / order.")
+    return key, tiebreak
+
+
+def _cursor_value(scalar):
+    import pyarrow as pa
+    if pa.types.is_temporal(scalar.type):
+        return scalar.cast(pa.int64()).as_py()
+    return scalar.as_py()
+
+
+def _typed_scalar(value, typ):
+    import pyarrow as pa
+    if pa.types.is_temporal(typ):
+        return pa.scalar(value, type=pa.int64()).cast(typ)
+    return pa.scalar(value).cast(typ)
+
+
+def _keyset_filter(schema, sort: str, order: str, key, tiebreak, inclusive: bool = False):
+    """Rows after (key, tiebreak) in the page order; `inclusive` flips to "up to and including"."""
+    import pyarrow.dataset as ds
+    k = _typed_scalar(key, schema.field(sort).type)
+    t = _typed_scalar(tiebreak, schema.field(TIEBREAK_COL).type)
+    f_key, f_tb = ds.field(sort), ds.field(TIEBREAK_COL)
+    if (order == "asc") != inclusive:
+        return (f_key > k) | ((f_key == k) & ((f_tb >= t) if inclusive else (f_tb > t)))
+    return (f_key < k) | ((f_key == k) & ((f_tb <= t) if inclusive else (f_tb < t)))
 
-        pf = pq.ParquetFile(str(latest_path))
-        total_rows = pf.metadata.num_rows
 
-        dataset = ds.dataset(str(latest_path), format="parquet")
+def _split_values(raw: Optional[str]) -> List[str]:
+    return [v.strip() for v in raw.split(",") if v.strip()] if raw else []
+
+
+def _page_filter(schema, scenario_name: str, q: AlertPageQuery):
+    """Scenario + optional column filters, as one dataset expression."""
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    filt = ds.field("report_short_name") == pa.scalar(scenario_name, type=pa.string())
+    window = date_range_filter(schema, q.start, q.end)
+    if window is not None:
+        filt = filt & window
+    for col in ("security_name", "broker", "brokerage", "account_type"):
+        values = _split_values(getattr(q, col))
+        if not values:
+            continue
+        if col not in schema.names:
+            raise HTTPException(status_code=400, detail=f"Column '{col}' not found in source.")
+        filt = filt & (ds.field(col) == values[0] if len(values) == 1 else ds.field(col).isin(values))
+    if q.min_value is not None:
+        filt = filt & (ds.field("value") >= pa.scalar(q.min_value, type=pa.float64()))
+    return filt
+
+
+def _read_page(dataset, filt, q: AlertPageQuery):
+    """
+    (page table, next_cursor, sort). Two projected scans: the sort key + trade_id of the remaining rows
+    pick the page (top-k, no full sort), then only the page's rows are read with the requested fields.
+    """
+    import pyarrow.compute as pc
+
+    schema = dataset.schema
+    sort = q.sort or ("ts" if "ts" in schema.names else "alert_id")
+    for col in (sort, TIEBREAK_COL):
+        if col not in schema.names:
+            raise HTTPException(status_code=400, detail=f"Sort column '{col}' not found in source.")
+    fields = _split_values(q.fields) or list(schema.names)
+    unknown = [c for c in fields if c not in schema.names]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+
+    if q.cursor:
+        key, tiebreak = _decode_cursor(q.cursor, sort, q.order)
+        filt = filt & _keyset_filter(schema, sort, q.order, key, tiebreak)
+
+    order = "ascending" if q.order == "asc" else "descending"
+    sort_keys = [(sort, order), (TIEBREAK_COL, order)]
+    keys = dataset.to_table(columns=[sort, TIEBREAK_COL], filter=filt)
+    if keys.num_rows == 0:
+        return dataset.schema.empty_table().select(fields), None, sort
+    top = keys.take(pc.select_k_unstable(keys, k=q.limit + 1, sort_keys=sort_keys)).sort_by(sort_keys)
+    has_more = top.num_rows > q.limit
+    last = top.slice(min(top.num_rows, q.limit) - 1, 1)
+    last_key, last_tb = last.column(sort)[0], last.column(TIEBREAK_COL)[0]
+
+    bounded = filt & _keyset_filter(schema, sort, q.order, _cursor_value(last_key), _cursor_value(last_tb), inclusive=True)
+    columns = list(dict.fromkeys(fields + [sort, TIEBREAK_COL]))
+    page = dataset.to_table(columns=columns, filter=bounded).sort_by(sort_keys).slice(0, q.limit).select(fields)
+    if q.format_ids:
+        page = format_id_columns(page)
+    next_cursor = _encode_cursor(sort, q.order, _cursor_value(last_key), _cursor_value(last_tb)) if has_more else None
+    return page, next_cursor, sort
+
+
+@functools.lru_cache(maxsize=128)
+def _total_rows(path: str, mtime_ns: int, size: int) -> int:
+    return open_alerts_dataset(path).count_rows()  # footer metadata only
+
+
+def _warm_scenario(latest_path: Path, scenario_name: str, key) -> None:
+    """
+    Queue a background load of all rows of one scenario into the shared LRU cache
+    (report_short_name= partitions pruned), read no further than the cache budget: a scenario
+    that does not fit is remembered as too big and never loaded again for this file version.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    def load():
+        dataset = open_alerts_dataset(latest_path)
         filt = ds.field("report_short_name") == pa.scalar(scenario_name, type=pa.string())
-        filtered_table = dataset.to_table(filter=filt)
+        return dataset.to_batches(filter=filt), dataset.schema
 
-        scenario_count = filtered_table.num_rows
-        results = (
-            filtered_table.slice(0, limit).to_pandas().to_dict("records")
-            if scenario_count > 0 else []
-        )
-        return total_rows, scenario_count, results
+    alerts_cache.fill_later(key, load)
 
-    except Exception as arrow_err:
-        try:
-            import pandas as pd
-            df = pd.read_parquet(str(latest_path))
-            if "report_short_name" not in df.columns:
-                raise HTTPException(status_code=422, detail="Column 'report_short_name' not found.")
-            total_rows = len(df)
-            filtered = df[df["report_short_name"] == scenario_name]
-            scenario_count = len(filtered)
-            results = filtered.head(limit).to_dict(orient="records")
-            return total_rows, scenario_count, results
-        except Exception as pandas_err:
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to read Parquet ({latest_path}): pyarrow={arrow_err!r}, pandas={pandas_err!r}"
-            )
 
+def _filter_and_read(latest_path: Path, scenario_name: str, q: AlertPageQuery):
+    """
+    Filter a given scenario (any report_short_name) with the optional filters of `q`, and
+    return one keyset page. A scenario cached under (file fingerprint, scenario) is paged in
+    memory with the same expressions; otherwise the filters and projection are pushed into the
+    file scan, and the scenario is cached in the background for the next poll if it fits the
+    cache budget.
+    With format_ids, integer snowflake ID columns are returned as their PREFIX-<hex> string view.
+    Returns (total_rows, matching_rows, page_table, next_cursor, sort, cache_hit).
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
 
-@router.get(
-    "/alerts/latest/pumpdump",
-    response_model=PumpDumpResponse,
-    summary="Read latest Parquet and return Pump and Dump rows as JSON"
-)
-def read_latest_pumpdump(limit: int = Query(200, ge=1, le=10000)):
+    try:
+        total_rows = _total_rows(*source_fingerprint(latest_path))
+        key = (source_fingerprint(latest_path), scenario_name)
+        table = alerts_cache.get(key)
+        hit = table is not None
+        dataset = ds.dataset(table) if hit else open_alerts_dataset(latest_path)
+
+        filt = _page_filter(dataset.schema, scenario_name, q)
+        scenario_count = dataset.count_rows(filter=filt)  # file scan: reads only the filtered columns
+        if scenario_count > 0:
+            page, next_cursor, sort = _read_page(dataset, filt, q)
+        else:
+            page, next_cursor, sort = dataset.schema.empty_table(), None, q.sort
+        if not hit:
+            _warm_scenario(latest_path, scenario_name, key)
+        return total_rows, scenario_count, page, next_cursor, sort, hit
+
+    except HTTPException:
+        raise
+    except (pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:  # a filter/sort the column types cannot take
+        raise HTTPException(status_code=400, detail=f"Query cannot be applied to {latest_path.name}: {e}")
+    except (pa.ArrowException, OSError) as e:
+        raise HTTPException(status_code=500, detail=f"Failed to read Parquet ({latest_path}): {e!r}")
+
+
+def _read_scenario(
+    scenario_name: str, q: AlertPageQuery, request: Request, response: Response, accept: Optional[str] = None
+):
+    """
+    JSON (PumpDumpResponse) by default; NDJSON / Arrow IPC when the Accept header asks for
+    them, with the response fields as X-* headers and the page streamed batch by batch.
+    ETag / Last-Modified come from the source fingerprint and the query: a poll whose
+    If-None-Match still matches gets 304 Not Modified without reading any data.
+    """
     folder = ensure_default_dir()
     latest_path = _find_latest_parquet(folder)
+    fmt = negotiate(accept)
+    validators, unchanged = http_cache.conditional(
+        request, source_fingerprint(latest_path), scenario_name, fmt, request.url.query
+    )
+    if unchanged is not None:
+        return unchanged
+
     md, xd, dd = _compute_date_window(latest_path)
-    total_rows, scenario_count, results = _filter_and_read(latest_path, "Pump and Dump", limit)
+    total_rows, scenario_count, page, next_cursor, sort, hit = _filter_and_read(latest_path, scenario_name, q)
 
+    if fmt != "json":
+        return bulk_response(fmt, page.schema, table_batches(page), headers={
+            **validators,
+            "X-Latest-Parquet": latest_path, "X-Scenario": scenario_name, "X-Total-Rows": total_rows,
+            "X-Matching-Rows": scenario_count, "X-Returned": page.num_rows, "X-Next-Cursor": next_cursor,
+            "X-Sort": sort, "X-Order": q.order, "X-Min-Date": md, "X-Max-Date": xd, "X-Cache-Hit": hit,
+        })
+
+    # Straight to Python objects: dates / times / timestamps serialise as ISO strings and
+    # dictionary columns as plain values, with nulls as null (no NaT / NaN from pandas).
+    results = page.to_pylist()
+    response.headers.update(validators)
     return PumpDumpResponse(
         folder=str(folder),
         latest_parquet=str(latest_path),
+        scenario=scenario_name,
         total_rows=total_rows,
         pump_and_dump_count=scenario_count,
         returned=len(results),
@@ -163,28 +379,71 @@ def read_latest_pumpdump(limit: int = Query(200, ge=1, le=10000)):
         min_date=md,
         max_date=xd,
         range_days=dd,
+        sort=sort,
+        order=q.order,
+        next_cursor=next_cursor,
+        cache_hit=hit,
     )
 
 
+def _scenario_slug(name: str) -> str:
+    """'Pump and Dump' / 'pump-and-dump' / 'pumpdump' -> 'pumpdump'; 'Marking the Open/Close' -> 'markingtheopenclose'."""
+    words = re.split(r"[^a-z0-9]+", name.lower())
+    return "".join(w for w in words if w not in ("", "and"))
+
+
+SCENARIOS_BY_SLUG = {_scenario_slug(name): name for name in DEFAULT_ALERT_WEIGHTS}
+
+
+@router.get(
+    "/alerts/latest/pumpdump",
+    response_model=PumpDumpResponse,
+    summary="Read latest Parquet and return Pump and Dump rows as JSON"
+)
+def read_latest_pumpdump(
+    q: Annotated[AlertPageQuery, Query()],
+    request: Request,
+    response: Response,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    return _read_scenario("Pump and Dump", q, request, response, accept)
+
+
 @router.get(
     "/alerts/latest/insidertrading",
     response_model=PumpDumpResponse,
     summary="Read latest Parquet and return Insider Trading rows as JSON"
 )
-def read_latest_insidertrading(limit: int = Query(200, ge=1, le=10000)):
-    folder = ensure_default_dir()
-    latest_path = _find_latest_parquet(folder)
-    md, xd, dd = _compute_date_window(latest_path)
-    total_rows, scenario_count, results = _filter_and_read(latest_path, "Insider Trading", limit)
+def read_latest_insidertrading(
+    q: Annotated[AlertPageQuery, Query()],
+    request: Request,
+    response: Response,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    return _read_scenario("Insider Trading", q, request, response, accept)
 
-    return PumpDumpResponse(
-        folder=str(folder),
-        latest_parquet=str(latest_path),
-        total_rows=total_rows,
-        pump_and_dump_count=scenario_count,
-        returned=len(results),
-        results=results,
-        min_date=md,
-        max_date=xd,
-        range_days=dd,
-    )
+
+@router.get(
+    "/alerts/latest/{scenario}",
+    response_model=PumpDumpResponse,
+    summary="Read latest Parquet and return the rows of any alert scenario as JSON"
+)
+def read_latest_scenario(
+    scenario: Annotated[str, Path_(description="Scenario name or slug, e.g. 'Spoofing', 'wash-cross-trades', 'markingtheopenclose'.")],
+    q: Annotated[AlertPageQuery, Query()],
+    request: Request,
+    response: Response,
+    accept: Annotated[Optional[str], Header()] = None,
+):
+    name = SCENARIOS_BY_SLUG.get(_scenario_slug(scenario))
+    if name is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown scenario '{scenario}'. Known: {', '.join(sorted(SCENARIOS_BY_SLUG))}",
+        )
+    return _read_scenario(name, q, request, response, accept)
+
+
+@router.get("/alerts/latest-cache", summary="Hit / miss / size counters of the latest-alerts result cache")
+def read_cache_stats():
+    return alerts_cache.stats()
@@ -1,14 +1,18 @@
 from __future__ import annotations
 import os
 import random
+import sqlite3
 import string
+import uuid
 from datetime import date, datetime, time, timedelta
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Literal, Optional, Tuple
 
 import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Body
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import APIRouter, Body, HTTPException, Query
 from pydantic import BaseModel, Field, model_validator
 
 
@@ -17,8 +21,38 @@ router = APIRouter(prefix="/simulate", tags=["SimulateData like NNASDAQ 'SMART'"
 # --- dual import for running from project root or from /app ---
 try:
     from app.core.paths import SIMULATED_DIR, RESULTS_DIR
+    from app.core.datasets import (
+        existing_partition_dates, find_latest_alerts_source, hive_root, open_alerts_dataset, present_alert_dates,
+        write_hive_dataset,
+    )
+    from app.core.identifiers import (
+        SNOWFLAKE_GENERATORS, format_id_columns, random_codes, snowflake_ids, snowflake_node, validate_isins,
+    )
+    from app.core.security_master import PRICE_BUCKETS, build_security_master, price_bucket, write_security_master
+    from app.core.schema import (
+        alerts_schema, conform_alerts, dictionary_column, wall_clock_dates, wall_clock_times, wall_clock_timestamps,
+    )
+    from app.core.catalog import (
+        KIND_ALERTS, attach_id_generator, claim_id_generator, register_artifact, release_id_generator,
+    )
+    from app.core import jobs
 except ModuleNotFoundError:
     from core.paths import SIMULATED_DIR, RESULTS_DIR
+    from core.datasets import (
+        existing_partition_dates, find_latest_alerts_source, hive_root, open_alerts_dataset, present_alert_dates,
+        write_hive_dataset,
+    )
+    from core.identifiers import (
+        SNOWFLAKE_GENERATORS, format_id_columns, random_codes, snowflake_ids, snowflake_node, validate_isins,
+    )
+    from core.security_master import PRICE_BUCKETS, build_security_master, price_bucket, write_security_master
+    from core.schema import (
+        alerts_schema, conform_alerts, dictionary_column, wall_clock_dates, wall_clock_times, wall_clock_timestamps,
+    )
+    from core.catalog import (
+        KIND_ALERTS, attach_id_generator, claim_id_generator, register_artifact, release_id_generator,
+    )
+    from core import jobs
 
 # -----------------------------
 # Constants / vocab
@@ -57,6 +91,12 @@ SGX_TICKERS = [
     ("Seatrium Ltd", "EQUITY"),
 ]
 
+# Security master (app/core/security_master.py): security_id is the 1-based position above, so
+# only ever append new tickers. Every alert on a security carries its master ISIN.
+SECURITY_MASTER = build_security_master(SGX_TICKERS)
+_SECURITY_IDS = {name: i + 1 for i, (name, _) in enumerate(SGX_TICKERS)}
+_SECURITY_ISINS = SECURITY_MASTER["isin"].combine_chunks()
+
 BROKERS = [
     "SGX-BROK-01", "SGX-BROK-02", "SGX-BROK-03", "SGX-BROK-04",
     "SGX-BROK-05", "SGX-BROK-06", "SGX-BROK-07", "SGX-BROK-08",
@@ -167,7 +207,7 @@ DEFAULT_ALERT_WEIGHTS: Dict[str, float] = {
 # MANDATORY COLUMNS
 # -----------------------------
 COMMON_MANDATORY_COLS = [
-    "alert_id", "report_short_name", "security_type", "security_name", "brokerage",
+    "alert_id", "report_short_name", "security_type", "security_name", "security_id", "brokerage",
     "alert_type_category", "alert_type_description", "comments",
     "exchange_id", "message_type", "date", "time",
     "order_id", "trade_id", "market_side",
@@ -193,34 +233,99 @@ INSIDER_MANDATORY_COLS = [
 
 ALL_SCENARIO_MANDATORY = PUMP_DUMP_MANDATORY_COLS + INSIDER_MANDATORY_COLS
 
+# Stable column order (shared by the row and columnar engines; types in app/core/schema.py)
+PREFERRED_COLS = [
+    # Alert meta
+    "alert_id", "report_short_name", "security_type", "security_name", "security_id", "brokerage",
+    "alert_type_category", "alert_type_description", "comments",
+    # Event/Order/Trade ("ts" = date + time as one timestamp)
+    "exchange_id", "message_type", "date", "time", "ts", "order_id", "trade_id", "market_side",
+    "price", "total_volume", "value", "account", "account_type", "broker", "trader",
+    "order_type", "executions_instructions", "order_received_date", "order_received_time",
+    "order_code", "amend_received_datetime", "cancel_reason",
+    # Pump & Dump
+    "pd_leg", "pd_leg_index", "pd_pair_id", "pd_pump_price", "pd_dump_price",
+    # Insider (incl. identifiers)
+    "insider_mnpi_flag", "insider_relation", "insider_event_type", "insider_event_datetime",
+    "insider_pre_event_return_pct", "insider_post_event_return_pct",
+    "insider_linkage_score", "insider_suspicious_profit",
+    "isin", "cusip",
+]
+
 # -----------------------------
 # Request/response models
 # -----------------------------
-class GenerateRequest(BaseModel):
-    start: date = Field(default_factory=lambda: (date.today() - timedelta(days=3)))
-    end: date = Field(default_factory=date.today)
-    alerts_per_day: int = Field(default=2000, ge=1, le=20000)
-    out_dir: Optional[str] = Field(default=str(SIMULATED_DIR))  
-    seed: Optional[int] = Field(default=None)
-    alert_weights: Optional[Dict[str, float]] = Field(default=None)
-
-
+# Per-day ceiling for the in-memory batch path; streaming keeps one day in memory at a time.
+MAX_ALERTS_PER_DAY_BATCH = 20_000
+MAX_ALERTS_PER_DAY_STREAM = 250_000
 
+class GenerateRequest(BaseModel):
     start: date = Field(default_factory=lambda: (date.today() - timedelta(days=3)))
     end: date = Field(default_factory=date.today)
-    alerts_per_day: int = Field(default=2000, ge=1, le=20000)
+    alerts_per_day: int = Field(default=2000, ge=1, le=MAX_ALERTS_PER_DAY_STREAM)
     out_dir: Optional[str] = Field(default=str(SIMULATED_DIR))  #
     seed: Optional[int] = Field(default=None)
     alert_weights: Optional[Dict[str, float]] = Field(default=None)
+    engine: Literal["rows", "columnar"] = Field(
+        default="columnar",
+        description="'columnar' draws each day as NumPy arrays in one pass; 'rows' is the legacy per-alert generator.",
+    )
+    output_mode: Literal["batch", "stream"] = Field(
+        default="batch",
+        description="'stream' writes every day as its own Parquet row group (bounded memory, columnar engine only).",
+    )
+    write_csv: bool = Field(default=True, description="Also write the CSV copy next to the Parquet file.")
+    layout: Literal["file", "hive"] = Field(
+        default="file",
+        description="'hive' writes <out_dir>/sgx_alerts/date=.../report_short_name=.../ (Parquet only, day by day).",
+    )
+    workers: int = Field(
+        default=1, ge=1, le=64,
+        description="Processes used to generate days in parallel (columnar engine). Output is identical for any value.",
+    )
+    append: bool = Field(
+        default=False,
+        description="Only generate days missing from the Hive dataset under out_dir (implies layout='hive').",
+    )
+    id_scheme: Literal["random", "snowflake"] = Field(
+        default="random",
+        description=(
+            "'random': ALRT-XXXXXXXX style strings. 'snowflake': time-ordered int64 alert_id / order_id / "
+            "trade_id / order_code (columnar engine); the response sample shows their formatted view. "
+            f"Each snowflake run claims one of {SNOWFLAKE_GENERATORS} generators for its days; a run over a "
+            "day whose generators are all held by existing files is rejected (409). Deleting those files, "
+            "or rewriting the day in the same Hive dataset, frees their generators."
+        ),
+    )
+
+    @model_validator(mode="after")
+    def _check_output_mode(self) -> "GenerateRequest":
+        if self.append:
+            self.layout = "hive"
+        if self.output_mode == "stream" and self.engine != "columnar":
+            raise ValueError("output_mode='stream' requires engine='columnar'")
+        if self.workers > 1 and self.engine != "columnar":
+            raise ValueError("workers > 1 requires engine='columnar'")
+        if self.layout == "hive" and self.engine != "columnar":
+            raise ValueError("layout='hive' requires engine='columnar'")
+        if self.id_scheme == "snowflake" and self.engine != "columnar":
+            raise ValueError("id_scheme='snowflake' requires engine='columnar'")
+        streaming = self.output_mode == "stream" or self.layout == "hive"
+        if self.alerts_per_day > MAX_ALERTS_PER_DAY_BATCH and not streaming:
+            raise ValueError(
+                f"alerts_per_day above {MAX_ALERTS_PER_DAY_BATCH} requires output_mode='stream' or layout='hive'"
+            )
+        return self
 
 
 
 class GenerateResponse(BaseModel):
     message: str
     count: int
-    csv_path: str
+    csv_path: Optional[str] = None
     parquet_path: str
     sample: List[dict]
+    skipped_days: List[date] = []
 
 router = APIRouter(prefix="/simulate", tags=["Generate Trades Alerts like NASDAQ 'SMART'"])
 
@@ -258,9 +363,7 @@ def _choose_alert(alert_weights: Dict[str, float]) -> Tuple[str, str, str]:
     return "Unknown", chosen_short, ""
 
 def _price_seed_for_security(sec_name: str) -> float:
-    bucket = sum(ord(c) for c in sec_name) % 5
-    ranges = [(0.80, 3.00),(3.00, 8.00),(8.00, 20.0),(20.0, 40.0),(40.0, 90.0)]
-    low, high = ranges[bucket]
+    low, high = PRICE_BUCKETS[price_bucket(sec_name)]
     return round(random.uniform(low, high), 2)
 
 def _apply_alert_behaviour(short_name: str, base_price: float) -> Tuple[float, float, Optional[str]]:
@@ -301,13 +404,14 @@ def _to_isin_digits(s: str) -> str:
     return "".join(out)
 
 def _luhn_checksum(num_str: str) -> int:
-    """Luhn mod-10 checksum for a string of digits."""
+    """Luhn mod-10 check digit to append to a string of digits."""
     total = 0
-    # process from rightmost, doubling every second digit
+    # process from rightmost, doubling every second digit starting with the rightmost
+    # (it sits next to the check digit once that is appended)
     reverse = num_str[::-1]
     for i, ch in enumerate(reverse):
         n = int(ch)
-        if i % 2 == 0:
+        if i % 2 == 1:
             total += n
         else:
             d = n * 2
@@ -333,7 +437,7 @@ def _gen_cusip() -> str:
 _INSIDER_RELATIONS = ["Employee", "Director", "Supplier", "Consultant", "Analyst", "Unknown"]
 _INSIDER_EVENTS = ["Earnings", "M&A", "Guidance", "Resignation", "Regulatory", "Litigation"]
 
-def _gen_insider_fields(base_ts: datetime) -> Dict[str, object]:
+def _gen_insider_fields(base_ts: datetime, isin: str) -> Dict[str, object]:
     event_dt = base_ts + timedelta(hours=random.randint(1, 72))
     pre_ret = round(random.uniform(-5.0, 5.0), 3)
     post_ret = round(random.uniform(-10.0, 10.0), 3)
@@ -346,7 +450,7 @@ def _gen_insider_fields(base_ts: datetime) -> Dict[str, object]:
         "insider_post_event_return_pct": post_ret,
         "insider_linkage_score": round(random.uniform(0.55, 0.98), 3),
         "insider_suspicious_profit": round(random.uniform(5_000, 250_000), 2),
-        "isin": _gen_isin("SG"),
+        "isin": isin,  # the security's master ISIN
         "cusip": None,  # SGX doesn’t generally use CUSIP; keep as None
     }
 
@@ -421,6 +525,7 @@ def _generate_pump_dump_pair(
         "report_short_name": short_name,
         "security_type": sec_type,
         "security_name": sec_name,
+        "security_id": _SECURITY_IDS[sec_name],
         "brokerage": brokerage,
         "alert_type_category": category,
         "alert_type_description": desc,
@@ -457,6 +562,7 @@ def _generate_pump_dump_pair(
         "report_short_name": short_name,
         "security_type": sec_type,
         "security_name": sec_name,
+        "security_id": _SECURITY_IDS[sec_name],
         "brokerage": brokerage,
         "alert_type_category": category,
         "alert_type_description": desc,
@@ -559,6 +665,7 @@ def _generate_rows_for_day(
             "report_short_name": short_name,
             "security_type": sec_type,
             "security_name": sec_name,
+            "security_id": _SECURITY_IDS[sec_name],
             "brokerage": brokerage,
             "alert_type_category": category,
             "alert_type_description": desc,
@@ -588,7 +695,7 @@ def _generate_rows_for_day(
 
         if short_name == "Insider Trading":
             row.update(_blank_pump_dump_fields())
-            row.update(_gen_insider_fields(ts))
+            row.update(_gen_insider_fields(ts, _SECURITY_ISINS[_SECURITY_IDS[sec_name] - 1].as_py()))
         else:
             row.update(_blank_pump_dump_fields())
             row.update(_blank_insider_fields())
@@ -596,26 +703,407 @@ def _generate_rows_for_day(
         rows.append(row)
     return rows
 
+# -----------------------------
+# Columnar day generator (NumPy -> Arrow)
+# -----------------------------
+_PD_DESCRIPTION = "Two-legged event: BUY-driven pump leg followed by SELL-driven dump leg."
+_CANCEL_REASONS = ["User Cancel", "Price Moved", "Replace by Client", "Risk Limit"]
+_PD_CANCEL_REASONS = ["User Cancel", "Replace by Client", "Risk Limit"]
+_RULES_COMMENT = "Flagged by rules engine for post-trade review."
+
+_take_vocab = dictionary_column  # integer codes -> dictionary<int16, string>, null where not `valid`
+
+def _session_seconds(rng: np.random.Generator, n: int) -> np.ndarray:
+    """Vectorized `_pick_session_time`: seconds after midnight inside the SGX sessions."""
+    morning = rng.random(n) < 3 / 7
+    hh = np.where(
+        morning,
+        rng.integers(MORNING_OPEN.hour, MORNING_CLOSE.hour, size=n),
+        rng.integers(AFTERNOON_OPEN.hour, AFTERNOON_CLOSE.hour, size=n),
+    )
+    return hh * 3600 + rng.integers(0, 60, size=n) * 60 + rng.integers(0, 60, size=n)
+
+def _generate_table_for_day(
+    d: date,
+    alerts_per_day: int,
+    alert_weights: Dict[str, float],
+    rng: np.random.Generator,
+    id_scheme: str = "random",
+    id_generator: int = 0,
+) -> pa.Table:
+    """
+    Columnar counterpart of `_generate_rows_for_day`: every field for the day is drawn as a
+    NumPy array in one pass and assembled straight into an Arrow table with the shared alerts
+    schema (app/core/schema.py): native timestamps / dates / times, dictionary-encoded vocabularies.
+    Pump & Dump alerts expand into their two legs (PUMP then DUMP) right after each other.
+    With id_scheme='snowflake' the ID columns are int64 snowflakes: alert_id / order_code from
+    the alert's first timestamp, order_id from the order receipt time, trade_id from the row's time,
+    all issued by snowflake generator `id_generator` (claimed per run, see `generate_alerts`).
+    """
+    n = int(alerts_per_day)
+
+    # --- Per-alert draws
+    short_names = list(alert_weights.keys())
+    probs = np.array([alert_weights[s] for s in short_names], dtype=float)
+    alert_code = rng.choice(len(short_names), size=n, p=probs / probs.sum())
+
+    lookup = {sn: (cat, desc) for cat, items in ALERT_TAXONOMY.items() for sn, desc in items}
+    categories = [lookup.get(sn, ("Unknown", ""))[0] for sn in short_names]
+    descriptions = [lookup.get(sn, ("Unknown", ""))[1] for sn in short_names]
+    hints = [ALERT_BEHAVIOUR_HINTS.get(sn, {}) for sn in short_names]
+    bps_lo, bps_hi = np.array([h.get("price_jitter_bps", (0, 50)) for h in hints], dtype=float).T
+    vol_lo, vol_hi = np.array([h.get("vol_mult", (1.0, 2.0)) for h in hints], dtype=float).T
+    buy_bias = np.array([h.get("side_bias") == "BUY" for h in hints])
+
+    is_pd = np.array([sn == "Pump and Dump" for sn in short_names])[alert_code]
+    is_insider = np.array([sn == "Insider Trading" for sn in short_names])[alert_code]
+
+    sec_code = rng.integers(0, len(SGX_TICKERS), size=n)
+    bucket = SECURITY_MASTER["price_bucket"].to_numpy()[sec_code]
+    base_price = np.round(rng.uniform(PRICE_BUCKETS[bucket, 0], PRICE_BUCKETS[bucket, 1]), 2)
+
+    broker = rng.integers(0, len(BROKERS), size=n)
+    brokerage = rng.integers(0, len(BROKERAGES), size=n)
+    trader = rng.integers(0, len(TRADERS), size=n)
+    account_type = rng.integers(0, len(ACCOUNT_TYPES), size=n)
+    account_no = rng.integers(100000, 1000000, size=n)
+    order_type = rng.integers(0, len(ORDER_TYPES), size=n)
+    exec_instr = rng.integers(0, len(EXEC_INSTR), size=n)
+    if id_scheme == "random":
+        alert_id = random_codes(rng, "ALRT", n)
+        order_code = random_codes(rng, "OC", n)
+
+    day0 = int(np.datetime64(d, "s").astype(np.int64))
+
+    # Single-leg scenarios
+    ts = day0 + _session_seconds(rng, n)
+    price = np.maximum(0.01, base_price * (1 + rng.uniform(bps_lo[alert_code], bps_hi[alert_code]) / 10000.0))
+    vol_mult = rng.uniform(vol_lo[alert_code], vol_hi[alert_code])
+    side = np.where(buy_bias[alert_code], 0, rng.integers(0, 2, size=n))  # index into MARKET_SIDES
+    total_volume = (rng.integers(1_000, 50_001, size=n) * vol_mult).astype(np.int64)
+    value = np.round(price * total_volume, 2)
+    price = np.round(price, 4)
+    recv = ts - (rng.integers(1, 46, size=n) * 60 + rng.integers(0, 60, size=n))
+    amend_ok = rng.random(n) < 0.12
+    amend = ts - rng.integers(0, 16, size=n) * 60
+    cancel_ok = rng.random(n) < 0.10
+    cancel = rng.integers(0, len(_CANCEL_REASONS), size=n)
+    comment_ok = rng.random(n) < 0.35
+
+    # Pump & Dump legs
+    pd_start = day0 + (
+        rng.integers(AFTERNOON_OPEN.hour, AFTERNOON_CLOSE.hour - 1, size=n) * 3600
+        + rng.integers(0, 60, size=n) * 60 + rng.integers(0, 60, size=n)
+    )
+    pd_mid = pd_start + rng.integers(5, 26, size=n) * 60
+    pd_end = pd_mid + rng.integers(3, 21, size=n) * 60
+    pump_price = np.round(np.maximum(0.01, base_price * (1 + rng.uniform(0.06, 0.25, size=n))), 4)
+    dump_price = np.round(np.maximum(0.01, pump_price * (1 - rng.uniform(0.08, 0.35, size=n))), 4)
+    pump_vol = (rng.integers(15_000, 80_001, size=n) * rng.uniform(1.1, 2.2, size=n)).astype(np.int64)
+    dump_vol = (pump_vol * rng.uniform(0.7, 1.0, size=n)).astype(np.int64)
+    recv_pump = pd_start - (rng.integers(1, 16, size=n) * 60 + rng.integers(0, 60, size=n))
+    recv_dump = pd_mid - (rng.integers(1, 11, size=n) * 60 + rng.integers(0, 60, size=n))
+    pd_amend_ok = rng.random(n) < 0.10
+    pd_amend = pd_start - rng.integers(0, 11, size=n) * 60
+    pd_cancel_ok = rng.random(n) < 0.05
+    pd_cancel = rng.integers(0, len(_PD_CANCEL_REASONS), size=n)
+
+    # Insider Trading extras
+    ins_event = ts + rng.integers(1, 73, size=n) * 3600
+    ins_pre = np.round(rng.uniform(-5.0, 5.0, size=n), 3)
+    ins_post = np.round(rng.uniform(-10.0, 10.0, size=n), 3)
+    ins_relation = rng.integers(0, len(_INSIDER_RELATIONS), size=n)
+    ins_event_type = rng.integers(0, len(_INSIDER_EVENTS), size=n)
+    ins_linkage = np.round(rng.uniform(0.55, 0.98, size=n), 3)
+    ins_profit = np.round(rng.uniform(5_000, 250_000, size=n), 2)
+
+    # --- Expand alerts -> rows (Pump & Dump contributes two legs)
+    legs = 1 + is_pd.astype(np.int64)
+    row = np.repeat(np.arange(n), legs)
+    leg = np.arange(row.size) - np.repeat(np.cumsum(legs) - legs, legs)
+    r_pd = is_pd[row]
+    r_pump = r_pd & (leg == 0)
+    r_dump = r_pd & (leg == 1)
+    r_ins = is_insider[row]
+    m = row.size
+
+    row_ts = np.where(r_pd, np.where(leg == 0, pd_start[row], pd_end[row]), ts[row])
+    row_recv = np.where(r_pd, np.where(leg == 0, recv_pump[row], recv_dump[row]), recv[row])
+    row_price = np.where(r_pd, np.where(leg == 0, pump_price[row], dump_price[row]), price[row])
+    row_volume = np.where(r_pd, np.where(leg == 0, pump_vol[row], dump_vol[row]), total_volume[row])
+    row_value = np.where(r_pd, np.round(row_price * row_volume, 2), value[row])
+    row_side = np.where(r_pd, leg, side[row])
+    amend_valid = np.where(r_pd, r_pump & pd_amend_ok[row], amend_ok[row])
+    row_amend = np.where(r_pd, pd_amend[row], amend[row])
+    cancel_valid = np.where(r_pd, r_dump & pd_cancel_ok[row], cancel_ok[row])
+    cancel_vocab = _CANCEL_REASONS + _PD_CANCEL_REASONS
+    row_cancel = np.where(r_pd, len(_CANCEL_REASONS) + pd_cancel[row], cancel[row])
+
+    comment_vocab = [_RULES_COMMENT, "phase=pump", "phase=dump"]
+    row_comment = np.where(r_pd, 1 + leg, 0)
+    comment_valid = r_pd | comment_ok[row]
+
+    category_vocab = categories + ["Price / Volume Manipulation"]
+    desc_vocab = descriptions + [_PD_DESCRIPTION]
+    row_category = np.where(r_pd, len(categories), alert_code[row])
+    row_desc = np.where(r_pd, len(descriptions), alert_code[row])
+
+    if id_scheme == "snowflake":
+        alert_ms = np.where(is_pd, pd_start, ts) * 1000
+        alert_id = pa.array(snowflake_ids(alert_ms, snowflake_node(id_generator, "alert_id")))
+        order_code = pa.array(snowflake_ids(alert_ms, snowflake_node(id_generator, "order_code")))
+        order_id = pa.array(snowflake_ids(row_recv * 1000, snowflake_node(id_generator, "order_id")))
+        trade_id = pa.array(snowflake_ids(row_ts * 1000, snowflake_node(id_generator, "trade_id")))
+    else:
+        order_id = random_codes(rng, "ORD", m)
+        trade_id = random_codes(rng, "TRD", m)
+
+    alert_ids = alert_id.take(pa.array(row))
+
+    columns = {
+        "alert_id": alert_ids,
+        "report_short_name": _take_vocab(short_names, alert_code[row]),
+        "security_type": _take_vocab([t for _, t in SGX_TICKERS], sec_code[row]),
+        "security_name": _take_vocab([s for s, _ in SGX_TICKERS], sec_code[row]),
+        "security_id": pa.array((sec_code[row] + 1).astype(np.int32)),
+        "brokerage": _take_vocab(BROKERAGES, brokerage[row]),
+        "alert_type_category": _take_vocab(category_vocab, row_category),
+        "alert_type_description": _take_vocab(desc_vocab, row_desc),
+        "comments": _take_vocab(comment_vocab, row_comment, comment_valid),
+        "exchange_id": _take_vocab([EXCHANGE_ID], np.zeros(m, dtype=np.int16)),
+        "message_type": _take_vocab([MESSAGE_TYPE], np.zeros(m, dtype=np.int16)),
+        "date": wall_clock_dates(row_ts),
+        "time": wall_clock_times(row_ts),
+        "ts": wall_clock_timestamps(row_ts),
+        "order_id": order_id,
+        "trade_id": trade_id,
+        "market_side": _take_vocab(MARKET_SIDES, row_side),
+        "price": pa.array(row_price),
+        "total_volume": pa.array(row_volume),
+        "value": pa.array(row_value),
+        "account": pc.binary_join_element_wise(
+            pc.take(pa.array([t[:3] for t in ACCOUNT_TYPES]), pa.array(account_type[row])),
+            pc.cast(pa.array(account_no[row]), pa.string()),
+            "-",
+        ),
+        "account_type": _take_vocab(ACCOUNT_TYPES, account_type[row]),
+        "broker": _take_vocab(BROKERS, broker[row]),
+        "trader": _take_vocab(TRADERS, trader[row]),
+        "order_type": _take_vocab(ORDER_TYPES, order_type[row]),
+        "executions_instructions": _take_vocab(EXEC_INSTR, exec_instr[row]),
+        "order_received_date": wall_clock_dates(row_recv),
+        "order_received_time": wall_clock_times(row_recv),
+        "order_code": order_code.take(pa.array(row)),
+        "amend_received_datetime": wall_clock_timestamps(row_amend, amend_valid),
+        "cancel_reason": _take_vocab(cancel_vocab, row_cancel, cancel_valid),
+        # Pump & Dump
+        "pd_leg": _take_vocab(["PUMP", "DUMP"], leg, r_pd),
+        "pd_leg_index": pa.array(leg.astype(np.int8), mask=~r_pd),
+        "pd_pair_id": pc.if_else(pa.array(r_pd), alert_ids, pa.scalar(None, alert_ids.type)),
+        "pd_pump_price": pa.array(pump_price[row], mask=~r_pd),
+        "pd_dump_price": pa.array(dump_price[row], mask=~r_pd),
+        # Insider Trading
+        "insider_mnpi_flag": pa.array(r_ins, mask=~r_ins),
+        "insider_relation": _take_vocab(_INSIDER_RELATIONS, ins_relation[row], r_ins),
+        "insider_event_type": _take_vocab(_INSIDER_EVENTS, ins_event_type[row], r_ins),
+        "insider_event_datetime": wall_clock_timestamps(ins_event[row], r_ins),
+        "insider_pre_event_return_pct": pa.array(ins_pre[row], mask=~r_ins),
+        "insider_post_event_return_pct": pa.array(ins_post[row], mask=~r_ins),
+        "insider_linkage_score": pa.array(ins_linkage[row], mask=~r_ins),
+        "insider_suspicious_profit": pa.array(ins_profit[row], mask=~r_ins),
+        "isin": pa.DictionaryArray.from_arrays(pa.array(sec_code[row].astype(np.int16), mask=~r_ins), _SECURITY_ISINS),
+        "cusip": pa.nulls(m, type=pa.string()),
+    }
+    schema = alerts_schema(pa.int64() if id_scheme == "snowflake" else pa.string())
+    return pa.table([columns[c] for c in schema.names], schema=schema)
+
+def _day_seed_sequences(
+    seed: Optional[int], days: Iterable[date]
+) -> Iterator[Tuple[date, np.random.SeedSequence]]:
+    """
+    Pair every day with its own child SeedSequence, spawned from GenerateRequest.seed. The spawn
+    key is the day's ordinal rather than its position in the range, so a day draws the same data
+    whatever range (or worker count) it is generated with.
+    """
+    root = np.random.SeedSequence(seed)
+    return ((d, np.random.SeedSequence(root.entropy, spawn_key=(d.toordinal(),))) for d in days)
+
+def _generate_day_worker(
+    d: date,
+    alerts_per_day: int,
+    alert_weights: Dict[str, float],
+    seed_seq: np.random.SeedSequence,
+    id_scheme: str = "random",
+    id_generator: int = 0,
+) -> pa.Table:
+    """Process-pool entry point: one day, one independent Generator."""
+    return _generate_table_for_day(
+        d, alerts_per_day, alert_weights, np.random.default_rng(seed_seq), id_scheme, id_generator
+    )
+
+def _iter_day_tables(
+    days: Iterable[date],
+    alerts_per_day: int,
+    alert_weights: Dict[str, float],
+    seed: Optional[int],
+    workers: int = 1,
+    id_scheme: str = "random",
+    id_generator: int = 0,
+) -> Iterator[pa.Table]:
+    """
+    Yield one Arrow table per day, in date order. With workers > 1 the days are spread over a
+    ProcessPoolExecutor; at most 2 * workers days are in flight so streaming stays bounded.
+    `days` may be an open-ended iterator (the real-time stream keeps pulling days).
+    """
+    todo = _day_seed_sequences(seed, days)
+    workers = max(1, min(workers, os.cpu_count() or 1))
+    if isinstance(days, list):
+        workers = min(workers, max(1, len(days)))
+    if workers == 1:
+        for d, seq in todo:
+            yield _generate_day_worker(d, alerts_per_day, alert_weights, seq, id_scheme, id_generator)
+        return
+
+    import multiprocessing
+    from collections import deque
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        pending: deque = deque()
+        for d, seq in todo:
+            pending.append(
+                pool.submit(_generate_day_worker, d, alerts_per_day, alert_weights, seq, id_scheme, id_generator)
+            )
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            table = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(
+                    pool.submit(
+                        _generate_day_worker, nxt[0], alerts_per_day, alert_weights, nxt[1], id_scheme, id_generator
+                    )
+                )
+            yield table
+
+def _track_days(tables: Iterable[pa.Table], days: List[date]) -> Iterator[pa.Table]:
+    """Report the day loop to the current background job (if any) and honour cancellation."""
+    for i, (d, table) in enumerate(zip(days, tables), start=1):
+        jobs.check_cancelled()
+        jobs.report_progress(i, len(days), message=f"generated {d.isoformat()}")
+        yield table
+
 # -----------------------------
 # IO helpers
 # -----------------------------
 def _ensure_dir(path: str) -> None:
     Path(path).mkdir(parents=True, exist_ok=True)
 
+def _register_outputs(
+    paths: Iterable[Optional[str]], start: date, end: date, rows: int, schema: Optional[pa.Schema]
+) -> None:
+    """Catalog what a generate call wrote, so readers resolve the latest source without listing the folder."""
+    for path in paths:
+        if path:
+            register_artifact(
+                path, KIND_ALERTS, producer="simulate/alerts", start=start, end=end, rows=rows, schema=schema
+            )
+
+def _output_base(start: date, end: date) -> str:
+    """
+    sgx_alerts_<start>_<end>_<stamp>: microseconds plus a short random suffix, so runs finishing
+    in the same second never overwrite each other's files.
+    """
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+    return f"sgx_alerts_{start.isoformat()}_{end.isoformat()}_{stamp}-{uuid.uuid4().hex[:6]}"
+
 def _save_outputs(df: pd.DataFrame, out_dir: str, start: date, end: date) -> Tuple[str, str]:
+    """Row engine: cast the frame to the shared alerts schema, then write like the columnar engine."""
     df.columns = [c.strip().replace(" ", "_").lower() for c in df.columns]
+    table = conform_alerts(pa.Table.from_pandas(df, preserve_index=False))
+    return _save_table_outputs(table, out_dir, start, end, write_csv=True)
+
+def _save_table_outputs(
+    table: pa.Table, out_dir: str, start: date, end: date, write_csv: bool = True
+) -> Tuple[Optional[str], str]:
+    """Arrow-native `_save_outputs` for the columnar engine (no pandas round-trip)."""
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
     _ensure_dir(out_dir)
-    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-    base = f"sgx_alerts_{start.isoformat()}_{end.isoformat()}_{stamp}"
-    csv_path = os.path.join(out_dir, f"{base}.csv")
+    base = _output_base(start, end)
+    csv_path = os.path.join(out_dir, f"{base}.csv") if write_csv else None
     parquet_path = os.path.join(out_dir, f"{base}.parquet")
-    df.to_csv(csv_path, index=False)
-    df.to_parquet(parquet_path, index=False)
+    if csv_path:
+        pacsv.write_csv(table, csv_path)
+    pq.write_table(table, parquet_path)
+    _register_outputs((csv_path, parquet_path), start, end, table.num_rows, table.schema)
     return csv_path, parquet_path
 
+def _stream_table_outputs(
+    tables: Iterable[pa.Table],
+    out_dir: str,
+    start: date,
+    end: date,
+    write_csv: bool = True,
+) -> Tuple[Optional[str], str, int, List[dict]]:
+    """
+    Write day tables as they are produced: one Parquet row group per day through a single
+    ParquetWriter (plus an appending CSVWriter). Only the current day is held in memory.
+    Returns (csv_path | None, parquet_path, row_count, sample_records).
+    """
+    import pyarrow.csv as pacsv
+    import pyarrow.parquet as pq
+
+    _ensure_dir(out_dir)
+    base = _output_base(start, end)
+    csv_path = os.path.join(out_dir, f"{base}.csv") if write_csv else None
+    parquet_path = os.path.join(out_dir, f"{base}.parquet")
+
+    pq_writer: Optional[pq.ParquetWriter] = None
+    csv_writer: Optional[pacsv.CSVWriter] = None
+    count = 0
+    sample: List[dict] = []
+    try:
+        for table in tables:
+            if pq_writer is None:
+                pq_writer = pq.ParquetWriter(parquet_path, table.schema)
+                if csv_path:
+                    csv_writer = pacsv.CSVWriter(csv_path, table.schema)
+            pq_writer.write_table(table, row_group_size=max(1, table.num_rows))
+            if csv_writer is not None:
+                csv_writer.write_table(table)
+            if len(sample) < 5:
+                sample.extend(table.slice(0, 5 - len(sample)).to_pylist())
+            count += table.num_rows
+    finally:
+        if pq_writer is not None:
+            pq_writer.close()
+        if csv_writer is not None:
+            csv_writer.close()
+    if pq_writer is not None:
+        _register_outputs((csv_path, parquet_path), start, end, count, pq_writer.schema)
+    return csv_path, parquet_path, count, sample
+
 # -----------------------------
 # Endpoint
 # -----------------------------
+def _check_id_scheme(root: Path, id_scheme: str) -> None:
+    """409 when the Hive dataset at `root` holds alert_ids of the other scheme (one dataset, one ID type)."""
+    if not existing_partition_dates(root):
+        return
+    schema = open_alerts_dataset(root).schema
+    if "alert_id" not in schema.names:
+        return
+    existing = "snowflake" if pa.types.is_integer(schema.field("alert_id").type) else "random"
+    if existing != id_scheme:
+        raise HTTPException(
+            status_code=409,
+            detail=f"{root} holds id_scheme='{existing}' alert_ids; cannot write id_scheme='{id_scheme}' days into it.",
+        )
+
+
 @router.post(
     "/alerts",
     response_model=GenerateResponse,
@@ -630,55 +1118,173 @@ def generate_alerts(req: GenerateRequest = Body(...)) -> GenerateResponse:
       • 'Insider Trading' -> insider_* fields + ISIN (valid checksum) + cusip(None on SGX)
       • 'Pump and Dump'   -> pd_* two-leg fields
     Non-applicable scenarios still carry these columns as None for schema stability.
-    """
-    _rng(req.seed)
 
+    output_mode='stream' writes each generated day as its own Parquet row group, so peak memory
+    depends on one day rather than the whole range (and unlocks alerts_per_day above 20k).
+    layout='hive' writes the days into a date= / report_short_name= partitioned dataset instead.
+    append=true generates only the days no alerts source under out_dir holds yet (Hive partitions
+    or flat files), so a daily refresh costs one day whatever the range. Writing into a Hive
+    dataset whose alert_id type does not match id_scheme is rejected (409).
+
+    id_scheme='snowflake' keeps the IDs of separate runs over a day apart with a generator per run
+    (at most 256 per day, then 409). A generator is freed when the files holding its IDs are
+    deleted, when the same Hive dataset rewrites the day, or when the run fails.
+    """
     dates: List[date] = []
     d = req.start
     while d <= req.end:
         dates.append(d)
         d += timedelta(days=1)
 
-    weights = _normalize_weights(req.alert_weights)
-    all_rows: List[dict] = []
-    for day in dates:
-        all_rows.extend(_generate_rows_for_day(day, req.alerts_per_day, weights))
-
-    df = pd.DataFrame(all_rows)
-
-    # Ensure every mandatory column exists (fill if missing)
-    for col in COMMON_MANDATORY_COLS + ALL_SCENARIO_MANDATORY:
-        if col not in df.columns:
-            df[col] = None
-
-    # Stable column order
-    preferred_cols = [
-        # Alert meta
-        "alert_id", "report_short_name", "security_type", "security_name", "brokerage",
-        "alert_type_category", "alert_type_description", "comments",
-        # Event/Order/Trade
-        "exchange_id", "message_type", "date", "time", "order_id", "trade_id", "market_side",
-        "price", "total_volume", "value", "account", "account_type", "broker", "trader",
-        "order_type", "executions_instructions", "order_received_date", "order_received_time",
-        "order_code", "amend_received_datetime", "cancel_reason",
-        # Pump & Dump
-        "pd_leg", "pd_leg_index", "pd_pair_id", "pd_pump_price", "pd_dump_price",
-        # Insider (incl. identifiers)
-        "insider_mnpi_flag", "insider_relation", "insider_event_type", "insider_event_datetime",
-        "insider_pre_event_return_pct", "insider_post_event_return_pct",
-        "insider_linkage_score", "insider_suspicious_profit",
-        "isin", "cusip",
-    ]
-    cols = [c for c in preferred_cols if c in df.columns] + [c for c in df.columns if c not in preferred_cols]
-    df = df[cols]
-
-    csv_path, parquet_path = _save_outputs(df, req.out_dir, req.start, req.end)
-    sample_records = df.head(5).to_dict(orient="records")
-
+    if req.layout == "hive":
+        _check_id_scheme(hive_root(req.out_dir), req.id_scheme)
+    skipped: List[date] = []
+    if req.append:
+        # every source history reads pick up (flat files too), not only the Hive partitions
+        present = present_alert_dates(req.out_dir, req.start, req.end)
+        skipped = [d for d in dates if d in present]
+        dates = [d for d in dates if d not in present]
+
+    id_generator = 0
+    claimed = req.id_scheme == "snowflake" and bool(dates)
+    if claimed:
+        # Runs over the same day draw the same timestamps: a generator of their own keeps the IDs apart
+        try:
+            id_generator = claim_id_generator(dates, SNOWFLAKE_GENERATORS, producer="simulate/alerts")
+        except RuntimeError as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except (sqlite3.Error, OSError) as e:
+            raise HTTPException(status_code=503, detail=f"Cannot claim a snowflake generator: {e}")
+
+    try:
+        weights = _normalize_weights(req.alert_weights)
+        write_security_master(SECURITY_MASTER)
+        jobs.report_progress(0, len(dates))
+        if req.engine == "columnar":
+            day_tables = _track_days(
+                _iter_day_tables(
+                    dates, req.alerts_per_day, weights, req.seed,
+                    workers=req.workers, id_scheme=req.id_scheme, id_generator=id_generator,
+                ),
+                dates,
+            )
+            if req.layout == "hive":
+                if dates:
+                    with jobs.stage("generate_and_write"):
+                        root, count, sample_records = write_hive_dataset(day_tables, req.out_dir)
+                else:  # append with nothing missing: leave the dataset (and its mtime) alone
+                    root, count, sample_records = hive_root(req.out_dir), 0, []
+                present = sorted(existing_partition_dates(root))
+                if present:  # one artifact for the whole dataset: range and size cover every day on disk
+                    dataset = open_alerts_dataset(root)
+                    _register_outputs((str(root),), present[0], present[-1], dataset.count_rows(), dataset.schema)
+                csv_path, parquet_path = None, str(root)
+            elif req.output_mode == "stream":
+                with jobs.stage("generate_and_write"):
+                    csv_path, parquet_path, count, sample_records = _stream_table_outputs(
+                        day_tables, req.out_dir, req.start, req.end, write_csv=req.write_csv
+                    )
+            else:
+                with jobs.stage("generate"):
+                    table = pa.concat_tables(list(day_tables))
+                with jobs.stage("write"):
+                    csv_path, parquet_path = _save_table_outputs(
+                        table, req.out_dir, req.start, req.end, write_csv=req.write_csv
+                    )
+                count = table.num_rows
+                sample_records = table.slice(0, 5).to_pylist()
+        else:
+            _rng(req.seed)
+            all_rows: List[dict] = []
+            with jobs.stage("generate"):
+                for i, day in enumerate(dates, start=1):
+                    jobs.check_cancelled()
+                    all_rows.extend(_generate_rows_for_day(day, req.alerts_per_day, weights))
+                    jobs.report_progress(i, len(dates), message=f"generated {day.isoformat()}")
+                df = pd.DataFrame(all_rows)
+
+                # Ensure every mandatory column exists (fill if missing)
+                for col in COMMON_MANDATORY_COLS + ALL_SCENARIO_MANDATORY:
+                    if col not in df.columns:
+                        df[col] = None
+
+                # Stable column order
+                cols = [c for c in PREFERRED_COLS if c in df.columns] + [c for c in df.columns if c not in PREFERRED_COLS]
+                df = df[cols]
+                df["security_id"] = df["security_id"].astype(np.int32)  # same type as the columnar engine
+
+            with jobs.stage("write"):
+                csv_path, parquet_path = _save_outputs(df, req.out_dir, req.start, req.end)
+            count = len(df)
+            sample_records = df.head(5).to_dict(orient="records")
+    except BaseException:
+        if claimed:
+            release_id_generator(dates, id_generator)
+        raise
+    if claimed:
+        attach_id_generator(dates, id_generator, parquet_path)
+
+    jobs.add_outputs(csv_path=csv_path, parquet_path=parquet_path)
+    message = f"Generated SGX alerts from {req.start} to {req.end} with {req.alerts_per_day} alerts/day."
+    if req.append:
+        message = (
+            f"Appended {len(dates)} day(s) of SGX alerts between {req.start} and {req.end} "
+            f"({len(skipped)} already present) with {req.alerts_per_day} alerts/day."
+        )
+    if req.id_scheme == "snowflake" and sample_records:
+        # int64 IDs exceed JavaScript's safe integers; show the formatted view in the response
+        sample_records = format_id_columns(pa.Table.from_pylist(sample_records)).to_pylist()
     return GenerateResponse(
-        message=f"Generated SGX alerts from {req.start} to {req.end} with {req.alerts_per_day} alerts/day.",
-        count=len(df),
+        message=message,
+        count=count,
         csv_path=csv_path,
         parquet_path=parquet_path,
-        sample=sample_records
+        sample=sample_records,
+        skipped_days=skipped,
+    )
+
+
+# -----------------------------
+# Identifier checks
+# -----------------------------
+class IsinCheckResponse(BaseModel):
+    source: str
+    rows: int
+    checked: int
+    valid: int
+    invalid: int
+    invalid_examples: List[str]
+
+
+@router.get(
+    "/alerts/validate/isin",
+    response_model=IsinCheckResponse,
+    summary="Validate ISIN check digits across a simulated alerts dataset",
+)
+def validate_alerts_isins(
+    path: Optional[str] = Query(default=None, description="Parquet file or Hive dataset; defaults to the latest source."),
+) -> IsinCheckResponse:
+    """Scans only the `isin` column, batch by batch, and counts values whose Luhn check digit fails."""
+    source = Path(path) if path else find_latest_alerts_source(SIMULATED_DIR)
+    if source is None or not source.exists():
+        raise HTTPException(status_code=404, detail=f"No alerts dataset found at {path or SIMULATED_DIR}")
+    dataset = open_alerts_dataset(source)
+    if "isin" not in dataset.schema.names:
+        raise HTTPException(status_code=400, detail=f"{source} has no 'isin' column")
+
+    rows = checked = valid = 0
+    examples: List[str] = []
+    for batch in dataset.to_batches(columns=["isin"]):
+        isins = batch.column(0)
+        ok = validate_isins(isins)
+        rows += batch.num_rows
+        checked += batch.num_rows - ok.null_count
+        valid += pc.sum(ok).as_py() or 0
+        if len(examples) < 10:
+            bad = pc.filter(isins, pc.invert(pc.fill_null(ok, True)))
+            examples.extend(bad.slice(0, 10 - len(examples)).to_pylist())
+
+    return IsinCheckResponse(
+        source=str(source), rows=rows, checked=checked, valid=valid,
+        invalid=checked - valid, invalid_examples=examples,
     )
@@ -0,0 +1,360 @@
+# app/api/endpoints/simulate_stream.py
+# ---------------------------------------------------------------------------
+# Real-time SGX alert feed for load-testing the detection side.
+#
+#   GET       /simulate/alerts/stream         Server-Sent Events
+#   WEBSOCKET /simulate/alerts/stream/ws      JSON messages {"event": ..., "data": ...}
+#   GET       /simulate/alerts/stream/stats   live / recent stream statistics
+#
+# Alerts come from the columnar simulator (same vocabulary and weights as POST /simulate/alerts),
+# day by day in SGX session-time order, paced to `rate` events/sec:
+#   • a producer task generates + JSON-encodes 4k-row chunks off the event loop (Arrow kernels
+#     release the GIL) into a queue bounded by `buffer_events`, so memory never grows unbounded;
+#   • the pacer releases whatever is due every `tick_ms` as one frame batch.
+# Events released more than one tick after their slot count as `delayed`. With overflow='drop',
+# events more than `max_lag_ms` late are discarded instead (counted as `dropped`).
+# `starved_ms` is time events were due but the generator had nothing ready.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import uuid
+from collections import OrderedDict
+from contextlib import aclosing
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta, timezone
+from typing import Annotated, Any, AsyncIterator, Dict, Iterator, List, Literal, Optional, Tuple
+
+import pyarrow as pa
+from fastapi import APIRouter, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+try:
+    from app.core.arrow_json import EncodedRows, json_lines
+except ModuleNotFoundError:
+    from core.arrow_json import EncodedRows, json_lines
+
+from app.api.endpoints.simulate_data_sgx import (
+    MAX_ALERTS_PER_DAY_STREAM,
+    _iter_day_tables,
+    _normalize_weights,
+)
+
+router = APIRouter(prefix="/simulate", tags=["Real-time Alert Stream"])
+
+MAX_STREAM_RATE = 200_000
+STREAM_CHUNK_ROWS = 4_096
+KEEP_FINISHED_STREAMS = 50
+STREAM_WARMUP_S = 2.0
+
+
+# -----------------------------
+# Models
+# -----------------------------
+class StreamRequest(BaseModel):
+    rate: float = Field(default=1_000, gt=0, le=MAX_STREAM_RATE, description="Target events per second.")
+    start: date = Field(default_factory=date.today, description="First simulated trading day.")
+    days: Optional[int] = Field(default=None, ge=1, description="Days to replay; empty = keep rolling into the next day.")
+    alerts_per_day: int = Field(default=20_000, ge=1, le=MAX_ALERTS_PER_DAY_STREAM)
+    seed: Optional[int] = Field(default=None)
+    workers: int = Field(default=1, ge=1, le=16, description="Processes generating days ahead of the stream.")
+    max_events: Optional[int] = Field(default=None, ge=1, description="Stop after this many events.")
+    duration_s: Optional[float] = Field(default=None, gt=0, description="Stop after this many seconds.")
+    overflow: Literal["delay", "drop"] = Field(
+        default="delay",
+        description="'delay' sends late events anyway; 'drop' discards events more than max_lag_ms late.",
+    )
+    max_lag_ms: int = Field(default=1_000, ge=0)
+    tick_ms: int = Field(default=20, ge=1, le=1_000, description="Pacing granularity.")
+    buffer_events: int = Field(default=100_000, ge=STREAM_CHUNK_ROWS, le=2_000_000)
+    stats_every_s: float = Field(default=1.0, gt=0, description="Interval of 'stats' events.")
+
+
+@dataclass
+class StreamStats:
+    stream_id: str
+    transport: str
+    rate: float
+    overflow: str
+    status: str = "running"  # running | finished | disconnected | failed
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    streaming_at: Optional[datetime] = None  # clock start, after the buffer warm-up
+    finished_at: Optional[datetime] = None
+    emitted: int = 0
+    dropped: int = 0
+    delayed: int = 0
+    max_lag_ms: float = 0.0
+    starved_ms: float = 0.0
+    buffered: int = 0
+    buffered_high_water: int = 0
+    generated_days: int = 0
+    error: Optional[str] = None
+
+    def snapshot(self) -> Dict[str, Any]:
+        end = self.finished_at or datetime.now(timezone.utc)
+        elapsed = max((end - (self.streaming_at or end)).total_seconds(), 1e-9)
+        return {
+            "stream_id": self.stream_id,
+            "transport": self.transport,
+            "status": self.status,
+            "target_rate": self.rate,
+            "achieved_rate": round(self.emitted / elapsed, 1),
+            "elapsed_s": round(elapsed, 3),
+            "emitted": self.emitted,
+            "dropped": self.dropped,
+            "delayed": self.delayed,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "starved_ms": round(self.starved_ms, 1),
+            "buffered": self.buffered,
+            "buffered_high_water": self.buffered_high_water,
+            "generated_days": self.generated_days,
+            "overflow": self.overflow,
+            "error": self.error,
+            "started_at": self.started_at.isoformat(),
+            "streaming_at": self.streaming_at.isoformat() if self.streaming_at else None,
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+        }
+
+
+_STREAMS: "OrderedDict[str, StreamStats]" = OrderedDict()
+
+
+def _register(transport: str, req: StreamRequest) -> StreamStats:
+    stats = StreamStats(stream_id=uuid.uuid4().hex, transport=transport, rate=req.rate, overflow=req.overflow)
+    _STREAMS[stats.stream_id] = stats
+    finished = [k for k, s in _STREAMS.items() if s.status != "running"]
+    for k in finished[: max(0, len(finished) - KEEP_FINISHED_STREAMS)]:
+        _STREAMS.pop(k, None)
+    return stats
+
+
+# -----------------------------
+# Producer: generate + encode off the event loop
+# -----------------------------
+_END = object()
+
+
+def _next_day_sorted(tables: Iterator[pa.Table]) -> Optional[pa.Table]:
+    table = next(tables, None)
+    return None if table is None else table.sort_by([("ts", "ascending")])
+
+
+def _encode_rows(chunk: pa.Table, prefix: str, suffix: str) -> EncodedRows:
+    return EncodedRows(json_lines(chunk, prefix, suffix))
+
+
+def _close_quietly(tables: Iterator[pa.Table]) -> None:
+    try:
+        tables.close()
+    except ValueError:  # still running in a worker thread; it is collected when that returns
+        pass
+
+
+async def _produce(
+    req: StreamRequest, queue: asyncio.Queue, stats: StreamStats, prefix: str, suffix: str
+) -> None:
+    day_iter = range(req.days) if req.days else itertools.count()
+    days = (req.start + timedelta(days=i) for i in day_iter)
+    tables = _iter_day_tables(days, req.alerts_per_day, _normalize_weights(None), req.seed, workers=req.workers)
+    remaining = req.max_events
+    try:
+        while remaining is None or remaining > 0:
+            table = await asyncio.to_thread(_next_day_sorted, tables)
+            if table is None:
+                break
+            stats.generated_days += 1
+            for offset in range(0, table.num_rows, STREAM_CHUNK_ROWS):
+                n = STREAM_CHUNK_ROWS if remaining is None else min(STREAM_CHUNK_ROWS, remaining)
+                rows = await asyncio.to_thread(_encode_rows, table.slice(offset, n), prefix, suffix)
+                await queue.put(rows)
+                stats.buffered += len(rows)
+                stats.buffered_high_water = max(stats.buffered_high_water, stats.buffered)
+                if remaining is not None:
+                    remaining -= len(rows)
+                    if remaining <= 0:
+                        break
+        await queue.put(_END)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        await queue.put(exc)
+    finally:
+        asyncio.get_running_loop().run_in_executor(None, _close_quietly, tables)
+
+
+# -----------------------------
+# Pacer: release due events every tick
+# -----------------------------
+class _Pacer:
+    def __init__(self, req: StreamRequest, stats: StreamStats, prefix: str, suffix: str):
+        self.req = req
+        self.stats = stats
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, req.buffer_events // STREAM_CHUNK_ROWS))
+        self.prefix, self.suffix = prefix, suffix
+        self.current: Optional[EncodedRows] = None
+        self.pos = 0
+        self.exhausted = False
+
+    def _take(self, n: int, keep: bool = True) -> Tuple[List[bytes], int]:
+        """Pull up to n ready events without waiting (stops early when the buffer runs dry)."""
+        pieces: List[bytes] = []
+        got = 0
+        while got < n and not self.exhausted:
+            if self.current is None or self.pos >= len(self.current):
+                try:
+                    item = self.queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if item is _END:
+                    self.exhausted = True
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                self.current, self.pos = item, 0
+            k = min(n - got, len(self.current) - self.pos)
+            if keep:
+                pieces.append(self.current.slice_bytes(self.pos, self.pos + k))
+            self.pos += k
+            got += k
+            self.stats.buffered -= k
+        return pieces, got
+
+    async def frames(self) -> AsyncIterator[Tuple[str, Any]]:
+        """Yield ('alerts', bytes, n) batches plus ('stats', dict) / ('end', dict) events."""
+        req, stats = self.req, self.stats
+        producer = asyncio.create_task(_produce(req, self.queue, stats, self.prefix, self.suffix))
+        loop = asyncio.get_running_loop()
+        tick = req.tick_ms / 1000.0
+        max_lag = req.max_lag_ms / 1000.0
+        per_tick = max(1, int(req.rate * tick))
+        try:
+            # Let the producer fill the buffer before the clock starts, so the first
+            # seconds are not counted as delayed while the first day is generated.
+            deadline = loop.time() + STREAM_WARMUP_S
+            while not self.queue.full() and not producer.done() and loop.time() < deadline:
+                await asyncio.sleep(req.tick_ms / 1000.0)
+            t0 = loop.time()
+            stats.streaming_at = datetime.now(timezone.utc)
+            next_stats = t0 + req.stats_every_s
+            scheduled = 0  # event slots consumed so far (emitted or dropped)
+            while True:
+                now = loop.time()
+                if req.duration_s is not None and now - t0 >= req.duration_s:
+                    break
+                if now >= next_stats:
+                    yield "stats", stats.snapshot()
+                    next_stats += req.stats_every_s
+
+                due = int((now - t0) * req.rate) - scheduled
+                lag = now - t0 - scheduled / req.rate
+                if due > 0 and req.overflow == "drop" and lag > max_lag and due > per_tick:
+                    _, dropped = self._take(due - per_tick, keep=False)
+                    scheduled += dropped
+                    stats.dropped += dropped
+                    due -= dropped
+                    lag = now - t0 - scheduled / req.rate
+
+                sent = 0
+                if due > 0:
+                    pieces, sent = self._take(min(due, STREAM_CHUNK_ROWS))
+                    if sent:
+                        late = int((now - tick - t0) * req.rate) - scheduled
+                        stats.delayed += min(max(late, 0), sent)
+                        stats.max_lag_ms = max(stats.max_lag_ms, lag * 1000.0)
+                        scheduled += sent
+                        yield "alerts", b"".join(pieces), sent
+                        stats.emitted += sent
+                if self.exhausted and (self.current is None or self.pos >= len(self.current)):
+                    break
+
+                if sent < due:
+                    if sent == 0:  # nothing ready although events are due
+                        stats.starved_ms += tick * 1000.0
+                        await asyncio.sleep(tick)
+                    else:
+                        await asyncio.sleep(0)
+                else:
+                    next_slot = t0 + (scheduled + 1) / req.rate
+                    await asyncio.sleep(max(tick, next_slot - loop.time()))
+
+            stats.status = "finished"
+        except Exception as exc:
+            stats.status = "failed"
+            stats.error = f"{type(exc).__name__}: {exc}"
+        finally:
+            producer.cancel()
+            if stats.status == "running":
+                stats.status = "disconnected"
+            stats.finished_at = datetime.now(timezone.utc)
+        yield "end", stats.snapshot()
+
+
+# -----------------------------
+# Transports
+# -----------------------------
+def _json_bytes(obj: Any) -> bytes:
+    return json.dumps(obj, default=str, separators=(",", ":")).encode("utf-8")
+
+
+@router.get(
+    "/alerts/stream",
+    summary="Stream simulated SGX alerts as Server-Sent Events at a fixed rate",
+    response_class=StreamingResponse,
+)
+async def stream_alerts_sse(req: Annotated[StreamRequest, Query()]) -> StreamingResponse:
+    """
+    Every alert is one `data:` event (a JSON row with the simulator's columns), in SGX
+    session-time order. `event: stats` frames report emitted / dropped / delayed counts every
+    `stats_every_s`; the final `event: end` frame carries the totals.
+    """
+    stats = _register("sse", req)
+    pacer = _Pacer(req, stats, prefix="data: ", suffix="\n\n")
+
+    async def body() -> AsyncIterator[bytes]:
+        yield b"event: start\ndata: " + _json_bytes({"stream_id": stats.stream_id, **req.model_dump()}) + b"\n\n"
+        async with aclosing(pacer.frames()) as frames:
+            async for event in frames:
+                if event[0] == "alerts":
+                    yield event[1]
+                else:
+                    yield f"event: {event[0]}\ndata: ".encode() + _json_bytes(event[1]) + b"\n\n"
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Stream-Id": stats.stream_id},
+    )
+
+
+@router.websocket("/alerts/stream/ws")
+async def stream_alerts_ws(websocket: WebSocket, req: Annotated[StreamRequest, Query()]) -> None:
+    """
+    Same feed over a WebSocket. Messages are JSON objects:
+      {"event": "alerts", "data": [ ...alerts due in this tick... ]}
+      {"event": "stats" | "end", "data": {...}}
+    """
+    await websocket.accept()
+    stats = _register("websocket", req)
+    pacer = _Pacer(req, stats, prefix="", suffix=",")
+    try:
+        await websocket.send_text(
+            json.dumps({"event": "start", "data": {"stream_id": stats.stream_id, **req.model_dump()}}, default=str)
+        )
+        async with aclosing(pacer.frames()) as frames:
+            async for event in frames:
+                if event[0] == "alerts":
+                    await websocket.send_text('{"event":"alerts","data":[' + event[1][:-1].decode("utf-8") + "]}")
+                else:
+                    await websocket.send_text(json.dumps({"event": event[0], "data": event[1]}, default=str))
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+
+
+@router.get("/alerts/stream/stats", summary="Statistics of live and recently finished alert streams")
+def stream_stats(stream_id: Optional[str] = None) -> List[Dict[str, Any]]:
+    streams = reversed(list(_STREAMS.values()))
+    return [s.snapshot() for s in streams if stream_id is None or s.stream_id == stream_id]
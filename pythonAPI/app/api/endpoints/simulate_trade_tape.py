@@ -0,0 +1,353 @@
+# app/api/endpoints/simulate_trade_tape.py
+# ---------------------------------------------------------------------------
+# Tick-level synthetic SGX trade tape (every print, not just alerts).
+#
+#   POST /simulate/trades  ->  <out_dir>/sgx_trade_tape/date=YYYY-MM-DD/part-*.parquet
+#
+# Per day, everything is built on a (session-second x security) grid:
+#   • log-price grid:  geometric Brownian motion per security, one step per session second;
+#   • intensity grid:  U-shaped volume curve per SGX session (busy open / close) x liquidity;
+#   • episodes:        manipulation windows drawn from ALERT_BEHAVIOUR_HINTS bend the price
+#                      grid (tent / ramp / spike), raise activity and trade size (vol_mult),
+#                      and tilt the BUY/SELL mix (side_bias);
+# then per-bin Poisson trade counts are expanded with np.repeat, which yields trades already
+# in time order. Per-trade columns are plain gathers from the grids, so no Python loop runs
+# per trade. Trades inside an episode carry its scenario in `report_short_name` and an
+# `episode_id` (ground truth for the detectors); organic trades have nulls there. `timestamp` and
+# `date` use the alerts types (app/core/schema.py: timestamp[us, tz=Asia/Singapore], date32), so
+# tape and alerts filter and join on the same values.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import time as _time
+from collections import Counter
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pyarrow as pa
+from fastapi import APIRouter, Body
+from pydantic import BaseModel, Field, model_validator
+
+try:
+    from app.core.paths import SIMULATED_DIR
+    from app.core.datasets import open_tape_dataset, write_tape_dataset
+    from app.core.catalog import KIND_TRADE_TAPE, register_artifact
+    from app.core.schema import wall_clock_dates, wall_clock_timestamps_ms
+    from app.core.security_master import PRICE_BUCKETS, write_security_master
+    from app.core import jobs
+except ModuleNotFoundError:
+    from core.paths import SIMULATED_DIR
+    from core.datasets import open_tape_dataset, write_tape_dataset
+    from core.catalog import KIND_TRADE_TAPE, register_artifact
+    from core.schema import wall_clock_dates, wall_clock_timestamps_ms
+    from core.security_master import PRICE_BUCKETS, write_security_master
+    from core import jobs
+
+from app.api.endpoints.simulate_data_sgx import (
+    AFTERNOON_CLOSE,
+    AFTERNOON_OPEN,
+    ALERT_BEHAVIOUR_HINTS,
+    MORNING_CLOSE,
+    MORNING_OPEN,
+    SECURITY_MASTER,
+    SGX_TICKERS,
+    _day_seed_sequences,
+    _normalize_weights,
+)
+
+router = APIRouter(prefix="/simulate", tags=["Generate Trades Alerts like NASDAQ 'SMART'"])
+
+# -----------------------------
+# Session grid
+# -----------------------------
+def _secs(t) -> int:
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+MORNING_SECS = _secs(MORNING_CLOSE) - _secs(MORNING_OPEN)
+AFTERNOON_SECS = _secs(AFTERNOON_CLOSE) - _secs(AFTERNOON_OPEN)
+SESSION_SECS = MORNING_SECS + AFTERNOON_SECS
+TRADING_DAYS_PER_YEAR = 252
+
+MAX_TRADES_PER_DAY = 20_000_000
+LOT_SIZE = 100
+HALF_SPREAD_BPS = 2.0
+
+# Price footprint of each scenario inside its window (default: "spike").
+#   tent  – up by the jitter, then down through the start level (pump, then dump)
+#   ramp  – drift to a new level that persists after the window
+#   spike – excursion that reverts by the end of the window
+_EPISODE_SHAPES = {
+    "Pump and Dump": "tent",
+    "Ramping": "ramp",
+    "Marking the Open/Close": "ramp",
+    "Insider Trading": "ramp",
+    "Front Running / Firm Trades": "ramp",
+    "Front Running of Research": "ramp",
+}
+_EPISODE_MINUTES = {"Pump and Dump": (20, 60), "Marking the Open/Close": (5, 15)}
+_DEFAULT_EPISODE_MINUTES = (5, 30)
+
+
+class TapeRequest(BaseModel):
+    start: date = Field(default_factory=lambda: (date.today() - timedelta(days=3)))
+    end: date = Field(default_factory=date.today)
+    trades_per_day: int = Field(default=2_000_000, ge=1_000, le=MAX_TRADES_PER_DAY,
+                                description="Expected prints per day (Poisson), spread over SGX_TICKERS.")
+    episodes_per_day: int = Field(default=20, ge=0, le=500, description="Injected manipulation episodes per day.")
+    episode_weights: Optional[Dict[str, float]] = Field(
+        default=None, description="Scenario mix of the episodes (defaults to the alert weights)."
+    )
+    annual_vol: float = Field(default=0.30, gt=0, le=3.0, description="GBM volatility (annualised).")
+    out_dir: Optional[str] = Field(default=str(SIMULATED_DIR))
+    seed: Optional[int] = Field(default=None)
+
+    @model_validator(mode="after")
+    def _check_range(self) -> "TapeRequest":
+        if self.end < self.start:
+            raise ValueError("end must be on or after start")
+        return self
+
+
+class TapeResponse(BaseModel):
+    message: str
+    count: int
+    days: int
+    episodes: Dict[str, int]
+    dataset_path: str
+    generate_seconds: float
+    write_seconds: float
+    trades_per_second: float
+    sample: List[dict]
+
+
+# -----------------------------
+# Grids
+# -----------------------------
+def _session_clock() -> np.ndarray:
+    """Seconds after midnight of every session second (morning then afternoon)."""
+    return np.concatenate([
+        _secs(MORNING_OPEN) + np.arange(MORNING_SECS),
+        _secs(AFTERNOON_OPEN) + np.arange(AFTERNOON_SECS),
+    ]).astype(np.int64)
+
+def _volume_curve(tau_secs: float = 900.0, peak: float = 2.5) -> np.ndarray:
+    """U-shaped intraday activity: each session opens and closes busier than its middle."""
+    parts = []
+    for n in (MORNING_SECS, AFTERNOON_SECS):
+        t = np.arange(n, dtype=np.float64)
+        parts.append(1.0 + peak * (np.exp(-t / tau_secs) + np.exp(-(n - 1 - t) / tau_secs)))
+    curve = np.concatenate(parts)
+    return curve / curve.sum()
+
+_CLOCK = _session_clock()
+_CURVE = _volume_curve()
+_SECURITY_TYPES = sorted({t[1] for t in SGX_TICKERS})
+_SECURITY_TYPE_IDX = np.array([_SECURITY_TYPES.index(t[1]) for t in SGX_TICKERS], dtype=np.int8)
+
+
+def _security_profile(seed: Optional[int]) -> Dict[str, np.ndarray]:
+    """
+    Per-security reference price (inside the security master's price bucket), liquidity share and
+    typical lot count. Drawn from a child of the request seed that no day uses, so every day of a
+    request shares the same universe.
+    """
+    root = np.random.SeedSequence(seed)
+    rng = np.random.default_rng(np.random.SeedSequence(root.entropy, spawn_key=(0,)))
+    s = len(SGX_TICKERS)
+    bucket = SECURITY_MASTER["price_bucket"].to_numpy()
+    liquidity = rng.permutation(1.0 / np.arange(1, s + 1) ** 0.8)
+    return {
+        "ref_price": rng.uniform(PRICE_BUCKETS[bucket, 0], PRICE_BUCKETS[bucket, 1]),
+        "liquidity": liquidity / liquidity.sum(),
+        "mean_lots": rng.uniform(3.0, 30.0, size=s),
+    }
+
+
+def _tick_size(px: np.ndarray) -> np.ndarray:
+    """SGX price steps: 0.001 below S$0.20, 0.005 below S$1, 0.01 above."""
+    return np.where(px < 0.2, 0.001, np.where(px < 1.0, 0.005, 0.01))
+
+
+def _episode_shape(kind: str, n: int, amp: float) -> np.ndarray:
+    x = np.linspace(0.0, 1.0, n)
+    if kind == "tent":
+        return amp * np.where(x < 0.6, x / 0.6, 1.0 - (x - 0.6) / 0.4 * 1.2)
+    if kind == "ramp":
+        return amp * x
+    return amp * np.sin(np.pi * x)
+
+
+# -----------------------------
+# Day generator
+# -----------------------------
+def _generate_tape_for_day(
+    d: date,
+    trades_per_day: int,
+    episodes_per_day: int,
+    episode_weights: Dict[str, float],
+    annual_vol: float,
+    profile: Dict[str, np.ndarray],
+    rng: np.random.Generator,
+) -> Tuple[pa.Table, List[str]]:
+    """One day of prints in time order, plus the scenario of every injected episode."""
+    T, S = SESSION_SECS, len(SGX_TICKERS)
+
+    # --- GBM log-price grid (T x S); the day opens with an overnight gap off the reference price
+    sigma = annual_vol / np.sqrt(TRADING_DAYS_PER_YEAR * T)
+    log_open = np.log(profile["ref_price"]) + rng.normal(0.0, 0.015, size=S)
+    steps = rng.standard_normal((T, S)) * sigma - 0.5 * sigma * sigma
+    log_px = log_open + np.cumsum(steps, axis=0)
+
+    # --- Intensity (expected prints per second and security), size and side grids
+    lam = np.outer(_CURVE * trades_per_day, profile["liquidity"])
+    size_mult = np.ones((T, S), dtype=np.float32)
+    buy_prob = np.full((T, S), 0.5, dtype=np.float32)
+    episode = np.full((T, S), -1, dtype=np.int16)
+
+    names = list(episode_weights.keys())
+    probs = np.array([episode_weights[k] for k in names], dtype=float)
+    ep_kind = rng.choice(len(names), size=episodes_per_day, p=probs / probs.sum())
+    ep_sec = rng.integers(0, S, size=episodes_per_day)
+    for k in range(episodes_per_day):
+        name = names[ep_kind[k]]
+        hint = ALERT_BEHAVIOUR_HINTS.get(name, {"side_bias": None, "vol_mult": (1.5, 3.0), "price_jitter_bps": (5, 50)})
+        lo, hi = _EPISODE_MINUTES.get(name, _DEFAULT_EPISODE_MINUTES)
+        n = int(rng.integers(lo, hi + 1)) * 60
+        if name == "Marking the Open/Close":
+            t0 = 0 if rng.random() < 0.5 else T - n
+        else:
+            t0 = int(rng.integers(0, T - n))
+        t1, s = t0 + n, ep_sec[k]
+
+        shape = _EPISODE_SHAPES.get(name, "spike")
+        sign = 1.0 if (shape == "tent" or hint["side_bias"] == "BUY") else float(rng.choice([-1.0, 1.0]))
+        amp = sign * rng.uniform(*hint["price_jitter_bps"]) / 1e4
+        bend = _episode_shape(shape, n, amp)
+        log_px[t0:t1, s] += bend
+        log_px[t1:, s] += bend[-1]
+
+        # vol_mult splits evenly into more prints and bigger prints
+        mult = np.sqrt(rng.uniform(*hint["vol_mult"]))
+        lam[t0:t1, s] *= mult
+        size_mult[t0:t1, s] = mult
+        if shape == "tent":
+            split = t0 + int(0.6 * n)
+            buy_prob[t0:split, s], buy_prob[split:t1, s] = 0.8, 0.2
+        elif shape == "ramp" or hint["side_bias"]:
+            buy_prob[t0:t1, s] = 0.8 if sign > 0 else 0.2
+        episode[t0:t1, s] = k
+
+    # --- Expand bins into trades (row-major T x S, so trades come out in time order)
+    counts = rng.poisson(lam).ravel()
+    flat = np.repeat(np.arange(T * S, dtype=np.int32), counts)
+    n_trades = flat.size
+    t_idx = flat // S
+    s_idx = (flat - t_idx * S).astype(np.int8)
+
+    # Spread the prints of each second evenly over its 1000 ms (keeps the order monotone):
+    # ts = sec_ms + (i - first_i) * 1000 // c  ==  (sec_ms * c - first_i * 1000 + i * 1000) // c
+    per_sec = counts.reshape(T, S).sum(axis=1)
+    first = np.cumsum(per_sec) - per_sec
+    sec_ms = (d - date(1970, 1, 1)).days * 86_400_000 + _CLOCK * 1000
+    c = np.maximum(per_sec, 1)
+    ts = ((sec_ms * c - first * 1000)[t_idx] + np.arange(n_trades, dtype=np.int64) * 1000) // c[t_idx]
+
+    # Prices: bid / ask quotes are rounded to the SGX tick (set by the opening price) once per
+    # bin, then gathered per trade
+    buy = rng.random(n_trades) < buy_prob.ravel()[flat]
+    mid = np.exp(log_px)
+    tick = _tick_size(np.exp(log_open))
+    half_spread = HALF_SPREAD_BPS / 1e4
+    quotes = np.concatenate([mid * (1.0 - half_spread), mid * (1.0 + half_spread)])
+    quotes = np.round(np.rint(quotes / tick) * tick, 3).ravel()
+    price = quotes[flat + buy * (T * S)]
+    lot_scale = (size_mult * profile["mean_lots"].astype(np.float32)).ravel()
+    volume = (1 + (rng.standard_exponential(n_trades, dtype=np.float32) * lot_scale[flat]).astype(np.int64)) * LOT_SIZE
+
+    ep = episode.ravel()[flat]
+    outside = ep < 0
+    ep_scenario = np.append(ep_kind, 0).astype(np.int8)[ep]  # -1 hits the pad; masked below
+    ymd = d.year * 10_000 + d.month * 100 + d.day
+
+    table = pa.table({
+        "trade_id": pa.array(ymd * 1_000_000_000 + np.arange(n_trades, dtype=np.int64)),
+        "timestamp": wall_clock_timestamps_ms(ts),
+        "security_name": pa.DictionaryArray.from_arrays(s_idx, [t[0] for t in SGX_TICKERS]),
+        "security_id": pa.array(s_idx.astype(np.int32) + 1),
+        "security_type": pa.DictionaryArray.from_arrays(_SECURITY_TYPE_IDX[s_idx], _SECURITY_TYPES),
+        "market_side": pa.DictionaryArray.from_arrays(buy.view(np.int8), ["SELL", "BUY"]),
+        "price": pa.array(price),
+        "total_volume": pa.array(volume),
+        "value": pa.array(np.round(price * volume, 2)),
+        "report_short_name": pa.DictionaryArray.from_arrays(pa.array(ep_scenario, mask=outside), names),
+        "episode_id": pa.array(ymd * 1_000 + ep.astype(np.int64), mask=outside),
+        "date": wall_clock_dates(ts // 1000),
+    })
+    return table, [names[i] for i in ep_kind]
+
+
+def _iter_tape_days(
+    days: List[date], req: TapeRequest, weights: Dict[str, float], tally: Dict[str, Any]
+) -> Iterator[pa.Table]:
+    """Generate the days in order, adding generation time and episode counts to `tally`."""
+    profile = _security_profile(req.seed)
+    for i, (d, seq) in enumerate(_day_seed_sequences(req.seed, days), start=1):
+        jobs.check_cancelled()
+        t0 = _time.perf_counter()
+        table, episodes = _generate_tape_for_day(
+            d, req.trades_per_day, req.episodes_per_day, weights, req.annual_vol, profile,
+            np.random.default_rng(seq),
+        )
+        tally["generate_seconds"] += _time.perf_counter() - t0
+        tally["episodes"].update(episodes)
+        jobs.report_progress(i, len(days), message=f"generated {d.isoformat()} ({table.num_rows:,} trades)")
+        yield table
+
+
+# -----------------------------
+# Endpoint
+# -----------------------------
+@router.post(
+    "/trades",
+    response_model=TapeResponse,
+    summary="Generate a tick-level SGX trade tape (date-partitioned Parquet)",
+)
+def generate_trade_tape(req: TapeRequest = Body(...)) -> TapeResponse:
+    """
+    Synthetic prints for every SGX_TICKERS security across the date range, with injected
+    manipulation episodes. Each day is generated and written on its own, so memory depends on
+    one day. Days that already exist under the dataset are replaced.
+    """
+    days = [req.start + timedelta(days=i) for i in range((req.end - req.start).days + 1)]
+    weights = _normalize_weights(req.episode_weights)
+    tally: Dict[str, Any] = {"generate_seconds": 0.0, "episodes": Counter()}
+
+    write_security_master(SECURITY_MASTER)
+    jobs.report_progress(0, len(days))
+    t0 = _time.perf_counter()
+    with jobs.stage("generate_and_write"):
+        root, count, sample = write_tape_dataset(_iter_tape_days(days, req, weights, tally), req.out_dir)
+    total = _time.perf_counter() - t0
+    tape = open_tape_dataset(root)
+    register_artifact(
+        root, KIND_TRADE_TAPE, producer="simulate/trades", start=req.start, end=req.end,
+        rows=tape.count_rows(), schema=tape.schema,
+    )
+    jobs.add_outputs(dataset_path=str(root))
+
+    for row in sample:
+        row["timestamp"] = row["timestamp"].isoformat() if row.get("timestamp") else None
+
+    gen = tally["generate_seconds"]
+    return TapeResponse(
+        message=f"Generated SGX trade tape from {req.start} to {req.end} (~{req.trades_per_day:,} trades/day).",
+        count=count,
+        days=len(days),
+        episodes=dict(tally["episodes"].most_common()),
+        dataset_path=str(root),
+        generate_seconds=round(gen, 3),
+        write_seconds=round(total - gen, 3),
+        trades_per_second=round(count / gen, 1) if gen > 0 else 0.0,
+        sample=sample,
+    )
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
 from fastapi.responses import FileResponse
 from pathlib import Path
 from app.core.paths import TEMPLATES_DIR
@@ -6,16 +6,24 @@ from app.core.paths import TEMPLATES_DIR
 
 try:
     from app.core.paths import TEMPLATES_DIR
+    from app.core.datasets import source_fingerprint
+    from app.core import http_cache
 except ModuleNotFoundError:
     from core.paths import TEMPLATES_DIR
+    from core.datasets import source_fingerprint
+    from core import http_cache
 
 
 router = APIRouter(tags=["reports"])
 
-PDF_PATH = (TEMPLATES_DIR / "report.pdf")  
+PDF_PATH = (TEMPLATES_DIR / "report.pdf")
 
 @router.get("/reports/template", response_class=FileResponse, summary="Download the static report.pdf")
-def get_static_template_report():
+def get_static_template_report(request: Request):
     if not PDF_PATH.exists() or not PDF_PATH.is_file():
         raise HTTPException(status_code=404, detail=f"File not found: {PDF_PATH}")
-    return FileResponse(str(PDF_PATH), media_type="application/pdf", filename=PDF_PATH.name)
+    # Unchanged PDF -> 304 (If-None-Match / If-Modified-Since), so polling clients skip the download
+    validators, unchanged = http_cache.conditional(request, source_fingerprint(PDF_PATH))
+    if unchanged is not None:
+        return unchanged
+    return FileResponse(str(PDF_PATH), media_type="application/pdf", filename=PDF_PATH.name, headers=validators)
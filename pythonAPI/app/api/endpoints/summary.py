@@ -0,0 +1,244 @@
+# app/api/endpoints/summary.py
+# ---------------------------------------------------------------------------
+# Dashboard aggregates computed by DuckDB directly over the latest Parquet artifacts.
+#
+#   GET /summary/alerts       alert counts, notional value and volume       (SIMULATED_DIR)
+#   GET /summary/calibration  rows, True Positives and TP rate from decision (RESULTS_DIR)
+#   GET /summary/ml           rows and risk_band distribution               (RESULTS_ML_DIR)
+#
+# `group_by` picks dimensions (comma-separated, e.g. scenario,date); no dimension gives the
+# totals only. DuckDB scans just the columns a query touches, so a dashboard fetches a few
+# kilobytes of groups instead of row dumps. Results are cached per (source fingerprint, query);
+# a rewritten source has a new fingerprint, so stale entries are never served.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import functools
+import time
+from datetime import date
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import duckdb
+from fastapi import APIRouter, HTTPException, Query
+from pydantic import BaseModel, Field
+
+try:
+    from app.core.paths import SIMULATED_DIR, RESULTS_DIR, RESULTS_ML_DIR
+    from app.core.catalog import KIND_PUMPDUMP_CALIBRATION, KIND_PUMPDUMP_ML, latest_artifact
+    from app.core.datasets import find_latest_alerts_source, is_hive_dataset, source_fingerprint
+except ModuleNotFoundError:
+    from core.paths import SIMULATED_DIR, RESULTS_DIR, RESULTS_ML_DIR
+    from core.catalog import KIND_PUMPDUMP_CALIBRATION, KIND_PUMPDUMP_ML, latest_artifact
+    from core.datasets import find_latest_alerts_source, is_hive_dataset, source_fingerprint
+
+router = APIRouter(prefix="/summary", tags=["Summary (DuckDB)"])
+
+SUMMARY_CACHE_ENTRIES = 256
+
+# -----------------------------
+# Per-dataset dimensions and metrics (SQL over the source relation `src`)
+# -----------------------------
+# dimension name -> (source column it needs, SQL expression)
+DIMENSIONS: Dict[str, Dict[str, Tuple[str, str]]] = {
+    "alerts": {
+        "scenario": ("report_short_name", "report_short_name"),
+        "date": ("date", "CAST(date AS DATE)"),
+        "security": ("security_name", "security_name"),
+        "brokerage": ("brokerage", "brokerage"),
+        "account_type": ("account_type", "account_type"),
+        "market_side": ("market_side", "market_side"),
+    },
+    "calibration": {
+        "date": ("pump_ts", "TRY_CAST(substr(CAST(pump_ts AS VARCHAR), 1, 10) AS DATE)"),
+        "security": ("security_name", "security_name"),
+        "brokerage": ("brokerage", "brokerage"),
+        "decision": ("decision", "decision"),
+    },
+    "ml": {
+        "security": ("security_name", "security_name"),
+        "brokerage": ("brokerage", "brokerage"),
+        "risk_band": ("risk_band", "risk_band"),
+    },
+}
+
+# metric name -> (source column it needs or None, SQL aggregate)
+METRICS: Dict[str, List[Tuple[str, Optional[str], str]]] = {
+    "alerts": [
+        ("alerts", None, "count(*)"),
+        ("value_sum", "value", "sum(value)"),
+        ("volume_sum", "total_volume", "sum(total_volume)"),
+        ("securities", "security_name", "count(DISTINCT security_name)"),
+    ],
+    "calibration": [
+        ("rows", None, "count(*)"),
+        ("true_positives", "decision", "count_if(decision = 'True Positive')"),
+        ("tp_rate", "decision", "round(avg(CASE WHEN decision = 'True Positive' THEN 1.0 ELSE 0.0 END), 6)"),
+        ("avg_rubric_score", "rubric_score", "round(avg(rubric_score), 6)"),
+    ],
+    "ml": [
+        ("rows", None, "count(*)"),
+        ("high", "risk_band", "count_if(risk_band = 'High')"),
+        ("medium", "risk_band", "count_if(risk_band = 'Medium')"),
+        ("low", "risk_band", "count_if(risk_band = 'Low')"),
+        ("avg_final_ai_score", "final_ai_score", "round(avg(final_ai_score), 6)"),
+    ],
+}
+
+
+class SummaryResponse(BaseModel):
+    dataset: str
+    source: str
+    group_by: List[str]
+    metrics: List[str]
+    totals: Dict[str, Any]
+    groups: List[Dict[str, Any]] = Field(default_factory=list)
+    group_count: int = 0
+    cached: bool = False
+    elapsed_ms: float = 0.0
+
+
+# -----------------------------
+# Source resolution
+# -----------------------------
+def _latest_result(kind: str, folder: Path, pattern: str) -> Optional[Path]:
+    art = latest_artifact(kind, folder, formats=("parquet",))
+    if art is not None:
+        return art.path
+    if not folder.is_dir():
+        return None
+    files = sorted(folder.glob(pattern), key=lambda p: p.stat().st_mtime, reverse=True)
+    return files[0] if files else None
+
+
+def _resolve_source(dataset: str) -> Path:
+    if dataset == "alerts":
+        source = find_latest_alerts_source(SIMULATED_DIR) if SIMULATED_DIR.is_dir() else None
+    elif dataset == "calibration":
+        source = _latest_result(KIND_PUMPDUMP_CALIBRATION, RESULTS_DIR, "pumpdump_calibration_*.parquet")
+    else:
+        source = _latest_result(KIND_PUMPDUMP_ML, RESULTS_ML_DIR, "*.parquet")
+    if source is None:
+        raise HTTPException(status_code=404, detail=f"No {dataset} Parquet source found.")
+    return source
+
+
+# -----------------------------
+# Query
+# -----------------------------
+def _relation(con: duckdb.DuckDBPyConnection, source: str) -> duckdb.DuckDBPyRelation:
+    if is_hive_dataset(source):
+        return con.read_parquet(str(Path(source) / "**" / "*.parquet"), hive_partitioning=True)
+    return con.read_parquet(source)
+
+
+@functools.lru_cache(maxsize=SUMMARY_CACHE_ENTRIES)
+def _summarize(
+    dataset: str,
+    fingerprint: Tuple[str, int, int],
+    group_by: Tuple[str, ...],
+    start: Optional[date],
+    end: Optional[date],
+) -> Dict[str, Any]:
+    source = fingerprint[0]
+    con = duckdb.connect()
+    try:
+        con.register("src", _relation(con, source))
+        columns = {c.lower() for c in con.execute("SELECT * FROM src LIMIT 0").fetchdf().columns}
+
+        dims = DIMENSIONS[dataset]
+        missing = [g for g in group_by if dims[g][0] not in columns]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"{dataset} source has no column for: {', '.join(missing)}")
+        metrics = [(name, expr) for name, col, expr in METRICS[dataset] if col is None or col in columns]
+
+        where, params = [], []
+        if start or end:
+            if "date" not in dims or dims["date"][0] not in columns:
+                raise HTTPException(status_code=400, detail=f"{dataset} source has no date to filter on.")
+            if start:
+                where.append(f"{dims['date'][1]} >= ?")
+                params.append(start)
+            if end:
+                where.append(f"{dims['date'][1]} <= ?")
+                params.append(end)
+        where_sql = f" WHERE {' AND '.join(where)}" if where else ""
+        metric_sql = ", ".join(f"{expr} AS {name}" for name, expr in metrics)
+
+        totals_row = con.execute(f"SELECT {metric_sql} FROM src{where_sql}", params).fetchone()
+        totals = dict(zip([m for m, _ in metrics], totals_row))
+
+        groups: List[Dict[str, Any]] = []
+        if group_by:
+            dim_sql = ", ".join(f"{dims[g][1]} AS {g}" for g in group_by)
+            order_sql = ", ".join(str(i) for i in range(1, len(group_by) + 1))
+            cur = con.execute(
+                f"SELECT {dim_sql}, {metric_sql} FROM src{where_sql} GROUP BY ALL ORDER BY {order_sql}", params
+            )
+            names = [d[0] for d in cur.description]
+            groups = [dict(zip(names, row)) for row in cur.fetchall()]
+    finally:
+        con.close()
+    return {"metrics": [m for m, _ in metrics], "totals": totals, "groups": groups}
+
+
+def _parse_group_by(dataset: str, raw: Optional[str]) -> Tuple[str, ...]:
+    names = tuple(dict.fromkeys(g.strip().lower() for g in (raw or "").split(",") if g.strip()))
+    unknown = [g for g in names if g not in DIMENSIONS[dataset]]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown group_by for {dataset}: {', '.join(unknown)} (allowed: {', '.join(DIMENSIONS[dataset])})",
+        )
+    return names
+
+
+def _summary(dataset: str, group_by: Optional[str], start: Optional[date], end: Optional[date]) -> SummaryResponse:
+    dims = _parse_group_by(dataset, group_by)
+    source = _resolve_source(dataset)
+    t0 = time.perf_counter()
+    before = _summarize.cache_info().hits
+    result = _summarize(dataset, source_fingerprint(source), dims, start, end)
+    cached = _summarize.cache_info().hits > before
+    return SummaryResponse(
+        dataset=dataset,
+        source=str(source),
+        group_by=list(dims),
+        metrics=result["metrics"],
+        totals=result["totals"],
+        groups=result["groups"],
+        group_count=len(result["groups"]),
+        cached=cached,
+        elapsed_ms=round((time.perf_counter() - t0) * 1000, 3),
+    )
+
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+_GROUP_HELP = "Comma-separated dimensions: "
+
+
+@router.get("/alerts", response_model=SummaryResponse, summary="Alert counts / value / volume by scenario, day, security ...")
+def summary_alerts(
+    group_by: Optional[str] = Query(None, description=_GROUP_HELP + ", ".join(DIMENSIONS["alerts"])),
+    start: Optional[date] = Query(None),
+    end: Optional[date] = Query(None),
+) -> SummaryResponse:
+    return _summary("alerts", group_by, start, end)
+
+
+@router.get("/calibration", response_model=SummaryResponse, summary="Pump & Dump calibration TP rates from `decision`")
+def summary_calibration(
+    group_by: Optional[str] = Query(None, description=_GROUP_HELP + ", ".join(DIMENSIONS["calibration"])),
+    start: Optional[date] = Query(None, description="Filters on the pump leg's date."),
+    end: Optional[date] = Query(None),
+) -> SummaryResponse:
+    return _summary("calibration", group_by, start, end)
+
+
+@router.get("/ml", response_model=SummaryResponse, summary="Pump & Dump ML risk_band distribution")
+def summary_ml(
+    group_by: Optional[str] = Query(None, description=_GROUP_HELP + ", ".join(DIMENSIONS["ml"])),
+) -> SummaryResponse:
+    return _summary("ml", group_by, None, None)
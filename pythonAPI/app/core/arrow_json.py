@@ -0,0 +1,109 @@
+# app/core/arrow_json.py
+# ---------------------------------------------------------------------------
+# Vectorized JSON encoding of Arrow tables.
+#
+# `json_lines(table)` returns one JSON object per row as an Arrow string array, built
+# column-by-column with Arrow compute kernels (no per-row Python objects). The kernels
+# release the GIL, so encoding can run in a worker thread next to the event loop.
+# Supported column types: string, bool, integer, floating point; timestamps are written the
+# way the JSON responses (pydantic) write datetimes: ISO 8601 with a `T`, microseconds only when
+# non-zero and a `+08:00` / `Z` offset for zoned columns. Anything else is cast to string and
+# quoted (dates, times, ...). Nulls (and NaN / inf floats) become `null`.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import json
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+_NEEDS_ESCAPE = r'[\\"\x00-\x1f]'
+
+
+def _escape(values: pa.Array) -> pa.Array:
+    # Simulator vocabularies never need escaping; only pay for the rewrite when a value does.
+    if not pc.any(pc.match_substring_regex(values, _NEEDS_ESCAPE)).as_py():
+        return values
+    values = pc.replace_substring(values, "\\", "\\\\")
+    values = pc.replace_substring(values, '"', '\\"')
+    for code in range(0x20):
+        ch = chr(code)
+        values = pc.replace_substring(values, ch, json.dumps(ch)[1:-1])
+    return values
+
+
+def _iso_timestamps(col: pa.Array) -> pa.Array:
+    """Timestamps as ISO 8601 strings, e.g. 2025-01-09T13:00:20+08:00 / 2025-01-09T13:00:20.123000+08:00."""
+    tz = col.type.tz
+    col = col.cast(pa.timestamp("us", tz=tz), safe=False)  # microseconds, like Python datetimes
+    text = pc.strftime(col, "%Y-%m-%dT%H:%M:%S")  # seconds carry the six fraction digits
+    text = pc.if_else(pc.not_equal(pc.subsecond(col), 0), text, pc.utf8_slice_codeunits(text, 0, 19))
+    if tz is None:
+        return text
+    offset = pc.strftime(col, "%z")  # +0800
+    offset = pc.if_else(
+        pc.equal(offset, "+0000"),
+        pa.scalar("Z"),
+        pc.binary_join_element_wise(pc.utf8_slice_codeunits(offset, 0, 3), pc.utf8_slice_codeunits(offset, 3, 5), ":"),
+    )
+    return pc.binary_join_element_wise(text, offset, "")
+
+
+def _encode_column(col: pa.Array) -> pa.Array:
+    t = col.type
+    if pa.types.is_dictionary(t):
+        col, t = col.cast(t.value_type), t.value_type
+    if pa.types.is_floating(t):
+        values = pc.if_else(pc.is_finite(col), pc.cast(col, pa.string()), pa.scalar(None, pa.string()))
+    elif pa.types.is_boolean(t) or pa.types.is_integer(t):
+        values = pc.cast(col, pa.string())
+    elif pa.types.is_timestamp(t):
+        values = pc.binary_join_element_wise('"', _iso_timestamps(col), '"', "")
+    else:
+        if not (pa.types.is_string(t) or pa.types.is_large_string(t)):
+            col = pc.cast(col, pa.string())
+        values = pc.binary_join_element_wise('"', _escape(col), '"', "")
+    return pc.fill_null(values, "null")
+
+
+def json_lines(table: pa.Table, prefix: str = "", suffix: str = "") -> pa.Array:
+    """
+    One compact JSON object per row, each wrapped as `prefix + {...} + suffix`
+    (e.g. prefix='data: ', suffix='\\n\\n' gives Server-Sent Events frames).
+    """
+    parts: list = []
+    for i, name in enumerate(table.column_names):
+        parts.append(pa.scalar(("{" if i == 0 else ",") + json.dumps(name) + ":"))
+        parts.append(_encode_column(table.column(i).combine_chunks()))
+    parts.append(pa.scalar("}"))
+    if prefix:
+        parts.insert(0, pa.scalar(prefix))
+    if suffix:
+        parts.append(pa.scalar(suffix))
+    out = pc.binary_join_element_wise(*parts, "")
+    return out.combine_chunks() if isinstance(out, pa.ChunkedArray) else out
+
+
+class EncodedRows:
+    """
+    Encoded rows kept as one contiguous UTF-8 buffer plus offsets, so any run of
+    consecutive rows is a zero-copy slice: `rows.slice_bytes(i, j)`.
+    """
+
+    __slots__ = ("data", "offsets")
+
+    def __init__(self, encoded: pa.Array):
+        if isinstance(encoded, pa.ChunkedArray):
+            encoded = encoded.combine_chunks()
+        n = len(encoded)
+        _, offsets_buf, data_buf = encoded.buffers()
+        width = np.int64 if pa.types.is_large_string(encoded.type) else np.int32
+        self.offsets = np.frombuffer(offsets_buf, dtype=width)[encoded.offset: encoded.offset + n + 1]
+        self.data = memoryview(data_buf) if data_buf is not None else memoryview(b"")
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def slice_bytes(self, start: int, stop: int) -> bytes:
+        return bytes(self.data[self.offsets[start]: self.offsets[stop]])
@@ -0,0 +1,130 @@
+# app/core/cache.py
+# ---------------------------------------------------------------------------
+# In-memory LRU cache of Arrow tables with a byte budget.
+#
+# Entries are keyed by the caller (the read endpoints use (source fingerprint, scenario)), so a
+# rewritten file gets a new key and its stale entries simply age out. Size is `table.nbytes`;
+# the least recently used entries are evicted until the total fits the budget, and a table
+# larger than the whole budget is never stored. `fill` builds an entry from record batches and
+# stops reading as soon as it outgrows the budget; such keys are remembered as too big, so
+# callers keep serving them from their own (pushed-down) scans instead of re-materialising them.
+# `fill_later` runs that load on a small background pool, off the request that missed; a key
+# already loading is not loaded twice.
+# Cached tables are immutable and shared by concurrent readers; only the index is guarded by a lock.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Iterable, Optional, Tuple
+
+import pyarrow as pa
+
+ALERTS_CACHE_MAX_BYTES = int(os.getenv("ALERTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+OVERSIZE_KEYS_MAX = 1024  # keys remembered as larger than the budget
+CACHE_WARM_WORKERS = int(os.getenv("CACHE_WARM_WORKERS", "1"))
+
+_warm_executor = ThreadPoolExecutor(max_workers=CACHE_WARM_WORKERS, thread_name_prefix="cache-warm")
+
+
+class ArrowTableCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, pa.Table]" = OrderedDict()
+        self._oversize: "OrderedDict[Hashable, None]" = OrderedDict()
+        self._loading: set = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[pa.Table]:
+        with self._lock:
+            table = self._entries.get(key)
+            if table is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return table
+
+    def put(self, key: Hashable, table: pa.Table) -> None:
+        size = table.nbytes
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            if size > self.max_bytes:
+                return
+            self._entries[key] = table
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def fill(self, key: Hashable, batches: Iterable[pa.RecordBatch], schema: pa.Schema) -> bool:
+        """
+        Cache the table made of `batches` (True), or stop reading once they outgrow the budget,
+        remember `key` as too big and cache nothing (False).
+        """
+        kept, size = [], 0
+        for batch in batches:
+            size += batch.nbytes
+            if size > self.max_bytes:
+                with self._lock:
+                    self._oversize[key] = None
+                    while len(self._oversize) > OVERSIZE_KEYS_MAX:
+                        self._oversize.popitem(last=False)
+                return False
+            kept.append(batch)
+        self.put(key, pa.Table.from_batches(kept, schema=schema))
+        return True
+
+    def fill_later(
+        self, key: Hashable, load: Callable[[], Tuple[Iterable[pa.RecordBatch], pa.Schema]]
+    ) -> bool:
+        """
+        `fill(key, *load())` on the background pool; False (nothing scheduled) when `key` is
+        cached, known to be too big or already loading. A load that fails caches nothing.
+        """
+        with self._lock:
+            if key in self._entries or key in self._oversize or key in self._loading:
+                return False
+            self._loading.add(key)
+
+        def run() -> None:
+            try:
+                self.fill(key, *load())
+            except (pa.ArrowException, OSError):
+                pass  # e.g. the source was rewritten meanwhile: the next miss tries its new key
+            finally:
+                with self._lock:
+                    self._loading.discard(key)
+
+        _warm_executor.submit(run)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._oversize.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "oversize_keys": len(self._oversize),
+                "loading": len(self._loading),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+# Shared by every "latest alerts" reader.
+alerts_cache = ArrowTableCache(ALERTS_CACHE_MAX_BYTES)
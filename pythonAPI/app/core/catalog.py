@@ -0,0 +1,295 @@
+# app/core/catalog.py
+# ---------------------------------------------------------------------------
+# Artifact catalog: a small SQLite manifest of every file / dataset the API writes.
+#
+#   kind         alerts | trade_tape | pumpdump_calibration | pumpdump_ml
+#   format       parquet | csv | hive (a partitioned dataset directory)
+#   folder       resolved parent directory, so lookups stay scoped to the folder a reader uses
+#   start / end  ISO date range covered by the artifact (when known)
+#   rows         row count;  schema_hash: short hash of the Arrow schema
+#   producer     endpoint that wrote it;  source: input artifact it was derived from
+#
+# Writers call `register_artifact` right after a successful write. Readers ask for
+# `latest_artifact(kind, folder)`, an indexed lookup, instead of listing and stat-ing the
+# folder; a calibration output or a stray file can no longer pass for the newest input.
+# Rewriting a path (Hive datasets, appends) re-registers it as the newest entry. Entries whose
+# path has disappeared are dropped when a lookup meets them. The catalog is best effort: if
+# it cannot be written the artifact is still produced, and readers fall back to a directory
+# scan when a folder has no catalogued artifacts (files written before the catalog existed).
+#
+# The same database hands out snowflake generator IDs (app/core/identifiers.py):
+# `claim_id_generator(days)` returns the lowest generator no earlier run claimed for any of those
+# days, so IDs of separate runs over one day never collide. Unlike artifact registration this is
+# not best effort: without the catalog there is no uniqueness guarantee, so errors propagate.
+# A claim is freed again once no data carries its IDs: a run that fails releases it
+# (`release_id_generator`), a written run attaches it to its artifact (`attach_id_generator`),
+# which also releases the claims a rewrite of the same days in the same artifact replaced (Hive
+# date= partitions), and claims whose artifact was deleted are dropped by the next claim. Claims
+# without an artifact (runs still writing) are always kept.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import pyarrow as pa
+
+try:
+    from app.core.paths import DATA_DIR
+except ModuleNotFoundError:
+    from core.paths import DATA_DIR
+
+CATALOG_PATH = Path(os.getenv("ARTIFACT_CATALOG", str(DATA_DIR / "catalog.sqlite")))
+
+KIND_ALERTS = "alerts"
+KIND_TRADE_TAPE = "trade_tape"
+KIND_PUMPDUMP_CALIBRATION = "pumpdump_calibration"
+KIND_PUMPDUMP_ML = "pumpdump_ml"
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    id          INTEGER PRIMARY KEY AUTOINCREMENT,
+    path        TEXT NOT NULL UNIQUE,
+    kind        TEXT NOT NULL,
+    format      TEXT NOT NULL,
+    folder      TEXT NOT NULL,
+    start_date  TEXT,
+    end_date    TEXT,
+    rows        INTEGER,
+    schema_hash TEXT,
+    producer    TEXT,
+    source      TEXT,
+    created_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS artifacts_latest ON artifacts (kind, folder, id);
+CREATE TABLE IF NOT EXISTS id_generators (
+    day         TEXT NOT NULL,
+    generator   INTEGER NOT NULL,
+    producer    TEXT,
+    created_at  TEXT NOT NULL,
+    artifact    TEXT,
+    PRIMARY KEY (day, generator)
+);
+"""
+
+_init_lock = threading.Lock()
+_initialized: set = set()
+
+DateLike = Union[str, date, None]
+
+
+@dataclass
+class Artifact:
+    path: Path
+    kind: str
+    format: str
+    folder: str
+    start: Optional[str]
+    end: Optional[str]
+    rows: Optional[int]
+    schema_hash: Optional[str]
+    producer: Optional[str]
+    source: Optional[str]
+    created_at: str
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(CATALOG_PATH), timeout=30)
+    key = str(CATALOG_PATH)
+    if key not in _initialized:
+        with _init_lock:
+            if key not in _initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_DDL)
+                claim_cols = {row[1] for row in conn.execute("PRAGMA table_info(id_generators)")}
+                if "artifact" not in claim_cols:  # catalogs created before claims were attached
+                    conn.execute("ALTER TABLE id_generators ADD COLUMN artifact TEXT")
+                _initialized.add(key)
+    return conn
+
+
+def _folder_key(folder: Union[str, Path]) -> str:
+    return str(Path(folder).resolve())
+
+
+def _iso(d: DateLike) -> Optional[str]:
+    return d.isoformat() if isinstance(d, date) else (str(d) if d else None)
+
+
+def _format_of(path: Path) -> str:
+    return "hive" if path.is_dir() else path.suffix.lower().lstrip(".")
+
+
+def schema_hash(schema: pa.Schema) -> str:
+    """Short, stable hash of column names and types (metadata ignored)."""
+    text = schema.to_string(show_field_metadata=False, show_schema_metadata=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+def register_artifact(
+    path: Union[str, Path],
+    kind: str,
+    *,
+    producer: str,
+    start: DateLike = None,
+    end: DateLike = None,
+    rows: Optional[int] = None,
+    schema: Optional[pa.Schema] = None,
+    source: Union[str, Path, None] = None,
+) -> Optional[Artifact]:
+    """Record a freshly written artifact as the newest of its kind in its folder (None if the catalog is unavailable)."""
+    p = Path(path).resolve()
+    art = Artifact(
+        path=p, kind=kind, format=_format_of(p), folder=str(p.parent),
+        start=_iso(start), end=_iso(end), rows=rows,
+        schema_hash=schema_hash(schema) if schema is not None else None,
+        producer=producer, source=str(source) if source else None,
+        created_at=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+    )
+    try:
+        CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with closing(_connect()) as conn, conn:
+            # REPLACE deletes the old row of a rewritten path, so it gets a new (newest) id
+            conn.execute(
+                "INSERT OR REPLACE INTO artifacts (path, kind, format, folder, start_date, end_date, rows,"
+                " schema_hash, producer, source, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (str(art.path), art.kind, art.format, art.folder, art.start, art.end, art.rows,
+                 art.schema_hash, art.producer, art.source, art.created_at),
+            )
+    except (sqlite3.Error, OSError):
+        return None
+    return art
+
+
+def _row_to_artifact(row: tuple) -> Artifact:
+    path, kind, fmt, folder, start, end, rows, shash, producer, source, created = row
+    return Artifact(Path(path), kind, fmt, folder, start, end, rows, shash, producer, source, created)
+
+
+_COLUMNS = "path, kind, format, folder, start_date, end_date, rows, schema_hash, producer, source, created_at"
+
+
+def latest_artifact(
+    kind: str, folder: Union[str, Path], formats: Optional[Iterable[str]] = None
+) -> Optional[Artifact]:
+    """Newest existing artifact of `kind` registered in `folder` (optionally limited to some formats)."""
+    sql = f"SELECT id, {_COLUMNS} FROM artifacts WHERE kind = ? AND folder = ?"
+    args: list = [kind, _folder_key(folder)]
+    if formats:
+        formats = list(formats)
+        sql += f" AND format IN ({', '.join('?' * len(formats))})"
+        args += formats
+    sql += " ORDER BY id DESC LIMIT 1"
+    try:
+        with closing(_connect()) as conn, conn:
+            while True:
+                row = conn.execute(sql, args).fetchone()
+                if row is None:
+                    return None
+                art = _row_to_artifact(row[1:])
+                if art.path.exists():
+                    return art
+                conn.execute("DELETE FROM artifacts WHERE id = ?", (row[0],))  # deleted behind our back
+    except sqlite3.Error:
+        return None
+
+
+def find_artifact(path: Union[str, Path]) -> Optional[Artifact]:
+    """Catalog entry for `path`, if it was registered."""
+    try:
+        with closing(_connect()) as conn:
+            row = conn.execute(
+                f"SELECT {_COLUMNS} FROM artifacts WHERE path = ?", (str(Path(path).resolve()),)
+            ).fetchone()
+    except sqlite3.Error:
+        return None
+    return _row_to_artifact(row) if row else None
+
+
+def claim_id_generator(days: Iterable[date], capacity: int, *, producer: str) -> int:
+    """
+    Lowest generator ID in [0, capacity) not yet claimed for any of `days`, recorded as claimed
+    for all of them. Claims of those days whose artifact no longer exists are dropped first.
+    Raises RuntimeError when every ID is taken and sqlite3.Error / OSError when the catalog
+    cannot be used.
+    """
+    keys = sorted({_iso(d) for d in days})
+    if not keys:
+        return 0
+    CATALOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    created = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with closing(_connect()) as conn:
+        conn.isolation_level = None
+        conn.execute("BEGIN IMMEDIATE")  # no other run claims between the read and the insert
+        try:
+            used, gone = set(), set()
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                for g, artifact in conn.execute(
+                    f"SELECT generator, artifact FROM id_generators WHERE day IN ({', '.join('?' * len(chunk))})", chunk
+                ):
+                    if artifact is None or Path(artifact).exists():
+                        used.add(g)
+                    else:
+                        gone.add(artifact)
+            conn.executemany("DELETE FROM id_generators WHERE artifact = ?", [(a,) for a in gone])
+            generator = next((g for g in range(capacity) if g not in used), None)
+            if generator is None:
+                raise RuntimeError(f"All {capacity} ID generators are already claimed for {keys[0]}..{keys[-1]}")
+            conn.executemany(
+                "INSERT INTO id_generators (day, generator, producer, created_at) VALUES (?, ?, ?, ?)",
+                [(k, generator, producer, created) for k in keys],
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return generator
+
+
+def attach_id_generator(days: Iterable[date], generator: int, artifact: Union[str, Path]) -> None:
+    """
+    Record that `generator`'s IDs for `days` were written to `artifact`, and release the other
+    generators claimed for those days in the same artifact: the rewrite replaced their rows.
+    Best effort: an unattached claim is simply kept.
+    """
+    keys = sorted({_iso(d) for d in days})
+    path = str(Path(artifact).resolve())
+    try:
+        with closing(_connect()) as conn, conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                marks = ", ".join("?" * len(chunk))
+                conn.execute(
+                    f"DELETE FROM id_generators WHERE artifact = ? AND generator != ? AND day IN ({marks})",
+                    [path, generator, *chunk],
+                )
+                conn.execute(
+                    f"UPDATE id_generators SET artifact = ? WHERE generator = ? AND day IN ({marks})",
+                    [path, generator, *chunk],
+                )
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def release_id_generator(days: Iterable[date], generator: int) -> None:
+    """Give back the claim of a run that wrote nothing (best effort)."""
+    keys = sorted({_iso(d) for d in days})
+    try:
+        with closing(_connect()) as conn, conn:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i:i + 500]
+                conn.execute(
+                    f"DELETE FROM id_generators WHERE generator = ? AND artifact IS NULL"
+                    f" AND day IN ({', '.join('?' * len(chunk))})",
+                    [generator, *chunk],
+                )
+    except (sqlite3.Error, OSError):
+        pass
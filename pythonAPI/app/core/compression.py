@@ -0,0 +1,173 @@
+# app/core/compression.py
+# ---------------------------------------------------------------------------
+# Response compression for JSON / NDJSON bodies (ASGI middleware).
+#
+#   zstd  when the `zstandard` package is installed and the client accepts it
+#   br    when `brotli` is installed and accepted
+#   gzip  always available (zlib)
+#
+# The client's Accept-Encoding q-values decide; ties go to the order above. Only the media
+# types in COMPRESSIBLE_TYPES are touched: PDFs, Arrow IPC (binary, dictionary-encoded) and the
+# SSE stream (must not be buffered) pass through unchanged. A single-message body smaller than
+# `minimum_size` is sent as is. Streamed bodies (NDJSON) are compressed message by message and
+# flushed each time, so the client still receives rows as they are produced.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import zlib
+from typing import Callable, Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESS_MIN_BYTES = int(os.getenv("COMPRESS_MIN_BYTES", "1024"))
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson")
+
+
+class _Gzip:
+    def __init__(self):
+        self._z = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31: gzip container
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class _Brotli:
+    def __init__(self):
+        self._c = brotli.Compressor(quality=5)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._c.process(data)
+        return out + (self._c.finish() if final else self._c.flush())
+
+
+class _Zstd:
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        out = self._c.compress(data)
+        return out + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH if final else zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+
+def available_codecs() -> Dict[str, Callable[[], object]]:
+    """Content-Encoding -> compressor factory, in server preference order."""
+    codecs: Dict[str, Callable[[], object]] = {}
+    if zstandard is not None:
+        codecs["zstd"] = _Zstd
+    if brotli is not None:
+        codecs["br"] = _Brotli
+    codecs["gzip"] = _Gzip
+    return codecs
+
+
+def choose_encoding(accept_encoding: str, codecs: Dict[str, Callable[[], object]]) -> Optional[str]:
+    """Best codec the client accepts (q > 0), or None for identity."""
+    offered: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, *params = [p.strip() for p in part.split(";")]
+        if not name:
+            continue
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        offered[name.lower()] = q
+    best, best_q = None, 0.0
+    for name in codecs:  # strict '>' keeps the server's preference on equal q
+        q = offered.get(name, offered.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESS_MIN_BYTES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.codecs = available_codecs()
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""), self.codecs)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _Responder(self.app, encoding, self.codecs[encoding], self.minimum_size)(scope, receive, send)
+
+
+class _Responder:
+    def __init__(self, app: ASGIApp, encoding: str, factory: Callable[[], object], minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.factory = factory
+        self.minimum_size = minimum_size
+        self.start: Optional[Message] = None
+        self.compressor = None
+        self.passthrough = False
+        self.send: Send
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self._send)
+
+    def _eligible(self, headers: Headers) -> bool:
+        media = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (
+            self.start["status"] not in (204, 304)
+            and "content-encoding" not in headers
+            and media in COMPRESSIBLE_TYPES
+        )
+
+    async def _send(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message  # held back until the first body message decides the headers
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more = message.get("more_body", False)
+        if self.compressor is None:
+            headers = MutableHeaders(raw=self.start["headers"])
+            if not self._eligible(headers) or (not more and len(body) < self.minimum_size):
+                self.passthrough = True
+                await self.send(self.start)
+                await self.send(message)
+                return
+            self.compressor = self.factory()
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag  # the bytes differ from the identity representation
+            if more:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.compress(body, final=True)
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.start)
+                await self.send({"type": "http.response.body", "body": body, "more_body": False})
+                return
+            await self.send(self.start)
+
+        await self.send({"type": "http.response.body", "body": self.compressor.compress(body, final=not more), "more_body": more})
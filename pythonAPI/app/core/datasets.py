@@ -0,0 +1,394 @@
+# app/core/datasets.py
+# ---------------------------------------------------------------------------
+# Shared helpers for locating and opening simulated alert data.
+#
+# Two on-disk layouts live side by side under SIMULATED_DIR:
+#   • flat files:  sgx_alerts_<start>_<end>_<stamp>.parquet
+#   • Hive layout: sgx_alerts/date=YYYY-MM-DD/report_short_name=<scenario>/part-*.parquet
+# Readers open either through `open_alerts_dataset`, so date / scenario filters prune
+# Hive partitions from the directory names without opening any file.
+#
+# The tick-level trade tape (POST /simulate/trades) lives next to them:
+#   sgx_trade_tape/date=YYYY-MM-DD/part-*.parquet
+#
+# "Latest source" comes from the artifact catalog (app/core/catalog.py); the directory is
+# only listed for folders the catalog knows nothing about.
+#
+# History reads (`alerts_history_sources` / `read_alerts_history` / `open_alerts_history`)
+# treat every source in the folder as one logical dataset: sources whose date window (row-group
+# statistics / partition names) misses the requested range are never opened, and an alert_id
+# that appears in several sources is taken (all of its rows) from the newest one.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import functools
+import itertools
+import os
+import shutil
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from urllib.parse import unquote
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+try:
+    from app.core.catalog import KIND_ALERTS, latest_artifact
+    from app.core.schema import ID_COLUMNS, conform_alerts, date_range_filter, snake_name
+except ModuleNotFoundError:
+    from core.catalog import KIND_ALERTS, latest_artifact
+    from core.schema import ID_COLUMNS, conform_alerts, date_range_filter, snake_name
+
+HIVE_DATASET_DIRNAME = "sgx_alerts"
+HIVE_PARTITION_COLS = ("date", "report_short_name")
+TAPE_DATASET_DIRNAME = "sgx_trade_tape"
+
+
+def hive_partitioning() -> ds.Partitioning:
+    """
+    `date=` / `report_short_name=` directories; values are URI-encoded ('/' -> %2F).
+    `date` reads back as date32, like the column in flat files (app/core/schema.py).
+    """
+    return ds.partitioning(
+        pa.schema([("date", pa.date32()), ("report_short_name", pa.string())]),
+        flavor="hive",
+    )
+
+
+def date_partitioning() -> ds.Partitioning:
+    """Single `date=` directory level (trade tape); `date` reads back as date32, as in the alerts."""
+    return ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive")
+
+
+def hive_root(out_dir: str | Path) -> Path:
+    return Path(out_dir) / HIVE_DATASET_DIRNAME
+
+
+def tape_root(out_dir: str | Path) -> Path:
+    return Path(out_dir) / TAPE_DATASET_DIRNAME
+
+
+def is_hive_dataset(path: str | Path) -> bool:
+    return Path(path).is_dir()
+
+
+def open_alerts_dataset(path: str | Path) -> ds.Dataset:
+    """Open a flat Parquet file or a Hive-partitioned dataset directory."""
+    p = Path(path)
+    if p.is_dir():
+        return ds.dataset(str(p), format="parquet", partitioning=hive_partitioning())
+    return ds.dataset(str(p), format="parquet")
+
+
+def _date_partitions(root: Path) -> Iterable[Tuple[date, Path]]:
+    """(day, directory) of every `date=YYYY-MM-DD/` directory under `root`."""
+    for child in root.iterdir():
+        if not (child.is_dir() and child.name.startswith("date=")):
+            continue
+        try:
+            yield date.fromisoformat(unquote(child.name[len("date="):])), child
+        except ValueError:
+            continue
+
+
+def existing_partition_dates(root: str | Path) -> Set[date]:
+    """Days with at least one Parquet file under `root/date=YYYY-MM-DD/` (directory listing only)."""
+    p = Path(root)
+    if not p.is_dir():
+        return set()
+    return {d for d, child in _date_partitions(p) if next(child.rglob("*.parquet"), None) is not None}
+
+
+def partition_fingerprints(root: str | Path) -> Dict[date, Tuple[str, int, int]]:
+    """
+    day -> (partition path, newest file mtime_ns, total bytes) of every `date=` partition with
+    Parquet files. Rewriting a day (new part files) changes its entry and no other day's.
+    """
+    p = Path(root)
+    if not p.is_dir():
+        return {}
+    out: Dict[date, Tuple[str, int, int]] = {}
+    for d, child in _date_partitions(p):
+        stats = [f.stat() for f in child.rglob("*.parquet")]
+        if stats:
+            out[d] = (str(child.resolve()), max(st.st_mtime_ns for st in stats), sum(st.st_size for st in stats))
+    return out
+
+
+def list_alert_sources(folder: str | Path, suffixes: Tuple[str, ...] = (".parquet",)) -> List[Path]:
+    """Flat files with the given suffixes plus the Hive dataset (if any), newest first."""
+    p = Path(folder)
+    files = [f for f in p.iterdir() if f.is_file() and f.suffix.lower() in suffixes]
+    root = hive_root(p)
+    if root.is_dir():
+        files.append(root)
+    return sorted(files, key=lambda x: x.stat().st_mtime, reverse=True)
+
+
+def find_latest_alerts_source(folder: str | Path) -> Optional[Path]:
+    """Newest flat Parquet file or Hive dataset under `folder` (None when empty)."""
+    art = latest_artifact(KIND_ALERTS, folder, formats=("parquet", "hive"))
+    if art is not None:
+        return art.path
+    sources = list_alert_sources(folder)
+    return sources[0] if sources else None
+
+
+def _as_date(v) -> date:
+    return v if isinstance(v, date) else date.fromisoformat(str(v)[:10])
+
+
+def source_fingerprint(path: Path) -> Tuple[str, int, int]:
+    """(path, mtime_ns, size): changes whenever a file is rewritten (a Hive root is touched on every write)."""
+    st = path.stat()
+    return str(path.resolve()), st.st_mtime_ns, st.st_size
+
+
+@functools.lru_cache(maxsize=128)
+def _date_window_cached(path: str, mtime_ns: int, size: int) -> Optional[Tuple[date, date]]:
+    p = Path(path)
+    if p.is_dir():  # Hive dataset: the window is in the date= directory names
+        days = existing_partition_dates(p)
+        return (min(days), max(days)) if days else None
+
+    import pyarrow.parquet as pq
+    meta = pq.ParquetFile(p).metadata
+    if meta.num_rows == 0:
+        return None
+    col = next((j for j in range(meta.num_columns) if meta.row_group(0).column(j).path_in_schema == "date"), None)
+    if col is None:
+        raise KeyError("date")
+    lo = hi = None
+    for i in range(meta.num_row_groups):
+        stats = meta.row_group(i).column(col).statistics
+        if stats is None or not stats.has_min_max:
+            if meta.row_group(i).num_rows == 0:
+                continue
+            raise ValueError(f"row group {i} of {p} has no date statistics")
+        rg_lo, rg_hi = _as_date(stats.min), _as_date(stats.max)
+        lo = rg_lo if lo is None or rg_lo < lo else lo
+        hi = rg_hi if hi is None or rg_hi > hi else hi
+    return (lo, hi) if lo is not None else None
+
+
+def alerts_date_window(path: str | Path) -> Optional[Tuple[date, date]]:
+    """
+    (first, last) `date` of an alerts source from metadata only: row-group min/max statistics
+    of a flat file (footer read) or the date= partition names of a Hive dataset. Cached per
+    file fingerprint, so repeat calls on an unchanged source cost one stat(). None when empty;
+    raises when the source has no usable statistics (callers fall back to scanning the column).
+    """
+    return _date_window_cached(*source_fingerprint(Path(path)))
+
+
+# -----------------------------
+# History: every source in a folder as one dataset
+# -----------------------------
+DateBound = Union[str, date, None]
+
+
+def _window_overlaps(path: Path, start: DateBound, end: DateBound) -> bool:
+    try:
+        window = alerts_date_window(path)
+    except Exception:
+        return True  # no usable statistics: the source has to be scanned
+    if window is None:
+        return False
+    lo, hi = window
+    return (start is None or hi >= _as_date(start)) and (end is None or lo <= _as_date(end))
+
+
+def alerts_history_sources(folder: str | Path, start: DateBound = None, end: DateBound = None) -> List[Path]:
+    """Flat Parquet files and the Hive dataset under `folder` that hold days in [start, end], newest first."""
+    p = Path(folder)
+    if not p.is_dir():
+        return []
+    return [src for src in list_alert_sources(p) if _window_overlaps(src, start, end)]
+
+
+def present_alert_dates(folder: str | Path, start: DateBound = None, end: DateBound = None) -> Set[date]:
+    """
+    Days in [start, end] that some alerts source under `folder` already holds: Hive days from
+    the date= directory names, flat-file days from a scan of their `date` column alone (only
+    files whose date window overlaps the range are opened).
+    """
+    days: Set[date] = set()
+    for src in alerts_history_sources(folder, start, end):
+        if src.is_dir():
+            days.update(existing_partition_dates(src))
+        else:
+            table = read_alerts_source(src, start, end, columns=("date",))
+            days.update(_as_date(d) for d in pc.unique(table.column("date")).drop_null().to_pylist())
+    lo = _as_date(start) if start is not None else date.min
+    hi = _as_date(end) if end is not None else date.max
+    return {d for d in days if lo <= d <= hi}
+
+
+def _projection(schema: pa.Schema, columns: Optional[Sequence[str]]) -> Optional[List[str]]:
+    """
+    Source column names (legacy headers included) for the schema names in `columns`, plus what
+    reading needs: alert_id (de-duplication), date (window) and time (to derive a missing `ts`).
+    """
+    if columns is None:
+        return None
+    wanted = set(columns) | {"alert_id", "date"}
+    if "ts" in wanted:
+        wanted.add("time")
+    return [name for name in schema.names if snake_name(name) in wanted]
+
+
+def read_alerts_source(
+    path: str | Path,
+    start: DateBound = None,
+    end: DateBound = None,
+    scenario: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pa.Table:
+    """
+    Scan one source with the date (and scenario) predicates pushed down and, when `columns` is
+    given, only those columns read; then conform it to the shared alerts schema (legacy string
+    files are upgraded; snake_case names enforced).
+    """
+    dataset = open_alerts_dataset(path)
+    filt = date_range_filter(dataset.schema, start, end)
+    if scenario is not None and "report_short_name" in dataset.schema.names:
+        term = ds.field("report_short_name") == pa.scalar(scenario)
+        filt = term if filt is None else filt & term
+    table = dataset.to_table(columns=_projection(dataset.schema, columns), filter=filt)
+    table = conform_alerts(table.rename_columns([snake_name(c) for c in table.column_names]))
+    window = date_range_filter(table.schema, start, end)  # files with legacy (spaced) date columns
+    return table.filter(window) if window is not None else table
+
+
+def _unify_ids(tables: List[pa.Table]) -> List[pa.Table]:
+    """String and snowflake (int64) ID files cannot be concatenated as is; fall back to strings."""
+    out = tables
+    for col in ID_COLUMNS:
+        types = {t.schema.field(col).type for t in out if col in t.column_names}
+        if len(types) > 1:
+            out = [
+                t.set_column(t.column_names.index(col), col, t.column(col).cast(pa.string()))
+                if col in t.column_names else t
+                for t in out
+            ]
+    return out
+
+
+def _drop_superseded_alerts(tables: List[pa.Table]) -> List[pa.Table]:
+    """
+    `tables` newest first: rows whose alert_id already appeared in a newer table are dropped. All
+    rows of an alert (both Pump & Dump legs) come from the same, newest, source; null IDs are kept.
+    """
+    out: List[pa.Table] = []
+    seen: Optional[pa.Array] = None
+    for table in tables:
+        if "alert_id" in table.column_names and table.num_rows:
+            ids = table.column("alert_id")
+            if seen is not None:
+                table = table.filter(pc.invert(pc.is_in(ids, value_set=seen, skip_nulls=True)))
+            fresh = pc.unique(ids)
+            seen = fresh if seen is None else pa.concat_arrays([seen, fresh])
+        out.append(table)
+    return out
+
+
+def read_alerts_history(
+    sources: Iterable[str | Path],
+    start: DateBound = None,
+    end: DateBound = None,
+    scenario: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pa.Table:
+    """
+    Rows of all `sources` (newest first, e.g. from `alerts_history_sources`) in [start, end], in one
+    conformed table with duplicate alert_ids resolved in favour of the newest source. `columns`
+    projects every scan (see `read_alerts_source`).
+    """
+    tables = [read_alerts_source(src, start, end, scenario, columns) for src in sources]
+    tables = [t for t in tables if t.num_rows] or tables[:1]
+    if not tables:
+        return pa.table({})
+    if len(tables) == 1:
+        return tables[0]
+    return pa.concat_tables(_drop_superseded_alerts(_unify_ids(tables)), promote_options="permissive")
+
+
+def open_alerts_history(
+    folder: str | Path, start: DateBound = None, end: DateBound = None, scenario: Optional[str] = None
+) -> ds.Dataset:
+    """`read_alerts_history` over the folder's overlapping sources, as an in-memory dataset for filter / projection."""
+    return ds.dataset(read_alerts_history(alerts_history_sources(folder, start, end), start, end, scenario))
+
+
+def open_tape_dataset(path: str | Path) -> ds.Dataset:
+    """Open the date-partitioned trade tape (`path` is the sgx_trade_tape directory)."""
+    return ds.dataset(str(path), format="parquet", partitioning=date_partitioning())
+
+
+def write_hive_dataset(tables: Iterable[pa.Table], out_dir: str | Path) -> Tuple[Path, int, List[dict]]:
+    """
+    Write day tables into the Hive dataset under `out_dir`, one day at a time. A day being
+    written replaces that day whole (its `date=` directory, every scenario included, is removed
+    first); other days are untouched. Returns (dataset_root, row_count, sample_records).
+    """
+    return _write_partitioned(tables, hive_root(out_dir), hive_partitioning())
+
+
+def write_tape_dataset(tables: Iterable[pa.Table], out_dir: str | Path) -> Tuple[Path, int, List[dict]]:
+    """
+    Same as `write_hive_dataset`, for trade-tape day tables (partitioned by `date` only).
+    Parquet dictionary pages are kept for the dictionary columns only; on millions of distinct
+    prices / timestamps they cost time and no space.
+    """
+    tables = iter(tables)
+    first = next(tables, None)
+    if first is None:
+        return _write_partitioned([], tape_root(out_dir), date_partitioning())
+    dict_cols = [f.name for f in first.schema if pa.types.is_dictionary(f.type) and f.name != "date"]
+    options = ds.ParquetFileFormat().make_write_options(use_dictionary=dict_cols)
+    return _write_partitioned(itertools.chain([first], tables), tape_root(out_dir), date_partitioning(), options)
+
+
+def _clear_days(root: Path, table: pa.Table, cleared: Set[str]) -> None:
+    """Remove the `date=` directory of every day in `table` not already cleared by this write."""
+    if "date" not in table.column_names:
+        return
+    for day in pc.unique(table.column("date").cast(pa.string())).drop_null().to_pylist():
+        if day not in cleared:
+            shutil.rmtree(root / f"date={day}", ignore_errors=True)
+            cleared.add(day)
+
+
+def _write_partitioned(
+    tables: Iterable[pa.Table],
+    root: Path,
+    partitioning: ds.Partitioning,
+    file_options: Optional[ds.FileWriteOptions] = None,
+) -> Tuple[Path, int, List[dict]]:
+    root.mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+
+    count = 0
+    sample: List[dict] = []
+    cleared: Set[str] = set()
+    for n, table in enumerate(tables):
+        _clear_days(root, table, cleared)
+        ds.write_dataset(
+            table,
+            str(root),
+            format="parquet",
+            partitioning=partitioning,
+            basename_template=f"part-{stamp}-{n}-{{i}}.parquet",
+            existing_data_behavior="overwrite_or_ignore",
+            file_options=file_options,
+        )
+        if len(sample) < 5:
+            sample.extend(table.slice(0, 5 - len(sample)).to_pylist())
+        count += table.num_rows
+
+    # Directory mtimes only move when top-level entries change; touch the root so
+    # "latest source" lookups see rewrites of existing days too.
+    os.utime(root, None)
+    return root, count, sample
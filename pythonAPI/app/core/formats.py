@@ -0,0 +1,110 @@
+# app/core/formats.py
+# ---------------------------------------------------------------------------
+# Content negotiation for bulk reads.
+#
+#   application/json                     -> the endpoint's pydantic response (default)
+#   application/x-ndjson                 -> one JSON object per row, streamed batch by batch
+#   application/vnd.apache.arrow.stream  -> Arrow IPC stream, batches written as they come
+#
+# Both bulk formats skip Python row objects: NDJSON rows are encoded column-wise by
+# `json_lines`, Arrow batches go out as IPC messages. Response metadata (counts, paths,
+# cursors) travels in X-* headers, since the body is only rows.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+from typing import Dict, Iterable, Iterator, Optional
+
+import pyarrow as pa
+from fastapi.responses import StreamingResponse
+
+try:
+    from app.core.arrow_json import EncodedRows, json_lines
+except ModuleNotFoundError:
+    from core.arrow_json import EncodedRows, json_lines
+
+JSON_MEDIA_TYPE = "application/json"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+ARROW_STREAM_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+_FORMATS = {JSON_MEDIA_TYPE: "json", NDJSON_MEDIA_TYPE: "ndjson", ARROW_STREAM_MEDIA_TYPE: "arrow"}
+
+BULK_BATCH_ROWS = 8_192
+
+
+def negotiate(accept: Optional[str]) -> str:
+    """'json' | 'ndjson' | 'arrow' from an Accept header (highest q wins; ties keep header order)."""
+    best, best_q = "json", 0.0
+    for part in (accept or "").split(","):
+        media, *params = [p.strip() for p in part.split(";")]
+        fmt = _FORMATS.get(media.lower())
+        if fmt is None:
+            continue
+        q = 1.0
+        for p in params:
+            if p.startswith("q="):
+                try:
+                    q = float(p[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best, best_q = fmt, q
+    return best
+
+
+def _header_value(v) -> str:
+    return "" if v is None else str(v)
+
+
+def _ndjson_chunks(batches: Iterable[pa.RecordBatch]) -> Iterator[bytes]:
+    for batch in batches:
+        if batch.num_rows:
+            rows = EncodedRows(json_lines(pa.Table.from_batches([batch]), suffix="\n"))
+            yield rows.slice_bytes(0, len(rows))
+
+
+class _ByteSink:
+    """File-like sink for the IPC writer; `drain()` hands over what was written since the last call."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts: list = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _arrow_chunks(schema: pa.Schema, batches: Iterable[pa.RecordBatch]) -> Iterator[bytes]:
+    sink = _ByteSink()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in batches:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()  # schema (if no batch was written) + end-of-stream marker
+
+
+def bulk_response(
+    fmt: str,
+    schema: pa.Schema,
+    batches: Iterable[pa.RecordBatch],
+    headers: Optional[Dict[str, object]] = None,
+) -> StreamingResponse:
+    """Stream `batches` as NDJSON or an Arrow IPC stream (`fmt` from `negotiate`)."""
+    head = {k: _header_value(v) for k, v in (headers or {}).items()}
+    if fmt == "ndjson":
+        return StreamingResponse(_ndjson_chunks(batches), media_type=NDJSON_MEDIA_TYPE, headers=head)
+    if fmt == "arrow":
+        return StreamingResponse(_arrow_chunks(schema, batches), media_type=ARROW_STREAM_MEDIA_TYPE, headers=head)
+    raise ValueError(f"not a bulk format: {fmt}")
+
+
+def table_batches(table: pa.Table, max_rows: int = BULK_BATCH_ROWS) -> Iterator[pa.RecordBatch]:
+    return iter(table.to_batches(max_chunksize=max_rows))
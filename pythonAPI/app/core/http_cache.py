@@ -0,0 +1,69 @@
+# app/core/http_cache.py
+# ---------------------------------------------------------------------------
+# HTTP validators for responses derived from a file on disk.
+#
+#   ETag           W/"<hash of source fingerprint + response variant>"
+#   Last-Modified  the source's mtime
+#   Cache-Control  no-cache (clients may store the body but must revalidate on every poll)
+#
+# The fingerprint is (path, mtime_ns, size) from app/core/datasets.source_fingerprint, so a
+# rewritten source gets a new tag. The variant (query string, negotiated format, ...) keeps
+# different views of one file apart. ETags are weak: bodies can differ in volatile fields
+# (cache_hit, timings) and in Content-Encoding without the data changing.
+# An unchanged poll is answered with 304 Not Modified before any data is read.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request, Response
+
+Fingerprint = Tuple[str, int, int]
+
+
+def validators(fingerprint: Fingerprint, *variant: object) -> Dict[str, str]:
+    """ETag / Last-Modified / Cache-Control headers for a response built from `fingerprint`."""
+    text = "\x1f".join(str(p) for p in (*fingerprint, *variant))
+    tag = hashlib.sha1(text.encode("utf-8")).hexdigest()[:20]
+    return {
+        "ETag": f'W/"{tag}"',
+        "Last-Modified": formatdate(fingerprint[1] / 1e9, usegmt=True),
+        "Cache-Control": "no-cache",
+    }
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, headers: Dict[str, str]) -> bool:
+    """
+    True when the client's copy is current. If-None-Match (weak comparison) takes precedence;
+    If-Modified-Since is only consulted when the request carries no entity tags.
+    """
+    inm = request.headers.get("if-none-match")
+    if inm is not None:
+        if inm.strip() == "*":
+            return True
+        ours = _opaque(headers["ETag"])
+        return any(_opaque(t) == ours for t in inm.split(","))
+    ims = request.headers.get("if-modified-since")
+    if ims:
+        try:
+            return parsedate_to_datetime(headers["Last-Modified"]) <= parsedate_to_datetime(ims)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=304, headers=headers)
+
+
+def conditional(request: Request, fingerprint: Fingerprint, *variant: object) -> Tuple[Dict[str, str], Optional[Response]]:
+    """(validator headers, 304 response or None): the one call a handler makes before reading data."""
+    headers = validators(fingerprint, *variant)
+    return headers, (not_modified(headers) if is_not_modified(request, headers) else None)
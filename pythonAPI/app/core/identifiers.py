@@ -0,0 +1,194 @@
+# app/core/identifiers.py
+# ---------------------------------------------------------------------------
+# Batched identifier generation and validation (NumPy / Arrow, no per-row Python).
+#
+#   random_codes(rng, "ALRT", n)    -> n codes "ALRT-XXXXXXXX" as an Arrow string array
+#   random_isins(rng, n, "SG")      -> n ISINs (CC + 9-char NSIN + Luhn check digit)
+#   isin_check_digits(bases)        -> check digit of each 11-character ISIN base
+#   validate_isins(values)          -> per-value True / False (null stays null)
+#   snowflake_ids(ts_ms, node)      -> time-ordered unique int64 IDs (see layout below)
+#   snowflake_node(generator, "alert_id") -> node bits of one ID column of one generator run
+#   format_snowflake_ids(ids, "ALRT") -> "ALRT-<16 hex digits>" string view (JSON-safe for browsers)
+#
+# ISINs are handled as an (n, 12) uint8 matrix of ASCII codes. The Luhn sum runs over the
+# "letters -> two digits" expansion without materialising it: lookup tables give each ASCII
+# code's digit width and its Luhn contribution, and a running count of digits to the right
+# tells which digits are doubled.
+#
+# Snowflake layout (int64, always positive):
+#   41 bits  milliseconds since SNOWFLAKE_EPOCH_MS (2020-01-01, SGX wall clock) -> good until 2089
+#   10 bits  node: 8 bits generator (one per generation run) + 2 bits ID column (SNOWFLAKE_COLUMNS)
+#   12 bits  sequence inside the millisecond
+# IDs sort by time, so Parquet min/max statistics on an ID column prune by time range, and the
+# issue time is recoverable with `snowflake_millis`. Simulated days are re-generated with the same
+# timestamps, so two runs over one day only stay disjoint with different generators: callers claim
+# one per run and day from the artifact catalog (`claim_id_generator`, app/core/catalog.py).
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import string
+from typing import Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+CODE_ALPHABET = np.frombuffer((string.ascii_uppercase + string.digits).encode("ascii"), dtype=np.uint8)
+ISIN_LENGTH = 12
+
+_ZERO, _NINE, _A, _Z = ord("0"), ord("9"), ord("A"), ord("Z")
+
+SNOWFLAKE_EPOCH_MS = 1_577_836_800_000  # 2020-01-01T00:00:00
+_SEQ_BITS, _NODE_BITS, _COLUMN_BITS = 12, 10, 2
+SNOWFLAKE_COLUMNS = {"alert_id": 0, "order_code": 1, "order_id": 2, "trade_id": 3}
+SNOWFLAKE_GENERATORS = 1 << (_NODE_BITS - _COLUMN_BITS)  # distinct runs per day
+# Prefix of the formatted view for each ID column (pd_pair_id repeats the alert_id).
+SNOWFLAKE_PREFIXES = {"alert_id": "ALRT", "pd_pair_id": "ALRT", "order_code": "OC", "order_id": "ORD", "trade_id": "TRD"}
+_HEX = np.frombuffer(b"0123456789ABCDEF", dtype=np.uint8)
+
+
+def _strings_from_bytes(buf: np.ndarray) -> pa.Array:
+    """(n, width) uint8 ASCII matrix -> Arrow string array sharing the matrix as its data buffer."""
+    buf = np.ascontiguousarray(buf)
+    n, width = buf.shape
+    offsets = np.arange(0, (n + 1) * width, width, dtype=np.int32)
+    return pa.Array.from_buffers(pa.string(), n, [None, pa.py_buffer(offsets), pa.py_buffer(buf)])
+
+
+def random_codes(rng: np.random.Generator, prefix: str, size: int, n: int = 8) -> pa.Array:
+    """`size` codes of the form PREFIX-XXXXXXXX (uppercase letters and digits)."""
+    head = np.frombuffer(f"{prefix}-".encode("ascii"), dtype=np.uint8)
+    buf = np.empty((size, head.size + n), dtype=np.uint8)
+    buf[:, :head.size] = head
+    buf[:, head.size:] = CODE_ALPHABET[rng.integers(0, CODE_ALPHABET.size, size=(size, n))]
+    return _strings_from_bytes(buf)
+
+
+def _luhn_tables() -> tuple:
+    """Per ASCII code: digit width (1 or 2) and Luhn contribution when the last digit is / isn't doubled."""
+    width = np.ones(256, dtype=np.uint16)
+    contrib = np.zeros((2, 256), dtype=np.uint16)
+
+    def luhn(d: int, doubled: bool) -> int:
+        return (d * 2 - 9 if d * 2 > 9 else d * 2) if doubled else d
+
+    for code in range(256):
+        if _ZERO <= code <= _NINE:
+            v, letter = code - _ZERO, False
+        elif _A <= code <= _Z:
+            v, letter = code - _A + 10, True
+        else:
+            continue
+        width[code] = 2 if letter else 1
+        for doubled in (0, 1):
+            contrib[doubled, code] = luhn(v % 10, bool(doubled)) + (luhn(v // 10, not doubled) if letter else 0)
+    return width, contrib.ravel()  # contrib index: doubled * 256 + code
+
+_LUHN_WIDTH, _LUHN_CONTRIB = _luhn_tables()
+
+
+def isin_check_digits(bases: np.ndarray) -> np.ndarray:
+    """
+    Luhn check digit (0-9) for each row of an (n, 11) uint8 matrix of uppercase ASCII
+    letters / digits. Letters count as two digits (A=10 ... Z=35), as in ISO 6166; the
+    rightmost digit of the expanded base is doubled because the check digit follows it.
+    """
+    cols = np.ascontiguousarray(bases.T).astype(np.uint16)
+    total = np.zeros(cols.shape[1], dtype=np.uint16)
+    doubled = np.ones(cols.shape[1], dtype=np.uint16)  # 1 when the next digit to the left is doubled
+    for col in cols[::-1]:
+        total += _LUHN_CONTRIB.take(col + (doubled << 8))
+        doubled ^= _LUHN_WIDTH.take(col) & 1
+    return ((10 - total % 10) % 10).astype(np.uint8)
+
+
+def random_isins(rng: np.random.Generator, size: int, country: str = "SG") -> pa.Array:
+    """`size` syntactically valid ISINs: country code + random 9-char NSIN + check digit."""
+    buf = np.empty((size, ISIN_LENGTH), dtype=np.uint8)
+    buf[:, :2] = np.frombuffer(country.upper().encode("ascii"), dtype=np.uint8)
+    buf[:, 2:11] = CODE_ALPHABET[rng.integers(0, CODE_ALPHABET.size, size=(size, 9))]
+    buf[:, 11] = _ZERO + isin_check_digits(buf[:, :11])
+    return _strings_from_bytes(buf)
+
+
+def validate_isins(values: Union[pa.Array, pa.ChunkedArray]) -> pa.Array:
+    """
+    Boolean array: True where the value is a well-formed ISIN (2 letters, 9 alphanumerics,
+    1 digit) whose check digit matches; False otherwise; null where the input is null.
+    """
+    if isinstance(values, pa.ChunkedArray):
+        values = values.combine_chunks()
+    if pa.types.is_dictionary(values.type):
+        values = values.dictionary_decode()
+    values = values.cast(pa.string())
+    n = len(values)
+    upper = pc.utf8_upper(values)
+    shaped = pc.fill_null(pc.match_substring_regex(upper, r"^[A-Z]{2}[A-Z0-9]{9}[0-9]$"), False)
+    shaped_np = shaped.to_numpy(zero_copy_only=False)
+
+    ok = np.zeros(n, dtype=bool)
+    idx = np.flatnonzero(shaped_np)
+    if idx.size:
+        picked = pc.take(upper, pa.array(idx))
+        raw = np.frombuffer(picked.buffers()[2], dtype=np.uint8)
+        start = np.frombuffer(picked.buffers()[1], dtype=np.int32)[picked.offset]
+        buf = raw[start: start + idx.size * ISIN_LENGTH].reshape(idx.size, ISIN_LENGTH)
+        ok[idx] = isin_check_digits(buf[:, :11]) == buf[:, 11] - _ZERO
+    return pa.array(ok, mask=np.asarray(values.is_null().to_numpy(zero_copy_only=False)))
+
+
+def snowflake_ids(ts_ms: np.ndarray, node: int = 0) -> np.ndarray:
+    """
+    One unique int64 ID per timestamp (epoch milliseconds). Events sharing a millisecond get
+    consecutive sequence numbers; past 4096 in one millisecond the overflow borrows the next
+    millisecond(s), as a real snowflake generator would wait for the clock. Output follows the
+    input order; sorting the IDs sorts the events by time.
+    """
+    ts_ms = np.asarray(ts_ms, dtype=np.int64)
+    if not 0 <= node < (1 << _NODE_BITS):
+        raise ValueError(f"node must be in [0, {1 << _NODE_BITS})")
+    order = np.argsort(ts_ms, kind="stable")
+    slot = (ts_ms[order] - SNOWFLAKE_EPOCH_MS) << _SEQ_BITS
+    step = np.arange(slot.size, dtype=np.int64)
+    slot = np.maximum.accumulate(slot - step) + step  # strictly increasing, never earlier than asked
+    ids = np.empty_like(slot)
+    ids[order] = ((slot >> _SEQ_BITS) << (_SEQ_BITS + _NODE_BITS)) | (node << _SEQ_BITS) | (slot & ((1 << _SEQ_BITS) - 1))
+    return ids
+
+
+def snowflake_node(generator: int, column: str) -> int:
+    """Node bits of the IDs `generator` issues for `column` (a SNOWFLAKE_COLUMNS key)."""
+    if not 0 <= generator < SNOWFLAKE_GENERATORS:
+        raise ValueError(f"generator must be in [0, {SNOWFLAKE_GENERATORS})")
+    return (generator << _COLUMN_BITS) | SNOWFLAKE_COLUMNS[column]
+
+
+def snowflake_millis(ids: np.ndarray) -> np.ndarray:
+    """Epoch milliseconds encoded in snowflake IDs (inverse of the time part of `snowflake_ids`)."""
+    return (np.asarray(ids, dtype=np.int64) >> (_SEQ_BITS + _NODE_BITS)) + SNOWFLAKE_EPOCH_MS
+
+
+def format_snowflake_ids(ids: Union[pa.Array, pa.ChunkedArray], prefix: str) -> pa.Array:
+    """
+    String view PREFIX-<16 upper-case hex digits>. Fixed width, so the strings sort like the
+    integers; unlike int64 JSON numbers they survive JavaScript clients (2^53 limit).
+    """
+    if isinstance(ids, pa.ChunkedArray):
+        ids = ids.combine_chunks()
+    values = ids.fill_null(0).to_numpy().astype(np.uint64)
+    head = np.frombuffer(f"{prefix}-".encode("ascii"), dtype=np.uint8)
+    buf = np.empty((len(values), head.size + 16), dtype=np.uint8)
+    buf[:, :head.size] = head
+    shifts = np.arange(60, -4, -4, dtype=np.uint64)
+    buf[:, head.size:] = _HEX[((values[:, None] >> shifts) & np.uint64(0xF)).astype(np.intp)]
+    out = _strings_from_bytes(buf)
+    return pc.if_else(ids.is_valid(), out, pa.scalar(None, pa.string())) if ids.null_count else out
+
+
+def format_id_columns(table: pa.Table) -> pa.Table:
+    """Replace integer snowflake ID columns of an alerts table with their formatted string view."""
+    for name, prefix in SNOWFLAKE_PREFIXES.items():
+        i = table.schema.get_field_index(name)
+        if i >= 0 and pa.types.is_integer(table.schema.field(i).type):
+            table = table.set_column(i, name, format_snowflake_ids(table.column(i), prefix))
+    return table
@@ -0,0 +1,202 @@
+# app/core/jobs.py
+# ---------------------------------------------------------------------------
+# In-process background jobs for long-running endpoints (simulation, calibration, ML).
+#
+# - Jobs run on a bounded ThreadPoolExecutor; submissions beyond JOBS_MAX_PENDING are refused.
+# - Work functions stay plain functions: they call `stage()`, `report_progress()`,
+#   `check_cancelled()` and `add_outputs()`, which are no-ops outside a job, so the same code
+#   serves the synchronous endpoints unchanged.
+# - Cancellation is cooperative: `check_cancelled()` raises JobCancelled inside the job.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+JOBS_MAX_WORKERS = int(os.getenv("JOBS_MAX_WORKERS", "2"))
+JOBS_MAX_PENDING = int(os.getenv("JOBS_MAX_PENDING", "16"))
+JOBS_KEEP_FINISHED = int(os.getenv("JOBS_KEEP_FINISHED", "200"))
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class JobCancelled(Exception):
+    """Raised inside a job once cancellation has been requested."""
+
+
+class JobQueueFull(Exception):
+    """Raised by `submit` when JOBS_MAX_PENDING jobs are already queued or running."""
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: str = "queued"  # queued | running | succeeded | failed | cancelled
+    created_at: datetime = field(default_factory=_now)
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    done: int = 0
+    total: int = 0
+    message: Optional[str] = None
+    stage: Optional[str] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    outputs: Dict[str, Any] = field(default_factory=dict)
+    result: Any = None
+    error: Optional[str] = None
+    cancel_event: threading.Event = field(default_factory=threading.Event, repr=False)
+    future: Optional[Future] = field(default=None, repr=False)
+
+    @property
+    def progress(self) -> float:
+        if self.status == "succeeded":
+            return 1.0
+        return round(self.done / self.total, 4) if self.total else 0.0
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "progress": self.progress,
+            "done": self.done,
+            "total": self.total,
+            "message": self.message,
+            "stage": self.stage,
+            "stages": [dict(s) for s in self.stages],
+            "outputs": dict(self.outputs),
+            "error": self.error,
+            "cancel_requested": self.cancel_event.is_set(),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+_current_job: contextvars.ContextVar[Optional[Job]] = contextvars.ContextVar("current_job", default=None)
+_executor = ThreadPoolExecutor(max_workers=JOBS_MAX_WORKERS, thread_name_prefix="job")
+_jobs: "OrderedDict[str, Job]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def _prune_locked() -> None:
+    finished = [j.id for j in _jobs.values() if j.status not in ACTIVE_STATES]
+    for job_id in finished[: max(0, len(finished) - JOBS_KEEP_FINISHED)]:
+        _jobs.pop(job_id, None)
+
+
+def _run(job: Job, fn: Callable[..., Any], args: tuple, kwargs: dict) -> None:
+    token = _current_job.set(job)
+    try:
+        if job.cancel_event.is_set():
+            raise JobCancelled()
+        job.status = "running"
+        job.started_at = _now()
+        result = fn(*args, **kwargs)
+        job.result = result.model_dump() if hasattr(result, "model_dump") else result
+        job.status = "succeeded"
+    except JobCancelled:
+        job.status = "cancelled"
+    except Exception as exc:  # surfaced through GET /jobs/{id}
+        detail = getattr(exc, "detail", None)
+        job.error = str(detail) if detail is not None else f"{type(exc).__name__}: {exc}"
+        job.status = "failed"
+    finally:
+        job.stage = None
+        job.finished_at = _now()
+        _current_job.reset(token)
+
+
+def submit(kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Job:
+    """Queue `fn(*args, **kwargs)` on the job executor and return its Job straight away."""
+    with _lock:
+        active = sum(1 for j in _jobs.values() if j.status in ACTIVE_STATES)
+        if active >= JOBS_MAX_PENDING:
+            raise JobQueueFull(f"{active} jobs already queued or running (limit {JOBS_MAX_PENDING}).")
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+        _jobs[job.id] = job
+        _prune_locked()
+    job.future = _executor.submit(_run, job, fn, args, kwargs)
+    return job
+
+
+def get(job_id: str) -> Optional[Job]:
+    with _lock:
+        return _jobs.get(job_id)
+
+
+def list_jobs() -> List[Job]:
+    with _lock:
+        return list(reversed(_jobs.values()))
+
+
+def cancel(job_id: str) -> Optional[Job]:
+    """Request cancellation: queued jobs never start; running jobs stop at their next checkpoint."""
+    job = get(job_id)
+    if job is None:
+        return None
+    if job.status in ACTIVE_STATES:
+        job.cancel_event.set()
+        if job.future is not None and job.future.cancel():
+            job.status = "cancelled"
+            job.finished_at = _now()
+    return job
+
+
+# ---------------------------------------------------------------------------
+# Instrumentation used by work functions (no-ops outside a job)
+# ---------------------------------------------------------------------------
+def current_job() -> Optional[Job]:
+    return _current_job.get()
+
+
+def check_cancelled() -> None:
+    job = _current_job.get()
+    if job is not None and job.cancel_event.is_set():
+        raise JobCancelled()
+
+
+def report_progress(done: int, total: int, message: Optional[str] = None) -> None:
+    job = _current_job.get()
+    if job is None:
+        return
+    job.done, job.total = int(done), int(total)
+    if message is not None:
+        job.message = message
+
+
+def add_outputs(**outputs: Any) -> None:
+    job = _current_job.get()
+    if job is not None:
+        job.outputs.update({k: v for k, v in outputs.items() if v is not None})
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a named stage of the current job (checks for cancellation on entry)."""
+    job = _current_job.get()
+    if job is None:
+        yield
+        return
+    check_cancelled()
+    entry: Dict[str, Any] = {"name": name, "started_at": _now(), "seconds": None}
+    job.stages.append(entry)
+    job.stage = name
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        entry["seconds"] = round(time.perf_counter() - t0, 4)
@@ -9,7 +9,8 @@ SIMULATED_DIR = DATA_DIR / "simulated"
 RESULTS_DIR = DATA_DIR / "results"
 RESULTS_ML_DIR = RESULTS_DIR / "ML"
 TEMPLATES_DIR = DATA_DIR / "templates"
+REFERENCE_DIR = DATA_DIR / "reference"
 
 def ensure_data_tree() -> None:
-    for p in (SIMULATED_DIR, RESULTS_DIR, RESULTS_ML_DIR, TEMPLATES_DIR):
+    for p in (SIMULATED_DIR, RESULTS_DIR, RESULTS_ML_DIR, TEMPLATES_DIR, REFERENCE_DIR):
         p.mkdir(parents=True, exist_ok=True)
@@ -0,0 +1,214 @@
+# app/core/schema.py
+# ---------------------------------------------------------------------------
+# Shared Arrow schema for simulated alert datasets.
+#
+#   • timestamps:   timestamp[us, tz=Asia/Singapore]  (ts, amend_received_datetime, insider_event_datetime)
+#   • dates / times: date32 / time32[s]               (date, time, order_received_date / _time)
+#   • vocabularies: dictionary<int16, string>         (report_short_name, brokerage, broker, trader, ...)
+#   • numerics:     float64 prices / values, int64 volumes, int32 security_id, int8 pd_leg_index
+#
+# `ts` is the alert's event time (date + time in one column), so readers filter and sort on a
+# real timestamp instead of concatenating strings. ID columns are strings, or int64 with the
+# snowflake ID scheme. Files written before this schema (ISO strings everywhere) are upgraded
+# on read with `conform_alerts`, and `date_range_filter` builds a date predicate that matches
+# whichever type the source stores, so it still pushes down on old and new files alike.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+from datetime import date
+from typing import Optional, Union
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+
+ALERT_TZ = "Asia/Singapore"
+ALERT_TZ_OFFSET_S = 8 * 3600  # SGX wall clock is UTC+08 all year (no DST)
+TS_TYPE = pa.timestamp("us", tz=ALERT_TZ)
+DICT_TYPE = pa.dictionary(pa.int16(), pa.string())
+
+ID_COLUMNS = ("alert_id", "order_id", "trade_id", "order_code", "pd_pair_id")
+
+
+def alerts_schema(id_type: pa.DataType = pa.string()) -> pa.Schema:
+    """Alert table schema (column order = PREFERRED_COLS); `id_type` is pa.int64() for snowflake IDs."""
+    return pa.schema([
+        # Alert meta
+        ("alert_id", id_type),
+        ("report_short_name", DICT_TYPE),
+        ("security_type", DICT_TYPE),
+        ("security_name", DICT_TYPE),
+        ("security_id", pa.int32()),
+        ("brokerage", DICT_TYPE),
+        ("alert_type_category", DICT_TYPE),
+        ("alert_type_description", DICT_TYPE),
+        ("comments", DICT_TYPE),
+        # Event / order / trade
+        ("exchange_id", DICT_TYPE),
+        ("message_type", DICT_TYPE),
+        ("date", pa.date32()),
+        ("time", pa.time32("s")),
+        ("ts", TS_TYPE),
+        ("order_id", id_type),
+        ("trade_id", id_type),
+        ("market_side", DICT_TYPE),
+        ("price", pa.float64()),
+        ("total_volume", pa.int64()),
+        ("value", pa.float64()),
+        ("account", pa.string()),
+        ("account_type", DICT_TYPE),
+        ("broker", DICT_TYPE),
+        ("trader", DICT_TYPE),
+        ("order_type", DICT_TYPE),
+        ("executions_instructions", DICT_TYPE),
+        ("order_received_date", pa.date32()),
+        ("order_received_time", pa.time32("s")),
+        ("order_code", id_type),
+        ("amend_received_datetime", TS_TYPE),
+        ("cancel_reason", DICT_TYPE),
+        # Pump & Dump
+        ("pd_leg", DICT_TYPE),
+        ("pd_leg_index", pa.int8()),
+        ("pd_pair_id", id_type),
+        ("pd_pump_price", pa.float64()),
+        ("pd_dump_price", pa.float64()),
+        # Insider Trading
+        ("insider_mnpi_flag", pa.bool_()),
+        ("insider_relation", DICT_TYPE),
+        ("insider_event_type", DICT_TYPE),
+        ("insider_event_datetime", TS_TYPE),
+        ("insider_pre_event_return_pct", pa.float64()),
+        ("insider_post_event_return_pct", pa.float64()),
+        ("insider_linkage_score", pa.float64()),
+        ("insider_suspicious_profit", pa.float64()),
+        ("isin", DICT_TYPE),
+        ("cusip", pa.string()),
+    ])
+
+
+ALERTS_SCHEMA = alerts_schema()
+
+
+# -----------------------------
+# Builders (simulator side)
+# -----------------------------
+def wall_clock_timestamps(secs: np.ndarray, valid: Optional[np.ndarray] = None) -> pa.Array:
+    """Epoch seconds of SGX wall-clock times -> TS_TYPE (stored as UTC, displayed in Asia/Singapore)."""
+    us = (np.asarray(secs, dtype=np.int64) - ALERT_TZ_OFFSET_S) * 1_000_000
+    return pa.array(us, type=TS_TYPE, mask=None if valid is None else ~valid)
+
+
+def wall_clock_timestamps_ms(ms: np.ndarray, valid: Optional[np.ndarray] = None) -> pa.Array:
+    """`wall_clock_timestamps` for epoch milliseconds of SGX wall-clock times (trade tape prints)."""
+    us = (np.asarray(ms, dtype=np.int64) - ALERT_TZ_OFFSET_S * 1000) * 1000
+    return pa.array(us, type=TS_TYPE, mask=None if valid is None else ~valid)
+
+
+def wall_clock_dates(secs: np.ndarray) -> pa.Array:
+    return pa.array((np.asarray(secs, dtype=np.int64) // 86_400).astype(np.int32), type=pa.date32())
+
+
+def wall_clock_times(secs: np.ndarray) -> pa.Array:
+    return pa.array((np.asarray(secs, dtype=np.int64) % 86_400).astype(np.int32), type=pa.time32("s"))
+
+
+def dictionary_column(vocab: list, idx: np.ndarray, valid: Optional[np.ndarray] = None) -> pa.DictionaryArray:
+    """
+    Integer codes into `vocab` as a DICT_TYPE column; rows where `valid` is False become null.
+    Repeated vocabulary entries are merged, so each value appears once in the dictionary.
+    """
+    values, remap = np.unique(np.asarray(vocab, dtype=object), return_inverse=True)
+    indices = pa.array(remap.astype(np.int16)[np.asarray(idx)], mask=None if valid is None else ~valid)
+    return pa.DictionaryArray.from_arrays(indices, pa.array(values, type=pa.string()))
+
+
+# -----------------------------
+# Conforming (reader / legacy side)
+# -----------------------------
+def _parse_ts(col: pa.Array) -> pa.Array:
+    if pa.types.is_timestamp(col.type):
+        if col.type.tz is None:
+            return pc.assume_timezone(col.cast(pa.timestamp("us")), ALERT_TZ)
+        return col.cast(TS_TYPE)
+    text = pc.utf8_slice_codeunits(col.cast(pa.string()), 0, 19)  # drop fractional seconds / offsets
+    text = pc.replace_substring(text, "T", " ")
+    naive = pc.strptime(text, format="%Y-%m-%d %H:%M:%S", unit="us", error_is_null=True)
+    return pc.assume_timezone(naive, ALERT_TZ)
+
+
+def _parse_time(col: pa.Array) -> pa.Array:
+    if pa.types.is_time(col.type):
+        return col.cast(pa.time32("s"))
+    text = pc.binary_join_element_wise("1970-01-01 ", pc.utf8_slice_codeunits(col.cast(pa.string()), 0, 8), "")
+    return pc.strptime(text, format="%Y-%m-%d %H:%M:%S", unit="s", error_is_null=True).cast(pa.time32("s"))
+
+
+def _conform_column(col: pa.Array, target: pa.DataType) -> pa.Array:
+    if col.type == target:
+        return col
+    if target == TS_TYPE:
+        return _parse_ts(col)
+    if pa.types.is_time(target):
+        return _parse_time(col)
+    if pa.types.is_dictionary(target):
+        if not pa.types.is_dictionary(col.type):
+            col = col.cast(pa.string()).dictionary_encode()
+        return col.cast(target)
+    return col.cast(target)
+
+
+def _event_ts(date_col: pa.Array, time_col: pa.Array) -> pa.Array:
+    """date32 + time32[s] (SGX wall clock) -> TS_TYPE, null where either part is null."""
+    secs = pc.add(pc.multiply(date_col.cast(pa.int32()).cast(pa.int64()), 86_400), time_col.cast(pa.int32()))
+    return pc.multiply(pc.subtract(secs, ALERT_TZ_OFFSET_S), 1_000_000).cast(pa.timestamp("us")).cast(TS_TYPE)
+
+
+def snake_name(c: str) -> str:
+    """Legacy header -> schema name ("Report Short Name" -> report_short_name, "Buy/Sell" -> buy_sell)."""
+    c = c.strip().lower()
+    for ch in ["&", "/", "-", "(", ")", "."]:
+        c = c.replace(ch, " ")
+    return "_".join(c.split())
+
+
+def conform_alerts(table: pa.Table) -> pa.Table:
+    """
+    Cast any alerts table (legacy ISO-string files, pandas output) to ALERTS_SCHEMA types for the
+    columns it has, add `ts` from date + time when missing, and order columns like the schema
+    (unknown columns go last). ID columns keep their type; already conforming tables pass through.
+    """
+    cols = {}
+    for name in table.column_names:
+        col = table.column(name).combine_chunks()
+        i = ALERTS_SCHEMA.get_field_index(name)
+        if i >= 0 and name not in ID_COLUMNS:
+            col = _conform_column(col, ALERTS_SCHEMA.field(i).type)
+        cols[name] = col
+    if "ts" not in cols and "date" in cols and "time" in cols:
+        cols["ts"] = _event_ts(cols["date"], cols["time"])
+    order = [n for n in ALERTS_SCHEMA.names if n in cols] + [n for n in cols if n not in ALERTS_SCHEMA.names]
+    return pa.table({n: cols[n] for n in order})
+
+
+def date_range_filter(
+    schema: pa.Schema, start: Union[str, date, None], end: Union[str, date, None], column: str = "date"
+) -> Optional[ds.Expression]:
+    """
+    `start <= column <= end` with scalars of the column's own type (date32 in current files,
+    ISO strings in older ones), so the predicate pushes down to partitions and row groups.
+    None when the column is missing or no bound is given.
+    """
+    i = schema.get_field_index(column)
+    if i < 0 or (start is None and end is None):
+        return None
+    typ = schema.field(i).type
+    expr = None
+    for bound, op in ((start, "ge"), (end, "le")):
+        if bound is None:
+            continue
+        value = date.fromisoformat(bound) if isinstance(bound, str) else bound
+        scalar = pa.scalar(value, type=typ) if pa.types.is_date(typ) else pa.scalar(value.isoformat(), type=pa.string())
+        term = ds.field(column) >= scalar if op == "ge" else ds.field(column) <= scalar
+        expr = term if expr is None else expr & term
+    return expr
@@ -0,0 +1,95 @@
+# app/core/security_master.py
+# ---------------------------------------------------------------------------
+# Security master: one reference row per simulated instrument.
+#
+#   security_id    int32   1-based position in the ticker list (stable while the list is append-only)
+#   security_name  string
+#   security_type  string  EQUITY / REIT / ...
+#   isin           string  stable ISIN, derived from the name (same value in every run)
+#   price_bucket   int8    index into PRICE_BUCKETS (reference price range of the instrument)
+#   price_low/high float64 bucket bounds
+#
+# The simulators emit `security_id` on every row, so readers can group and join on a small
+# integer instead of the long `security_name` strings. The table is persisted as
+# REFERENCE_DIR/security_master.parquet (outside SIMULATED_DIR, so it is never mistaken for
+# an alerts source) and readers load it back with `load_security_master`.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import zlib
+from pathlib import Path
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+try:
+    from app.core.paths import REFERENCE_DIR
+    from app.core.identifiers import random_isins
+except ModuleNotFoundError:
+    from core.paths import REFERENCE_DIR
+    from core.identifiers import random_isins
+
+SECURITY_MASTER_FILENAME = "security_master.parquet"
+
+# Reference price ranges (S$); an instrument's bucket comes from its name.
+PRICE_BUCKETS = np.array([(0.80, 3.00), (3.00, 8.00), (8.00, 20.0), (20.0, 40.0), (40.0, 90.0)])
+
+SECURITY_MASTER_SCHEMA = pa.schema([
+    ("security_id", pa.int32()),
+    ("security_name", pa.string()),
+    ("security_type", pa.string()),
+    ("isin", pa.string()),
+    ("price_bucket", pa.int8()),
+    ("price_low", pa.float64()),
+    ("price_high", pa.float64()),
+])
+
+
+def price_bucket(security_name: str) -> int:
+    """Index into PRICE_BUCKETS (the rule the row-wise simulator has always used)."""
+    return sum(ord(c) for c in security_name) % len(PRICE_BUCKETS)
+
+
+def stable_isin(security_name: str, country: str = "SG") -> str:
+    """Valid ISIN seeded from the name's CRC32, so an instrument keeps its ISIN across runs."""
+    rng = np.random.default_rng(zlib.crc32(security_name.encode("utf-8")))
+    return random_isins(rng, 1, country)[0].as_py()
+
+
+def build_security_master(tickers: Sequence[Tuple[str, str]], country: str = "SG") -> pa.Table:
+    """Master table for `(security_name, security_type)` pairs; ids follow list order."""
+    names = [name for name, _ in tickers]
+    buckets = np.array([price_bucket(name) for name in names], dtype=np.int8)
+    return pa.table({
+        "security_id": pa.array(np.arange(1, len(names) + 1, dtype=np.int32)),
+        "security_name": pa.array(names, type=pa.string()),
+        "security_type": pa.array([t for _, t in tickers], type=pa.string()),
+        "isin": pa.array([stable_isin(name, country) for name in names], type=pa.string()),
+        "price_bucket": pa.array(buckets),
+        "price_low": pa.array(PRICE_BUCKETS[buckets, 0]),
+        "price_high": pa.array(PRICE_BUCKETS[buckets, 1]),
+    }, schema=SECURITY_MASTER_SCHEMA)
+
+
+def security_master_path(folder: str | Path | None = None) -> Path:
+    return Path(folder or REFERENCE_DIR) / SECURITY_MASTER_FILENAME
+
+
+def load_security_master(folder: str | Path | None = None) -> Optional[pa.Table]:
+    """The persisted master, or None when no simulator has written it yet."""
+    path = security_master_path(folder)
+    if not path.is_file():
+        return None
+    return pq.read_table(path, schema=SECURITY_MASTER_SCHEMA)
+
+
+def write_security_master(table: pa.Table, folder: str | Path | None = None) -> Path:
+    """Persist the master; the file is only rewritten when its content changes."""
+    path = security_master_path(folder)
+    current = load_security_master(folder)
+    if current is None or not current.equals(table):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        pq.write_table(table, path)
+    return path
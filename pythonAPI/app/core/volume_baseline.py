@@ -0,0 +1,342 @@
+# app/core/volume_baseline.py
+# ---------------------------------------------------------------------------
+# Per-security, per-day alert volume summaries in a small SQLite store.
+#
+#   daily_volume      folder, key (security_id | security_name), security, day,
+#                     n (alerts), total (sum of total_volume), sketch (quantile sketch)
+#   ingested_sources  folder, path, mtime_ns, size, start / end day of every source summarised
+#
+# The sketch is a sparse log-bucket histogram (relative accuracy SKETCH_ALPHA): a volume v > 0
+# falls in bucket ceil(log_gamma(v)), zero volumes in their own bucket. Sketches of different
+# days merge by adding counts, so a rolling `window_days` median for any day is a lookup over
+# that many stored rows instead of a rescan of the alerts.
+#
+# `refresh_volume_baseline(folder)` compares the folder's sources (flat files, and each date=
+# partition of the Hive dataset on its own) with what was ingested: only the days covered by
+# new, rewritten or removed sources are re-read (projected to four columns, de-duplicated like
+# every history read) and replaced, so a daily append re-reads one day. Unchanged folders cost
+# one stat per flat file / partition file. Like the catalog, the store is best effort:
+# callers get None when it cannot be used and fall back to computing a median themselves.
+# ---------------------------------------------------------------------------
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import closing
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    from app.core.paths import DATA_DIR
+    from app.core.datasets import (
+        alerts_date_window, alerts_history_sources, list_alert_sources, partition_fingerprints, read_alerts_history,
+        source_fingerprint,
+    )
+except ModuleNotFoundError:
+    from core.paths import DATA_DIR
+    from core.datasets import (
+        alerts_date_window, alerts_history_sources, list_alert_sources, partition_fingerprints, read_alerts_history,
+        source_fingerprint,
+    )
+
+BASELINE_STORE_PATH = Path(os.getenv("VOLUME_BASELINE_STORE", str(DATA_DIR / "volume_baseline.sqlite")))
+
+SKETCH_ALPHA = 0.01
+_GAMMA = (1.0 + SKETCH_ALPHA) / (1.0 - SKETCH_ALPHA)
+_LOG_GAMMA = float(np.log(_GAMMA))
+ZERO_BUCKET = int(np.iinfo(np.int32).min)
+
+KEYS = ("security_id", "security_name")
+SOURCE_COLUMNS = ("date", "security_name", "security_id", "total_volume")
+
+_DDL = """
+CREATE TABLE IF NOT EXISTS daily_volume (
+    folder   TEXT NOT NULL,
+    key      TEXT NOT NULL,
+    day      TEXT NOT NULL,
+    security TEXT NOT NULL,
+    n        INTEGER NOT NULL,
+    total    REAL NOT NULL,
+    sketch   BLOB NOT NULL,
+    PRIMARY KEY (folder, key, day, security)
+);
+CREATE TABLE IF NOT EXISTS ingested_sources (
+    folder     TEXT NOT NULL,
+    path       TEXT NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    size       INTEGER NOT NULL,
+    start_date TEXT,
+    end_date   TEXT,
+    PRIMARY KEY (folder, path)
+);
+"""
+
+_init_lock = threading.Lock()
+_initialized: set = set()
+
+DayRange = Tuple[Optional[date], Optional[date]]  # (None, None): every day
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(str(BASELINE_STORE_PATH), timeout=30)
+    key = str(BASELINE_STORE_PATH)
+    if key not in _initialized:
+        with _init_lock:
+            if key not in _initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.executescript(_DDL)
+                _initialized.add(key)
+    return conn
+
+
+def _folder_key(folder: Union[str, Path]) -> str:
+    return str(Path(folder).resolve())
+
+
+# -----------------------------
+# Sketch
+# -----------------------------
+def bucket_of(volumes: np.ndarray) -> np.ndarray:
+    """Sketch bucket of every volume (<= 0 -> ZERO_BUCKET)."""
+    v = np.asarray(volumes, dtype=float)
+    out = np.full(len(v), ZERO_BUCKET, dtype=np.int64)
+    pos = v > 0
+    out[pos] = np.ceil(np.log(v[pos]) / _LOG_GAMMA)
+    return out
+
+
+def bucket_value(buckets: np.ndarray) -> np.ndarray:
+    """Representative volume of each bucket (within SKETCH_ALPHA of every value in it)."""
+    b = np.asarray(buckets, dtype=np.int64)
+    out = 2.0 * np.power(_GAMMA, np.where(b == ZERO_BUCKET, 0, b).astype(float)) / (_GAMMA + 1.0)
+    return np.where(b == ZERO_BUCKET, 0.0, out)
+
+
+def _encode(buckets: np.ndarray, counts: np.ndarray) -> bytes:
+    return np.stack([buckets, counts]).astype(np.int32).tobytes()
+
+
+def _decode(blob: bytes) -> Tuple[np.ndarray, np.ndarray]:
+    arr = np.frombuffer(blob, dtype=np.int32).reshape(2, -1)
+    return arr[0].astype(np.int64), arr[1].astype(np.int64)
+
+
+def _median_of_counts(counts: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """Median per row of a (rows x buckets) count matrix whose columns are sorted by `values` (NaN when empty)."""
+    total = counts.sum(axis=1)
+    cum = counts.cumsum(axis=1)
+    lo = (cum > ((total - 1) // 2)[:, None]).argmax(axis=1)
+    hi = (cum > (total // 2)[:, None]).argmax(axis=1)
+    return np.where(total > 0, (values[lo] + values[hi]) / 2.0, np.nan)
+
+
+# -----------------------------
+# Ingestion
+# -----------------------------
+def _security_labels(df: pd.DataFrame, key: str) -> Optional[pd.Series]:
+    if key not in df.columns:
+        return None
+    if key == "security_id":
+        ids = pd.to_numeric(df[key], errors="coerce")
+        return ids.dropna().astype("int64").astype(str)
+    return df[key].dropna().astype(str)
+
+
+def daily_summaries(table: pa.Table) -> Dict[str, pd.DataFrame]:
+    """key -> rows (security, day, n, total, sketch) of an alerts table, one per security and day."""
+    if not {"date", "total_volume"}.issubset(table.column_names):
+        return {}
+    df = pd.DataFrame({
+        "day": table.column("date").cast(pa.string()).to_pandas(),
+        "volume": pd.to_numeric(table.column("total_volume").to_pandas(), errors="coerce"),
+    })
+    for key in KEYS:
+        if key in table.column_names:
+            df[key] = table.column(key).to_pandas()
+    df = df.dropna(subset=["day", "volume"])
+    df["bucket"] = bucket_of(df["volume"].to_numpy())
+
+    out: Dict[str, pd.DataFrame] = {}
+    for key in KEYS:
+        labels = _security_labels(df, key)
+        if labels is None or labels.empty:
+            continue
+        part = df.loc[labels.index, ["day", "volume", "bucket"]].assign(security=labels)
+        agg = part.groupby(["security", "day"], sort=True).agg(n=("volume", "size"), total=("volume", "sum"))
+        # (security, day, bucket) counts in the same group order as `agg`: split where (security, day) changes
+        hist = part.groupby(["security", "day", "bucket"], sort=True).size()
+        sec = hist.index.get_level_values("security").to_numpy()
+        day = hist.index.get_level_values("day").to_numpy()
+        change = np.flatnonzero((sec[1:] != sec[:-1]) | (day[1:] != day[:-1])) + 1
+        buckets = np.split(hist.index.get_level_values("bucket").to_numpy(), change)
+        counts = np.split(hist.to_numpy(), change)
+        out[key] = agg.reset_index().assign(sketch=[_encode(b, c) for b, c in zip(buckets, counts)])
+    return out
+
+
+def _merge_ranges(ranges: Iterable[DayRange]) -> List[DayRange]:
+    ranges = list(ranges)
+    if any(lo is None or hi is None for lo, hi in ranges):
+        return [(None, None)]
+    merged: List[DayRange] = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], hi))
+        else:
+            merged.append((lo, hi))
+    return merged
+
+
+def _source_window(path: Path) -> Optional[DayRange]:
+    """Days a source holds (None when it has no rows)."""
+    try:
+        return alerts_date_window(path)
+    except Exception:
+        return (None, None)  # no usable statistics: every day may have changed
+
+
+def _replace_days(conn: sqlite3.Connection, folder: Path, fkey: str, lo: Optional[date], hi: Optional[date]) -> int:
+    """Re-summarise [lo, hi] (every day when unbounded) from the folder's sources; returns days written."""
+    table = read_alerts_history(alerts_history_sources(folder, lo, hi), lo, hi, columns=SOURCE_COLUMNS)
+    if lo is None:
+        conn.execute("DELETE FROM daily_volume WHERE folder = ?", (fkey,))
+    else:
+        conn.execute(
+            "DELETE FROM daily_volume WHERE folder = ? AND day BETWEEN ? AND ?", (fkey, lo.isoformat(), hi.isoformat())
+        )
+    days = set()
+    for key, rows in daily_summaries(table).items():
+        conn.executemany(
+            "INSERT OR REPLACE INTO daily_volume (folder, key, day, security, n, total, sketch) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(fkey, key, d, s, int(n), float(t), sk)
+             for s, d, n, t, sk in zip(rows["security"], rows["day"], rows["n"], rows["total"], rows["sketch"])],
+        )
+        days.update(rows["day"])
+    return len(days)
+
+
+def refresh_volume_baseline(folder: Union[str, Path]) -> Optional[int]:
+    """
+    Bring the folder's daily summaries up to date with its sources; returns the number of days
+    (re)written, 0 when nothing changed, None when the store is unavailable.
+    """
+    p = Path(folder)
+    if not p.is_dir():
+        return None
+    fkey = _folder_key(p)
+    # Flat files are tracked whole; a Hive dataset per date= partition, so appending or
+    # rewriting one day re-reads that day only
+    current: Dict[str, Tuple[int, int, Callable[[], Optional[DayRange]]]] = {}
+    for src in list_alert_sources(p):
+        if src.is_dir():
+            for d, (path, mtime_ns, size) in partition_fingerprints(src).items():
+                current[path] = (mtime_ns, size, lambda d=d: (d, d))
+        else:
+            path, mtime_ns, size = source_fingerprint(src)
+            current[path] = (mtime_ns, size, lambda src=src: _source_window(src))
+    try:
+        BASELINE_STORE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with closing(_connect()) as conn, conn:
+            known = {
+                path: (mtime_ns, size, start, end)
+                for path, mtime_ns, size, start, end in conn.execute(
+                    "SELECT path, mtime_ns, size, start_date, end_date FROM ingested_sources WHERE folder = ?", (fkey,)
+                )
+            }
+            stale: List[DayRange] = []
+            fresh = []
+            for path, (mtime_ns, size, source_window) in current.items():
+                if known.get(path, (None, None))[:2] != (mtime_ns, size):
+                    window = source_window()
+                    if window is not None:
+                        stale.append(window)
+                    fresh.append((fkey, path, mtime_ns, size, *(d.isoformat() if d else None for d in window or (None, None))))
+            for path, (_, _, start, end) in known.items():
+                if path not in current:
+                    stale.append((date.fromisoformat(start), date.fromisoformat(end)) if start and end else (None, None))
+            if not stale and not fresh:
+                return 0
+
+            written = sum(_replace_days(conn, p, fkey, lo, hi) for lo, hi in _merge_ranges(stale))
+            conn.executemany(
+                "DELETE FROM ingested_sources WHERE folder = ? AND path = ?",
+                [(fkey, path) for path in known if path not in current],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO ingested_sources (folder, path, mtime_ns, size, start_date, end_date)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                fresh,
+            )
+    except (sqlite3.Error, OSError, pa.ArrowException):
+        return None
+    return written
+
+
+# -----------------------------
+# Lookups
+# -----------------------------
+def rolling_median_volume(
+    folder: Union[str, Path],
+    key: str,
+    securities: Sequence[object],
+    days: Sequence[date],
+    window_days: int,
+) -> Optional[np.ndarray]:
+    """
+    Median total_volume of `securities[i]` over the `window_days` days ending on `days[i]` (inclusive),
+    for every i; NaN where the window holds no alerts, None when the store is unavailable.
+    Call `refresh_volume_baseline` first so the store covers the folder's newest sources.
+    """
+    if key not in KEYS:
+        raise ValueError(f"Unknown baseline key: {key}")
+    n = len(securities)
+    out = np.full(n, np.nan)
+    if n == 0:
+        return out
+    labels = pd.Series(securities).astype("int64").astype(str) if key == "security_id" else pd.Series(securities).astype(str)
+    day_idx = pd.to_datetime(pd.Series(days))
+    valid = day_idx.notna().to_numpy()
+    if not valid.any():
+        return out
+    last = day_idx[valid].max().date()
+    first = day_idx[valid].min().date() - timedelta(days=window_days - 1)
+    try:
+        with closing(_connect()) as conn:
+            rows = conn.execute(
+                "SELECT security, day, sketch FROM daily_volume WHERE folder = ? AND key = ? AND day BETWEEN ? AND ?",
+                (_folder_key(folder), key, first.isoformat(), last.isoformat()),
+            ).fetchall()
+    except sqlite3.Error:
+        return None
+    if not rows:
+        return out
+
+    wanted = pd.DataFrame({
+        "security": labels.to_numpy(),
+        "offset": np.where(valid, (day_idx - pd.Timestamp(first)).dt.days.fillna(0).astype(int).to_numpy(), -1),
+    })
+    stored: Dict[str, List[Tuple[int, bytes]]] = {}
+    for security, day, sketch in rows:
+        stored.setdefault(security, []).append(((date.fromisoformat(day) - first).days, sketch))
+
+    n_days = (last - first).days + 1
+    for security, idx in wanted[valid].groupby("security").groups.items():
+        entries = stored.get(security)
+        if not entries:
+            continue
+        decoded = [(off, *_decode(blob)) for off, blob in entries]
+        all_buckets = np.unique(np.concatenate([b for _, b, _ in decoded]))
+        counts = np.zeros((n_days + 1, len(all_buckets)), dtype=np.int64)  # row 0: before the range
+        for off, b, c in decoded:
+            counts[off + 1, np.searchsorted(all_buckets, b)] += c
+        cum = counts.cumsum(axis=0)
+        end = wanted.loc[idx, "offset"].to_numpy() + 1
+        window = cum[end] - cum[np.maximum(end - window_days, 0)]
+        out[idx] = _median_of_counts(window, bucket_value(all_buckets))
+    return out
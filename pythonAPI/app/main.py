@@ -13,6 +13,7 @@ if str(_project_root) not in sys.path:
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.paths import ensure_data_tree
+from app.core.compression import CompressionMiddleware
 
 # Bootstrap ./data/*
 ensure_data_tree()
@@ -45,16 +46,24 @@ app.add_middleware(
     allow_credentials=True,
 )
 
+# zstd / br / gzip for JSON and NDJSON bodies (PDF, Arrow and SSE responses pass through)
+app.add_middleware(CompressionMiddleware)
+
 # Import routers normally (now that sys.path is fixed)
 from app.api.endpoints.simulate_data_sgx import router as simulate_router
 from app.api.endpoints.pumpdump_calibaration import router as pumpdump_calib_router
 from app.api.endpoints.insiderTrading_calibaration import router as insider_calib_router
 from app.api.endpoints.pumpdump_ml_engine import router as pumpdump_ml_router
 from app.api.endpoints.static_template_report import router as static_template_report_router
+from app.api.endpoints.jobs import router as jobs_router
+from app.api.endpoints.simulate_stream import router as simulate_stream_router
+from app.api.endpoints.simulate_trade_tape import router as simulate_tape_router
+from app.api.endpoints.summary import router as summary_router
 
-# ⬇️ This router exposes BOTH:
+# ⬇️ This router exposes:
 #    GET /simulate/alerts/latest/pumpdump
 #    GET /simulate/alerts/latest/insidertrading
+#    GET /simulate/alerts/latest/{scenario}   (any of the 15 alert scenarios, cached)
 from app.api.endpoints.read_latest_pumpdump_insider_data import router as simulate_read_router
 
 # Optional:
@@ -69,6 +78,10 @@ app.include_router(pumpdump_calib_router)          # /simulate/alerts
 app.include_router(insider_calib_router)           # /insidertrading
 app.include_router(pumpdump_ml_router)             # /pumpdumpml
 app.include_router(static_template_report_router)  # /reports/template
+app.include_router(jobs_router)                    # /jobs
+app.include_router(simulate_stream_router)         # /simulate/alerts/stream
+app.include_router(simulate_tape_router)           # /simulate/trades
+app.include_router(summary_router)                 # /summary (DuckDB aggregates)
 
 # ✅ NEW: include the router that contains BOTH "latest" endpoints
 app.include_router(simulate_read_router, tags=["Get – Read (Parquet)"])
@@ -0,0 +1,41 @@
+import json
+from datetime import date
+
+import numpy as np
+import pyarrow.parquet as pq
+from fastapi.testclient import TestClient
+
+from app.api.endpoints import read_latest_pumpdump_insider_data as reader
+from app.api.endpoints.simulate_data_sgx import DEFAULT_ALERT_WEIGHTS, _generate_table_for_day
+from app.core import catalog
+from app.main import app
+
+
+def test_ndjson_timestamps_match_json(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    monkeypatch.setattr(reader, "DEFAULT_DIR", tmp_path)
+    table = _generate_table_for_day(date(2025, 1, 9), 500, DEFAULT_ALERT_WEIGHTS, np.random.default_rng(1))
+    pq.write_table(table, tmp_path / "sgx_alerts_2025-01-09_2025-01-09_20250109-000000.parquet")
+
+    client = TestClient(app)
+    params = {"limit": 25, "fields": "trade_id,ts,amend_received_datetime"}
+    as_json = client.get("/simulate/alerts/latest/pumpdump", params=params)
+    as_ndjson = client.get(
+        "/simulate/alerts/latest/pumpdump", params=params, headers={"Accept": "application/x-ndjson"}
+    )
+    assert as_json.status_code == as_ndjson.status_code == 200
+
+    rows = [json.loads(line) for line in as_ndjson.text.splitlines() if line]
+    assert rows == as_json.json()["results"]
+    assert rows[0]["ts"].startswith("2025-01-09T") and rows[0]["ts"].endswith("+08:00")
+
+
+def test_filter_the_source_cannot_take_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    monkeypatch.setattr(reader, "DEFAULT_DIR", tmp_path)
+    table = _generate_table_for_day(date(2025, 1, 9), 200, DEFAULT_ALERT_WEIGHTS, np.random.default_rng(2))
+    table = table.set_column(table.schema.get_field_index("value"), "value", table.column("value").cast("string"))
+    pq.write_table(table, tmp_path / "sgx_alerts_2025-01-09_2025-01-09_20250109-000000.parquet")
+
+    resp = TestClient(app).get("/simulate/alerts/latest/pumpdump", params={"min_value": 1000})
+    assert resp.status_code == 400
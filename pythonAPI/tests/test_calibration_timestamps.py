@@ -0,0 +1,28 @@
+import pandas as pd
+
+from app.api.endpoints.pumpdump_calibaration import _isoformat
+from app.core.schema import ALERT_TZ
+
+
+def _alert_ts(values, unit="us"):
+    """A `ts` column as alerts store it: timestamp[us, tz=Asia/Singapore]."""
+    return pd.Series(pd.to_datetime(values, format="ISO8601").tz_localize(ALERT_TZ).as_unit(unit))
+
+
+def test_isoformat_keeps_the_sgt_offset():
+    ts = _alert_ts(["2025-01-01 15:44:33", "2025-01-01 16:30:00.250", None])
+    assert list(_isoformat(ts)) == ["2025-01-01T15:44:33+08:00", "2025-01-01T16:30:00.250000+08:00", None]
+
+
+def test_isoformat_matches_timestamp_isoformat_for_every_unit():
+    for unit in ("s", "ms", "us", "ns"):
+        ts = _alert_ts(["2025-01-01 09:00:00", "2025-01-01 23:59:59.123"], unit=unit)
+        assert list(_isoformat(ts)) == [t.isoformat() for t in ts]
+
+
+def test_isoformat_round_trips_to_the_same_instant_and_day():
+    ts = _alert_ts(["2025-01-01 15:59:59", "2025-01-01 16:00:00", "2025-01-01 23:30:00.000001"])
+    parsed = pd.to_datetime(pd.Series(_isoformat(ts)), utc=True, format="ISO8601").dt.tz_convert(ALERT_TZ)
+    assert parsed.dt.as_unit("us").equals(ts)
+    # the ML volume store keys days the same way (utc=True -> alert zone): prints after 16:00 stay on their day
+    assert list(parsed.dt.date.astype(str)) == ["2025-01-01"] * 3
@@ -0,0 +1,34 @@
+from datetime import date
+
+import pytest
+
+from app.core import catalog
+
+DAY = [date(2025, 1, 9)]
+
+
+def test_generators_are_freed_once_no_file_holds_their_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    first, second = tmp_path / "first.parquet", tmp_path / "second.parquet"
+    for path in (first, second):
+        path.touch()
+        g = catalog.claim_id_generator(DAY, 2, producer="test")
+        catalog.attach_id_generator(DAY, g, path)
+    with pytest.raises(RuntimeError):
+        catalog.claim_id_generator(DAY, 2, producer="test")
+
+    first.unlink()
+    assert catalog.claim_id_generator(DAY, 2, producer="test") == 0
+
+    # a failed run gives its claim back
+    catalog.release_id_generator(DAY, 0)
+    assert catalog.claim_id_generator(DAY, 2, producer="test") == 0
+
+
+def test_rewriting_a_day_in_the_same_dataset_frees_the_replaced_generator(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, "CATALOG_PATH", tmp_path / "catalog.sqlite")
+    root = tmp_path / "sgx_alerts"
+    root.mkdir()
+    for _ in range(3):  # three rewrites of the day with only two generators
+        g = catalog.claim_id_generator(DAY, 2, producer="test")
+        catalog.attach_id_generator(DAY, g, root)
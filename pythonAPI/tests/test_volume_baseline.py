@@ -0,0 +1,35 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pyarrow as pa
+
+from app.core import volume_baseline
+from app.core.datasets import write_hive_dataset
+
+
+def _day_table(d: date, n: int = 50) -> pa.Table:
+    rng = np.random.default_rng(d.toordinal())
+    return pa.table({
+        "alert_id": pa.array([f"ALRT-{d:%Y%m%d}-{i:04d}" for i in range(n)]),
+        "date": pa.array([d] * n, type=pa.date32()),
+        "report_short_name": pa.array(["Pump and Dump"] * n),
+        "security_name": pa.array([f"SEC{i % 5}" for i in range(n)]),
+        "security_id": pa.array(np.arange(n, dtype=np.int32) % 5 + 1),
+        "total_volume": pa.array(rng.integers(1_000, 100_000, n).astype(float)),
+    })
+
+
+def test_appending_one_hive_day_resummarises_only_that_day(tmp_path, monkeypatch):
+    monkeypatch.setattr(volume_baseline, "BASELINE_STORE_PATH", tmp_path / "baseline.sqlite")
+    first = date(2025, 1, 1)
+    write_hive_dataset([_day_table(first + timedelta(days=i)) for i in range(10)], tmp_path)
+
+    assert volume_baseline.refresh_volume_baseline(tmp_path) == 10
+    assert volume_baseline.refresh_volume_baseline(tmp_path) == 0
+
+    write_hive_dataset([_day_table(first + timedelta(days=10))], tmp_path)
+    assert volume_baseline.refresh_volume_baseline(tmp_path) == 1
+
+    # rewriting an existing day re-reads that day only as well
+    write_hive_dataset([_day_table(first + timedelta(days=3), n=20)], tmp_path)
+    assert volume_baseline.refresh_volume_baseline(tmp_path) == 1